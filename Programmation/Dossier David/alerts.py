@@ -0,0 +1,330 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : alerts.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Envoi des alertes hors de la boucle de capture
+#
+# AlertDispatcher.signaler() ne fait qu'écrire l'alerte et ses envois
+# (une ligne par destination, table envoi de storage.py) dans une seule
+# transaction puis réveille les threads d'envoi : la detection n'attend
+# jamais le reseau. Chaque destination (webhook HTTP, MQTT, passerelle
+# SMS) a ses propres threads qui vident sa file : un envoi raté est
+# retenté avec un délai exponentiel, jusqu'à MAX_ATTEMPTS essais. Une
+# même alerte répétée pendant DEDUP_WINDOW secondes (occupation qui
+# oscille autour d'une transition, alerte environnementale qui revient)
+# est enregistrée mais n'est pas renvoyée.
+# La latence entre la detection et l'envoi est enregistrée par envoi.
+#
+# StandInServer est un serveur HTTP local qui joue le webhook et la
+# passerelle SMS pour les essais (pannes et délais simulés).
+#
+# Utilisation : python3 alerts.py --essai [--pannes 2] [--alertes 5]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from metrics import metrics
+
+# Fenêtre (s) pendant laquelle une alerte identique n'est pas renvoyée
+DEDUP_WINDOW = 300.0
+# Nombre maximum d'essais d'un envoi
+MAX_ATTEMPTS = 8
+# Délai avant le 2e essai (s), doublé à chaque échec jusqu'à BACKOFF_MAX
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+# Threads d'envoi par destination
+SINK_WORKERS = 1
+# Attente maximum (s) d'un thread d'envoi sans nouvelle alerte
+POLL_INTERVAL = 5.0
+# Délai maximum (s) d'une requête HTTP / MQTT
+SEND_TIMEOUT = 5.0
+# Longueur maximum d'un SMS
+SMS_LENGTH = 160
+
+
+# Webhook HTTP : POST JSON de l'alerte
+class WebhookSink:
+    def __init__(self, nom="webhook", url="http://127.0.0.1:8080/alerte", timeout=SEND_TIMEOUT, entetes=None):
+        self.nom = nom
+        self.url = url
+        self.timeout = timeout
+        self.entetes = dict(entetes or {}, **{"Content-Type": "application/json"})
+
+    def envoyer(self, message):
+        requete = urllib.request.Request(self.url, data=json.dumps(message).encode(), headers=self.entetes, method="POST")
+        with urllib.request.urlopen(requete, timeout=self.timeout) as reponse:
+            reponse.read()
+
+
+# Broker MQTT (paho-mqtt) : publication QoS 1 du message JSON
+class MqttSink:
+    def __init__(self, nom="mqtt", hote="127.0.0.1", port=1883, sujet="pabo/alerte", timeout=SEND_TIMEOUT):
+        self.nom = nom
+        self.hote = hote
+        self.port = port
+        self.sujet = sujet
+        self.timeout = timeout
+        self.client = None
+
+    def _connecter(self):
+        # Import à la connexion : paho-mqtt n'est nécessaire que si une destination MQTT est configurée
+        import paho.mqtt.client as mqtt
+
+        self.client = mqtt.Client()
+        self.client.connect(self.hote, self.port, keepalive=60)
+        self.client.loop_start()
+
+    def envoyer(self, message):
+        if self.client is None:
+            self._connecter()
+        publication = self.client.publish(self.sujet, json.dumps(message), qos=1)
+        try:
+            # RuntimeError si le client n'est pas connecté (broker arrêté)
+            publication.wait_for_publish(self.timeout)
+        except RuntimeError:
+            pass
+        if not publication.is_published():
+            # Connexion perdue : elle sera refaite au prochain essai
+            self.client.loop_stop()
+            self.client = None
+            raise OSError("Publication MQTT non confirmée")
+
+
+# Passerelle SMS HTTP : POST JSON {destinataire, texte} (texte limité à SMS_LENGTH caractères)
+class SmsGatewaySink:
+    def __init__(self, nom="sms", url="http://127.0.0.1:8080/sms", destinataire="+33600000000", timeout=SEND_TIMEOUT):
+        self.nom = nom
+        self.destinataire = destinataire
+        self.http = WebhookSink(nom, url, timeout)
+
+    def envoyer(self, message):
+        texte = "PABO {} : alerte {} ({}) {}".format(message["date"], message["categorie"], message["alerte"],
+                                                     json.dumps(message["details"], ensure_ascii=False))
+        self.http.envoyer({"destinataire": self.destinataire, "texte": texte[:SMS_LENGTH]})
+
+
+SINK_TYPES = {"webhook": WebhookSink, "mqtt": MqttSink, "sms": SmsGatewaySink}
+
+
+# Crée une destination à partir de son type ("webhook", "mqtt", "sms") et de ses options
+def creer_sink(nom, type_sink, **options):
+    return SINK_TYPES[type_sink](nom=nom, **options)
+
+
+# Délai (s) avant le prochain essai après tentatives échecs, avec une part aléatoire
+def backoff(tentatives, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    return min(maximum, base * 2 ** (tentatives - 1)) * random.uniform(0.75, 1.0)
+
+
+class AlertDispatcher:
+    # sinks : liste de destinations (voir SINK_TYPES)
+    def __init__(self, storage, sinks, workers=SINK_WORKERS, dedup_window=DEDUP_WINDOW, max_attempts=MAX_ATTEMPTS):
+        self.storage = storage
+        self.sinks = {sink.nom: sink for sink in sinks}
+        self.dedup_window = dedup_window
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        # Dernier envoi de chaque clé d'alerte (instant monotonic)
+        self.derniers = {}
+        self.dedupliquees = 0
+        # Incrémenté à chaque alerte mise en file : un thread d'envoi ne manque pas un réveil
+        self.generation = 0
+        self.threads = [threading.Thread(target=self._envoyer, args=(nom,), name="pabo-alerte-{}-{}".format(nom, index), daemon=True)
+                        for nom in self.sinks for index in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    # Enregistre une alerte et la met en file d'envoi, sans attendre le reseau. Renvoie l'id de la ligne alerte
+    # categorie : "detection" / "environnement", cle : identifie une alerte répétée (categorie par défaut)
+    # t_detection : instant (time.time()) de la detection, pour la latence
+    def signaler(self, date, alerte, categorie, details=None, cle=None, t_detection=None):
+        cle = cle or categorie
+        maintenant = time.monotonic()
+        with self.lock:
+            dernier = self.derniers.get(cle)
+            repetee = dernier is not None and maintenant - dernier < self.dedup_window
+            if repetee:
+                self.dedupliquees += 1
+            else:
+                self.derniers[cle] = maintenant
+        details = json.dumps(details or {}, ensure_ascii=False)
+        t_detection = t_detection or time.time()
+        envois = [] if repetee else [(nom, categorie, details, t_detection) for nom in self.sinks]
+        alerte_id = self.storage.add_alerte(date, alerte, envois)
+        if envois:
+            with self.condition:
+                self.generation += 1
+                self.condition.notify_all()
+        return alerte_id
+
+    # Thread d'envoi d'une destination : une erreur de la base (verrouillée, disque plein) ne l'arrête pas,
+    # il réessaie après un délai ; un envoi resté "en_cours" est remis en attente au prochain démarrage
+    def _envoyer(self, nom):
+        sink = self.sinks[nom]
+        echecs_base = 0
+        while not self.stop_event.is_set():
+            try:
+                self._envoyer_suivant(nom, sink)
+                echecs_base = 0
+            except sqlite3.Error as erreur:
+                echecs_base += 1
+                print("Envois vers {} suspendus, erreur de la base : {}".format(nom, erreur))
+                self.stop_event.wait(backoff(echecs_base))
+
+    # Envoie le plus ancien envoi dû de la destination, ou attend une nouvelle alerte
+    def _envoyer_suivant(self, nom, sink):
+        with self.condition:
+            generation = self.generation
+        envoi = self.storage.prendre_envoi(nom)
+        if envoi is None:
+            prochain = self.storage.prochain_envoi(nom)
+            attente = POLL_INTERVAL if prochain is None else min(POLL_INTERVAL, max(0.0, prochain - time.time()))
+            with self.condition:
+                self.condition.wait_for(lambda: self.generation != generation or self.stop_event.is_set(), attente)
+            return
+
+        message = {"alerte_id": envoi["alerte_id"], "date": envoi["date"], "categorie": envoi["categorie"],
+                   "alerte": envoi["alerte"], "details": json.loads(envoi["details"] or "{}")}
+        tentatives = envoi["tentatives"] + 1
+        try:
+            sink.envoyer(message)
+        # Toute erreur de la destination est un essai raté (reseau, broker non connecté, paho-mqtt absent ...) :
+        # l'envoi est retenté plus tard, le thread continue
+        except Exception as erreur:
+            metrics.incrementer("pabo_envois_total", destination=nom, resultat="erreur")
+            if tentatives >= self.max_attempts:
+                print("Envoi alerte {} vers {} abandonné : {}".format(envoi["alerte_id"], nom, erreur))
+                self.storage.terminer_envoi(envoi["id"], "echec", tentatives, erreur=str(erreur))
+            else:
+                self.storage.terminer_envoi(envoi["id"], "en_attente", tentatives,
+                                            prochain_essai=time.time() + backoff(tentatives), erreur=str(erreur))
+            return
+        metrics.incrementer("pabo_envois_total", destination=nom, resultat="envoyee")
+        envoye_le = time.time()
+        latence_ms = 1000.0 * (envoye_le - envoi["t_detection"]) if envoi["t_detection"] else None
+        self.storage.terminer_envoi(envoi["id"], "envoyee", tentatives, envoye_le=envoye_le, latence_ms=latence_ms)
+
+    # Envois par destination et statut, latence detection -> envoi (ms)
+    def rapport(self):
+        rapport = {"dedupliquees": self.dedupliquees}
+        for destination, stats in self.storage.statistiques_envois().items():
+            latences = stats.pop("latences_ms")
+            if latences:
+                p50, p95 = np.percentile(latences, [50, 95])
+                stats.update({"latence_p50_ms": round(float(p50), 1), "latence_p95_ms": round(float(p95), 1),
+                              "latence_max_ms": round(max(latences), 1)})
+            rapport[destination] = stats
+        return rapport
+
+    # Arrête les threads d'envoi, les envois en attente restent dans la base pour le prochain démarrage
+    def stop(self, timeout=SEND_TIMEOUT):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+
+
+# Serveur HTTP local qui remplace le webhook et la passerelle SMS pendant les essais
+# pannes : nombre de requêtes (par chemin) refusées avec une erreur 503 avant de répondre normalement
+class StandInServer:
+    def __init__(self, port=0, pannes=0, delai=0.0):
+        self.recues = []
+        self.pannes = pannes
+        self.delai = delai
+        self.refusees = {}
+        self.lock = threading.Lock()
+        serveur = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corps = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                time.sleep(serveur.delai)
+                with serveur.lock:
+                    refusees = serveur.refusees.get(self.path, 0)
+                    if refusees < serveur.pannes:
+                        serveur.refusees[self.path] = refusees + 1
+                        code = 503
+                    else:
+                        serveur.recues.append((self.path, corps, time.time()))
+                        code = 200
+                self.send_response(code)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Gestionnaire)
+        self.url = "http://127.0.0.1:{}".format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="pabo-serveur-essai", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# Essai complet : alertes répétées et pannes du serveur, envoi vers le webhook et la passerelle SMS locaux
+def essai(alertes, pannes, delai, duree_max=30.0):
+    from storage import DetectionStorage
+
+    serveur = StandInServer(pannes=pannes, delai=delai)
+    dossier = tempfile.mkdtemp(prefix="pabo-alertes-")
+    storage = DetectionStorage(os.path.join(dossier, "essai.sqlite"))
+    sinks = [WebhookSink(url=serveur.url + "/alerte"), SmsGatewaySink(url=serveur.url + "/sms")]
+    dispatcher = AlertDispatcher(storage, sinks, dedup_window=60.0)
+    try:
+        debut = time.perf_counter()
+        for index in range(alertes):
+            date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Une alerte de detection par frame (dédupliquée) et une alerte environnementale distincte par grandeur
+            dispatcher.signaler(date, 1, "detection", {"personnes": 0, "vulnerables": 1})
+            dispatcher.signaler(date, 1, "environnement", {"grandeurs": ["temperature"]}, cle="environnement:temperature{}".format(index % 2))
+        print("signaler : {:.2f} ms par alerte (sans attente du reseau)".format(1000.0 * (time.perf_counter() - debut) / (2 * alertes)))
+
+        # Une alerte de detection et deux alertes environnementales distinctes au plus, vers chaque destination
+        attendus = len(sinks) * (1 + min(alertes, 2))
+        limite = time.monotonic() + duree_max
+        while len(serveur.recues) < attendus and time.monotonic() < limite:
+            time.sleep(0.1)
+        print("Recues par le serveur :", len(serveur.recues), "/", attendus, "| refusées :", serveur.refusees)
+        print("Rapport :", dispatcher.rapport())
+    finally:
+        dispatcher.stop()
+        storage.close()
+        serveur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envoi des alertes PABO")
+    parser.add_argument("--essai", action="store_true", help="essai contre un serveur local")
+    parser.add_argument("--alertes", type=int, default=5, help="nombre de frames en alerte")
+    parser.add_argument("--pannes", type=int, default=2, help="requêtes refusées par le serveur avant succès")
+    parser.add_argument("--delai", type=float, default=0.05, help="temps de réponse du serveur (s)")
+    args = parser.parse_args()
+    if args.essai:
+        essai(args.alertes, args.pannes, args.delai)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : backends.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Backends d'execution des reseaux de neurones
+#
+# InProcessBackend : analyse dans le thread appelant.
+# ProcessPoolBackend : chaque processus charge ses propres reseaux et
+# analyse une frame à la fois. Les frames transitent par de la mémoire
+# partagée (multiprocessing.shared_memory), seules les detections
+# (quelques tuples) passent par le tuyau de resultats du processus.
+#
+# Les deux backends ont la même interface :
+#   disponible() / submit(sequence, frame, t_capture) / poll(timeout) / close()
+# poll renvoie des tuples (sequence, frame, t_capture, detections),
+# detections vaut None si l'analyse de la frame a échoué (erreur du
+# reseau ou processus mort). Un processus mort après son démarrage est
+# relancé, un processus mort pendant son démarrage libère sa case.
+#***********************************************************
+
+# --- Import ---
+import multiprocessing
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+# Nombre de processus d'inference du service (0 : inference dans le thread de detection, avec suivi
+# entre deux detections ; 3 sur Raspberry Pi 4 : 4 coeurs, un est laissé à la capture et à Tk)
+INFERENCE_WORKERS = 0
+# Temps maximum (s) laissé à un processus pour charger ses reseaux
+STARTUP_TIMEOUT = 60.0
+
+
+# Analyse dans le thread appelant, une frame à la fois
+class InProcessBackend:
+    def __init__(self, engine):
+        self.engine = engine
+        self.termines = []
+
+    def disponible(self):
+        return True
+
+    def en_cours(self):
+        return 0
+
+    def submit(self, sequence, frame, t_capture):
+        try:
+            detections = self.engine.analyse(frame)
+        except Exception as erreur:
+            print("Erreur analyse : {!r}".format(erreur))
+            detections = None
+        self.termines.append((sequence, frame, t_capture, detections))
+
+    def poll(self, timeout=0):
+        termines, self.termines = self.termines, []
+        return termines
+
+    def close(self):
+        pass
+
+
+# Boucle d'un processus d'inference : attend un index de case, analyse la frame partagée
+# sortie : extrémité d'écriture du tuyau de resultats propre à ce processus
+def _worker_main(index, nom_memoire, shape, taches, sortie, options):
+    # Import dans le processus fils : chaque worker charge ses propres reseaux
+    import cv2
+    from inference import InferenceEngine
+
+    # Un seul thread OpenCV par processus pour ne pas surcharger les coeurs
+    cv2.setNumThreads(1)
+    memoire = shared_memory.SharedMemory(name=nom_memoire)
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=memoire.buf)
+    engine = InferenceEngine(**options)
+    engine.warmup()
+    sortie.send((index, None, None, None))  # prêt
+
+    try:
+        while True:
+            tache = taches.get()
+            if tache is None:
+                break
+            sequence, t_capture = tache
+            # Une erreur sur une frame est renvoyée (detections None) pour libérer la case
+            try:
+                detections = [(genre, label, float(score), tuple(int(v) for v in box), float(confiance))
+                              for (genre, label, score, box, confiance) in engine.analyse(frame)]
+            except Exception as erreur:
+                print("Erreur analyse (processus {}) : {!r}".format(index, erreur))
+                detections = None
+            sortie.send((index, sequence, t_capture, detections))
+    finally:
+        del frame
+        memoire.close()
+
+
+# Pool de processus d'inference avec une case de mémoire partagée par processus
+# Chaque processus a sa file de taches et son tuyau de resultats : un processus tué
+# ne peut pas laisser bloquée une file partagée avec les autres
+class ProcessPoolBackend:
+    def __init__(self, nombre_workers, shape=(480, 640, 3), options=None):
+        # "spawn" : les processus ne doivent pas hériter des threads de capture et de Tk
+        self.contexte = multiprocessing.get_context("spawn")
+        self.shape = shape
+        self.options = options or {}
+        self.memoires = []
+        self.vues = []
+        self.taches = []
+        self.lecteurs = []
+        self.processus = []
+        self.libres = []
+        # Tache en cours de chaque processus occupé : {index : (sequence, t_capture)}
+        self.occupes = {}
+        # Processus ayant fini de charger leurs reseaux (seuls ceux-là sont relancés s'ils meurent)
+        self.prets = set()
+        self.redemarrages = 0
+
+        taille = int(np.prod(shape))
+        for index in range(nombre_workers):
+            memoire = shared_memory.SharedMemory(create=True, size=taille)
+            self.memoires.append(memoire)
+            self.vues.append(np.ndarray(shape, dtype=np.uint8, buffer=memoire.buf))
+            self.taches.append(None)
+            self.lecteurs.append(None)
+            self.processus.append(None)
+            self._lancer(index)
+
+        # Attend que chaque processus ait chargé ses reseaux
+        limite = time.monotonic() + STARTUP_TIMEOUT
+        while len(self.prets) < nombre_workers:
+            self.poll(timeout=max(0.0, limite - time.monotonic()))
+            if len(self.prets) < nombre_workers and (time.monotonic() >= limite or None in self.processus):
+                self.close()
+                raise RuntimeError("Les processus d'inference n'ont pas démarré")
+
+    # Démarre le processus d'une case (avec une nouvelle file de taches et un nouveau tuyau)
+    def _lancer(self, index):
+        self.taches[index] = self.contexte.Queue()
+        self.lecteurs[index], sortie = self.contexte.Pipe(duplex=False)
+        self.processus[index] = self.contexte.Process(
+            target=_worker_main, name="pabo-inference-{}".format(index),
+            args=(index, self.memoires[index].name, self.shape, self.taches[index], sortie, self.options),
+            daemon=True)
+        self.processus[index].start()
+        # Seul le processus garde l'extrémité d'écriture : sa mort ferme le tuyau
+        sortie.close()
+
+    def disponible(self):
+        return bool(self.libres)
+
+    def en_cours(self):
+        return len(self.occupes)
+
+    # Copie la frame dans la case d'un processus libre et lui envoie la tache
+    def submit(self, sequence, frame, t_capture):
+        index = self.libres.pop()
+        np.copyto(self.vues[index], frame)
+        self.taches[index].put((sequence, t_capture))
+        self.occupes[index] = (sequence, t_capture)
+
+    # Récupère les analyses terminées, triées par numero de frame
+    def poll(self, timeout=0):
+        termines = []
+        lecteurs = [lecteur for lecteur, processus in zip(self.lecteurs, self.processus) if processus is not None]
+        for lecteur in connection.wait(lecteurs, timeout):
+            try:
+                index, sequence, t_capture, detections = lecteur.recv()
+            except (EOFError, OSError):
+                # Processus mort : traité par _surveiller
+                continue
+            if sequence is None:
+                self.libres.append(index)
+                self.prets.add(index)
+            elif index in self.occupes:
+                del self.occupes[index]
+                termines.append((sequence, self.vues[index].copy(), t_capture, detections))
+                self.libres.append(index)
+        termines.extend(self._surveiller())
+        return sorted(termines, key=lambda termine: termine[0])
+
+    # Processus morts : leur tache est rendue en erreur, ils sont relancés s'ils avaient démarré
+    def _surveiller(self):
+        termines = []
+        for index, processus in enumerate(self.processus):
+            if processus is None or processus.is_alive():
+                continue
+            print("Processus d'inference {} arrêté (code {})".format(index, processus.exitcode))
+            self.lecteurs[index].close()
+            if index in self.occupes:
+                sequence, t_capture = self.occupes.pop(index)
+                termines.append((sequence, self.vues[index].copy(), t_capture, None))
+            if index in self.libres:
+                self.libres.remove(index)
+            if index in self.prets:
+                self.prets.discard(index)
+                self.redemarrages += 1
+                self._lancer(index)
+            else:
+                # Mort pendant le chargement des reseaux : la case n'est plus utilisée
+                self.processus[index] = None
+        return termines
+
+    def close(self):
+        for index, processus in enumerate(self.processus):
+            if processus is not None:
+                self.taches[index].put(None)
+        for index, processus in enumerate(self.processus):
+            if processus is None:
+                continue
+            processus.join(timeout=2)
+            if processus.is_alive():
+                processus.terminate()
+            self.lecteurs[index].close()
+        self.vues = []
+        for memoire in self.memoires:
+            memoire.close()
+            memoire.unlink()
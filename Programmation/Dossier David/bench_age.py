@@ -0,0 +1,58 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : bench_age.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Compare la latence par visage de l'estimation d'age
+# en boucle (une passe par visage) et en lot (une seule passe)
+# pour 1 à 6 visages. Nécessite les poids du modèle d'age.
+#
+# Utilisation : python3 bench_age.py [repetitions]
+#***********************************************************
+
+# --- Import ---
+import sys
+import time
+
+import numpy as np
+
+from inference import InferenceEngine
+
+MAX_FACES = 6
+REPETITIONS = 20
+
+
+# Génère des images de visage aléatoires de tailles variées
+def visages_synthetiques(nombre, rng):
+    return [rng.integers(0, 256, (rng.integers(60, 200), rng.integers(60, 200), 3), dtype=np.uint8)
+            for _ in range(nombre)]
+
+
+# Temps médian (ms) d'un appel à predict_age
+def mesurer(engine, face_imgs, batched, repetitions):
+    engine.predict_age(face_imgs, batched)  # échauffement
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        engine.predict_age(face_imgs, batched)
+        durees.append(time.perf_counter() - debut)
+    return 1000.0 * float(np.median(durees))
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else REPETITIONS
+    rng = np.random.default_rng(0)
+    engine = InferenceEngine()
+
+    print("visages | boucle ms/visage | lot ms/visage | gain")
+    for nombre in range(1, MAX_FACES + 1):
+        face_imgs = visages_synthetiques(nombre, rng)
+        boucle = mesurer(engine, face_imgs, False, repetitions) / nombre
+        lot = mesurer(engine, face_imgs, True, repetitions) / nombre
+        print(f"{nombre:7d} | {boucle:16.2f} | {lot:13.2f} | x{boucle / lot:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : bench_backend.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Mesure le nombre de frames analysées par seconde
+# avec le backend dans le processus puis avec 1 à 4 processus
+# d'inference. Nécessite les poids des modèles.
+#
+# Utilisation : python3 bench_backend.py [nombre_frames]
+#***********************************************************
+
+# --- Import ---
+import sys
+import time
+
+import numpy as np
+
+from backends import InProcessBackend, ProcessPoolBackend
+
+NOMBRE_FRAMES = 100
+MAX_WORKERS = 4
+SHAPE = (480, 640, 3)
+
+
+# Envoie nombre_frames frames en gardant le backend plein, renvoie les frames par seconde
+def mesurer(backend, frames, nombre_frames):
+    envoyees = 0
+    recues = 0
+    debut = time.perf_counter()
+    while recues < nombre_frames:
+        while envoyees < nombre_frames and backend.disponible():
+            backend.submit(envoyees, frames[envoyees % len(frames)], time.monotonic())
+            envoyees += 1
+        recues += len(backend.poll(timeout=0.05))
+    return nombre_frames / (time.perf_counter() - debut)
+
+
+def main():
+    nombre_frames = int(sys.argv[1]) if len(sys.argv) > 1 else NOMBRE_FRAMES
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, SHAPE, dtype=np.uint8) for _ in range(8)]
+
+    from inference import InferenceEngine
+    fps = mesurer(InProcessBackend(InferenceEngine()), frames, nombre_frames)
+    print(f"dans le processus    : {fps:6.2f} fps")
+
+    for nombre_workers in range(1, MAX_WORKERS + 1):
+        backend = ProcessPoolBackend(nombre_workers, SHAPE)
+        try:
+            fps = mesurer(backend, frames, nombre_frames)
+        finally:
+            backend.close()
+        print(f"{nombre_workers} processus         : {fps:6.2f} fps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : benchmark.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Mesure la latence de chaque étape de la chaine PABO
+#
+# Etapes : get_faces, estimate_age, animal_detection, decoder_ssd (sortie SSD
+# brute de 100 lignes), detection_data_db,
+# bme280.readBME280All (mode forcé), bme280 en mode normal, conversion Tk
+# (ancienne : Image.fromarray + ImageTk.PhotoImage, nouvelle : display.FrameDisplay,
+# avec les allocations par frame), la detection complète (detection_all) et
+# l'analyse dans chaque mode d'inference (analyse.<mode>, avec le nombre de
+# pixels d'entrée des reseaux par frame, indépendant de la machine).
+# Les frames sont synthétiques et le bus I2C est simulé, aucun matériel
+# n'est nécessaire. Si les poids des modèles sont présents ils sont
+# utilisés, sinon des reseaux de remplacement mesurent seulement le
+# pré et post-traitement.
+# Les resultats (p50, p95, p99, débit) sont enregistrés en JSON pour
+# comparer les versions entre elles.
+#
+# Utilisation : python3 benchmark.py [--iterations 200] [--sortie resultats.json]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import struct
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import bme280
+import inference
+from inference import InferenceEngine
+from models import MODEL_DIR, MODELS
+from storage import DetectionStorage
+from surveillance import Surveillance
+from tracking import TrackedDetector
+
+ITERATIONS = 200
+FRAME_SHAPE = (480, 640, 3)
+# Nombre de visages synthétiques pour estimate_age
+FACES = 3
+RESULTS_DIR = "bench_results"
+
+
+# Bus I2C simulé : renvoie des coefficients de calibration et une mesure type d'un BME280
+class FakeSMBus:
+    def __init__(self, temperature_raw=519888, pression_raw=415148, humidite_raw=32000):
+        # dig_T1..dig_T3, dig_P1..dig_P9 (0x88, 24 octets)
+        cal1 = struct.pack("<HhhHhhhhhhhh", 27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+        # dig_H1 (0xA1), dig_H2..dig_H6 (0xE1, 7 octets) avec dig_H4 = 313 et dig_H5 = 50
+        cal3 = struct.pack("<hBBBBb", 362, 0, 313 >> 4, ((50 & 0x0F) << 4) | (313 & 0x0F), 50 >> 4, 30)
+        donnees = [pression_raw >> 12, (pression_raw >> 4) & 0xFF, (pression_raw & 0x0F) << 4,
+                   temperature_raw >> 12, (temperature_raw >> 4) & 0xFF, (temperature_raw & 0x0F) << 4,
+                   humidite_raw >> 8, humidite_raw & 0xFF]
+        self.registres = {0x88: list(cal1), 0xA1: [75], 0xE1: list(cal3), 0xF7: donnees, 0xD0: [0x60, 0]}
+        self.ecritures = 0
+        self.lectures = 0
+
+    def write_byte_data(self, addr, registre, valeur):
+        self.ecritures += 1
+
+    def read_i2c_block_data(self, addr, registre, longueur):
+        self.lectures += 1
+        return self.registres[registre][:longueur]
+
+
+# Reseau de remplacement : renvoie toujours la même sortie
+class StandInNet:
+    def __init__(self, sortie):
+        self.sortie = sortie
+
+    def setInput(self, blob):
+        self.lot = blob.shape[0]
+
+    def forward(self):
+        if callable(self.sortie):
+            return self.sortie(self.lot)
+        return self.sortie
+
+
+# Reseau enveloppé qui compte les pixels d'entrée (coût d'une passe, indépendant de la machine)
+class CompteurPixels:
+    def __init__(self, net):
+        self.net = net
+        self.pixels = 0
+
+    def setInput(self, blob):
+        self.pixels += blob.shape[0] * blob.shape[2] * blob.shape[3]
+        self.net.setInput(blob)
+
+    def forward(self):
+        return self.net.forward()
+
+
+# Moteur qui partage les reseaux d'engine dans un autre mode d'inference
+def engine_en_mode(engine, mode, **nets):
+    nets = {nom + "_net": nets.get(nom) or engine._net(nom) for nom in ("face", "age", "animal")}
+    return InferenceEngine(mode=mode, registry=engine.registry, rois=engine.rois, **nets)
+
+
+# Pixels d'entrée de chaque reseau pour l'analyse d'une frame dans un mode
+def pixels_par_frame(engine, mode, frame):
+    compteurs = {nom: CompteurPixels(engine._net(nom)) for nom in ("face", "age", "animal")}
+    engine_en_mode(engine, mode, **compteurs).analyse(frame)
+    return {nom: compteur.pixels for nom, compteur in compteurs.items()}
+
+
+# Sorties plausibles : une personne avec un visage, un chat
+def reseaux_de_remplacement():
+    ssd = np.zeros((1, 1, 2, 7), dtype=np.float32)
+    ssd[0, 0, 0] = [0, 15, 0.9, 0.1, 0.1, 0.5, 0.9]
+    ssd[0, 0, 1] = [0, 8, 0.8, 0.6, 0.5, 0.9, 0.9]
+    visage = np.zeros((1, 1, 2, 7), dtype=np.float32)
+    visage[0, 0, 0] = [0, 1, 0.95, 0.2, 0.1, 0.4, 0.4]
+    age = lambda lot: np.tile(np.full(8, 0.125, dtype=np.float32), (lot, 1))
+    return {"face_net": StandInNet(visage), "age_net": StandInNet(age), "animal_net": StandInNet(ssd)}
+
+
+# Sortie brute de MobileNetSSD (100 lignes, comme le reseau réel) pour mesurer seulement le décodage
+def sortie_ssd_aleatoire(rng, lignes=100):
+    sortie = np.zeros((1, 1, lignes, 7), dtype=np.float32)
+    sortie[0, 0, :, 1] = rng.integers(0, 21, lignes)
+    sortie[0, 0, :, 2] = rng.random(lignes)
+    coins = rng.random((lignes, 2)) * 0.8
+    sortie[0, 0, :, 3:5] = coins
+    sortie[0, 0, :, 5:7] = coins + 0.05 + rng.random((lignes, 2)) * 0.2
+    return sortie
+
+
+def modeles_presents():
+    return all(os.path.exists(os.path.join(MODEL_DIR, chemin))
+               for (prototxt, caffemodel, _) in MODELS.values() for chemin in (prototxt, caffemodel))
+
+
+# Latences d'une fonction (s), la premiere execution sert d'échauffement
+def chronometrer(fonction, iterations):
+    fonction()
+    durees = np.empty(iterations)
+    for index in range(iterations):
+        debut = time.perf_counter()
+        fonction()
+        durees[index] = time.perf_counter() - debut
+    return durees
+
+
+# Résumé statistique des latences d'une étape
+def statistiques(durees):
+    p50, p95, p99 = np.percentile(durees, [50, 95, 99]) * 1000.0
+    moyenne = float(durees.mean())
+    return {"iterations": len(durees), "moyenne_ms": round(1000.0 * moyenne, 3),
+            "p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3),
+            "debit_par_s": round(1.0 / moyenne, 1) if moyenne > 0 else None}
+
+
+# Conversions Tk (ancienne : nouvelles Image et PhotoImage à chaque frame, nouvelle : display.FrameDisplay)
+# Renvoie None si aucun affichage n'est disponible
+def etape_tk(frame):
+    import tkinter as tk
+    from PIL import Image, ImageTk
+    from display import FrameDisplay
+    try:
+        racine = tk.Tk()
+    except tk.TclError:
+        return None, None
+    racine.withdraw()
+    label = tk.Label(racine)
+    affichage = FrameDisplay(label, frame.shape)
+    apercu = FrameDisplay(tk.Label(racine), frame.shape, preview_scale=0.5)
+
+    def conversion():
+        label.configure(image=ImageTk.PhotoImage(Image.fromarray(frame)))
+    return {"tk_conversion": conversion, "tk_display": lambda: affichage.show(frame),
+            "tk_display_apercu_0.5": lambda: apercu.show(frame)}, racine
+
+
+# Mémoire Python / numpy allouée en moyenne par appel (pic tracemalloc), mesure séparée pour ne pas fausser les latences
+# Les tampons internes de PIL et de Tk ne sont pas suivis par tracemalloc
+def allocations(fonction, iterations):
+    fonction()
+    pics = np.empty(iterations)
+    tracemalloc.start()
+    try:
+        for index in range(iterations):
+            tracemalloc.reset_peak()
+            avant, _ = tracemalloc.get_traced_memory()
+            fonction()
+            pics[index] = tracemalloc.get_traced_memory()[1] - avant
+    finally:
+        tracemalloc.stop()
+    return {"allocation_octets_par_frame": int(pics.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence par étape de la chaine de detection PABO")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--faces", type=int, default=FACES, help="nombre de visages pour estimate_age")
+    parser.add_argument("--synthetique", action="store_true", help="reseaux de remplacement même si les poids sont présents")
+    parser.add_argument("--sortie", help="fichier JSON des resultats (par défaut bench_results/benchmark-<date>.json)")
+    args = parser.parse_args()
+
+    reels = modeles_presents() and not args.synthetique
+    engine = InferenceEngine() if reels else InferenceEngine(**reseaux_de_remplacement())
+    if reels:
+        engine.warmup()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+    faces = [(40 + 120 * i, 60, 140 + 120 * i, 180) for i in range(args.faces)]
+    bme280.bus = FakeSMBus()
+    sortie_ssd = sortie_ssd_aleatoire(rng)
+
+    dossier = tempfile.mkdtemp(prefix="pabo-bench-")
+    storage = DetectionStorage(os.path.join(dossier, "bench.sqlite"))
+    surveillance = Surveillance(storage, TrackedDetector(engine, intervalle=1))
+
+    etapes = {
+        "get_faces": lambda: engine.get_faces(frame),
+        "estimate_age": lambda: engine.estimate_age(frame.copy(), faces),
+        "animal_detection": lambda: engine.animal_detection(frame.copy()),
+        "detection_data_db": lambda: surveillance.detection_data_db(
+            inference.resultats([("(25, 32)", 0.9, (0, 0, 10, 10))]), inference.resultats([("cat", 0.8, (0, 0, 10, 10))])),
+        "decoder_ssd": lambda: inference.decoder_ssd(sortie_ssd, FRAME_SHAPE[1], FRAME_SHAPE[0], inference.SSD_THRESHOLDS),
+        "bme280.readBME280All": bme280.readBME280All,
+        "bme280.normal": bme280.BME280(mode="normal").read,
+        "detection_all": lambda: surveillance.detection_all(frame.copy()),
+    }
+    for mode in inference.INFERENCE_MODES:
+        etapes["analyse." + mode] = lambda moteur=engine_en_mode(engine, mode): moteur.analyse(frame)
+    etapes_tk, racine = etape_tk(frame)
+    if etapes_tk is not None:
+        etapes.update(etapes_tk)
+
+    resultats = {}
+    # Les traces de detection faussent les mesures : elles sont masquées
+    with contextlib.redirect_stdout(io.StringIO()):
+        for nom, fonction in etapes.items():
+            resultats[nom] = statistiques(chronometrer(fonction, args.iterations))
+        for nom in etapes_tk or {}:
+            resultats[nom].update(allocations(etapes[nom], min(args.iterations, 50)))
+    storage.close()
+    if racine is not None:
+        racine.destroy()
+
+    rapport = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "modeles": "reels" if reels else "synthetiques",
+        "inference_mode": engine.mode,
+        "etapes": resultats,
+        "pixels_par_frame": {mode: pixels_par_frame(engine, mode, frame) for mode in inference.INFERENCE_MODES},
+        "sieges": engine.rois,
+        "chargement_modeles": engine.registry.rapport() if reels else {},
+    }
+    if etapes_tk is None:
+        rapport["ignorees"] = {"tk_conversion / tk_display": "aucun affichage disponible"}
+
+    sortie = args.sortie
+    if sortie is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        sortie = os.path.join(RESULTS_DIR, "benchmark-{}.json".format(datetime.now().strftime("%Y%m%d-%H%M%S")))
+    with open(sortie, "w") as fichier:
+        json.dump(rapport, fichier, indent=2)
+
+    print("étape                  |    p50 ms |    p95 ms |    p99 ms |   débit/s")
+    for nom, stats in resultats.items():
+        print(f"{nom:22s} | {stats['p50_ms']:9.3f} | {stats['p95_ms']:9.3f} | {stats['p99_ms']:9.3f} | {stats['debit_par_s']:9.1f}")
+    print("Resultats enregistrés dans", sortie)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,8 @@
 # https://www.raspberrypi-spy.co.uk/
 #
 #--------------------------------------
-import smbus
 import time
+from collections import namedtuple
 from ctypes import c_short
 from ctypes import c_byte
 from ctypes import c_ubyte
@@ -27,8 +27,18 @@ from ctypes import c_ubyte
 DEVICE = 0x77 # Default device I2C address
 
 
-bus = smbus.SMBus(1) # Rev 2 Pi, Pi 2 & Pi 3 uses bus 1
-                     # Rev 1 Pi uses bus 0
+BUS_NUMBER = 1 # Rev 2 Pi, Pi 2 & Pi 3 uses bus 1
+               # Rev 1 Pi uses bus 0
+
+bus = None
+
+def getBus():
+  # open the I2C bus on first use so the module can be imported without hardware
+  global bus
+  if bus is None:
+    import smbus
+    bus = smbus.SMBus(BUS_NUMBER)
+  return bus
 
 def getShort(data, index):
   # return two bytes from data as a signed 16-bit value
@@ -53,56 +63,52 @@ def getUChar(data,index):
 def readBME280ID(addr=DEVICE):
   # Chip ID Register Address
   REG_ID     = 0xD0
-  (chip_id, chip_version) = bus.read_i2c_block_data(addr, REG_ID, 2)
+  (chip_id, chip_version) = getBus().read_i2c_block_data(addr, REG_ID, 2)
   return (chip_id, chip_version)
 
-def readBME280All(addr=DEVICE):
-  # Register Addresses
-  REG_DATA = 0xF7
-  REG_CONTROL = 0xF4
-  REG_CONFIG  = 0xF5
-
-  REG_CONTROL_HUM = 0xF2
-  REG_HUM_MSB = 0xFD
-  REG_HUM_LSB = 0xFE
-
-  # Oversample setting - page 27
-  OVERSAMPLE_TEMP = 2
-  OVERSAMPLE_PRES = 2
-  MODE = 1
-
-  # Oversample setting for humidity register - page 26
-  OVERSAMPLE_HUM = 2
-  bus.write_byte_data(addr, REG_CONTROL_HUM, OVERSAMPLE_HUM)
-
-  control = OVERSAMPLE_TEMP<<5 | OVERSAMPLE_PRES<<2 | MODE
-  bus.write_byte_data(addr, REG_CONTROL, control)
+# Register Addresses
+REG_DATA = 0xF7
+REG_CONTROL = 0xF4
+REG_CONFIG  = 0xF5
+REG_CONTROL_HUM = 0xF2
+
+# Oversample setting - page 27
+OVERSAMPLE_TEMP = 2
+OVERSAMPLE_PRES = 2
+# Oversample setting for humidity register - page 26
+OVERSAMPLE_HUM = 2
+
+# Power modes - page 28
+MODE_SLEEP = 0
+MODE_FORCED = 1
+MODE_NORMAL = 3
+
+# Standby time between two measurements in normal mode (ms -> t_sb bits) - page 30
+STANDBY_MS = {0.5: 0, 62.5: 1, 125: 2, 250: 3, 500: 4, 1000: 5, 10: 6, 20: 7}
+# IIR filter coefficient (coefficient -> filter bits) - page 30
+IIR_FILTER = {0: 0, 2: 1, 4: 2, 8: 3, 16: 4}
+
+Calibration = namedtuple("Calibration", [
+  "dig_T1", "dig_T2", "dig_T3",
+  "dig_P1", "dig_P2", "dig_P3", "dig_P4", "dig_P5", "dig_P6", "dig_P7", "dig_P8", "dig_P9",
+  "dig_H1", "dig_H2", "dig_H3", "dig_H4", "dig_H5", "dig_H6"])
+
+# Calibration coefficients already decoded, per device address
+calibrationCache = {}
+
+def readCalibration(addr=DEVICE):
+  # the calibration EEPROM never changes: read and decode it once per address
+  if addr in calibrationCache:
+    return calibrationCache[addr]
 
   # Read blocks of calibration data from EEPROM
   # See Page 22 data sheet
+  bus = getBus()
   cal1 = bus.read_i2c_block_data(addr, 0x88, 24)
   cal2 = bus.read_i2c_block_data(addr, 0xA1, 1)
   cal3 = bus.read_i2c_block_data(addr, 0xE1, 7)
 
   # Convert byte data to word values
-  dig_T1 = getUShort(cal1, 0)
-  dig_T2 = getShort(cal1, 2)
-  dig_T3 = getShort(cal1, 4)
-
-  dig_P1 = getUShort(cal1, 6)
-  dig_P2 = getShort(cal1, 8)
-  dig_P3 = getShort(cal1, 10)
-  dig_P4 = getShort(cal1, 12)
-  dig_P5 = getShort(cal1, 14)
-  dig_P6 = getShort(cal1, 16)
-  dig_P7 = getShort(cal1, 18)
-  dig_P8 = getShort(cal1, 20)
-  dig_P9 = getShort(cal1, 22)
-
-  dig_H1 = getUChar(cal2, 0)
-  dig_H2 = getShort(cal3, 0)
-  dig_H3 = getUChar(cal3, 2)
-
   dig_H4 = getChar(cal3, 3)
   dig_H4 = (dig_H4 << 24) >> 20
   dig_H4 = dig_H4 | (getChar(cal3, 4) & 0x0F)
@@ -111,44 +117,60 @@ def readBME280All(addr=DEVICE):
   dig_H5 = (dig_H5 << 24) >> 20
   dig_H5 = dig_H5 | (getUChar(cal3, 4) >> 4 & 0x0F)
 
-  dig_H6 = getChar(cal3, 6)
-
-  # Wait in ms (Datasheet Appendix B: Measurement time and current calculation)
-  wait_time = 1.25 + (2.3 * OVERSAMPLE_TEMP) + ((2.3 * OVERSAMPLE_PRES) + 0.575) + ((2.3 * OVERSAMPLE_HUM)+0.575)
-  time.sleep(wait_time/1000)  # Wait the required time  
-
-  # Read temperature/pressure/humidity
-  data = bus.read_i2c_block_data(addr, REG_DATA, 8)
+  calibration = Calibration(
+    dig_T1 = getUShort(cal1, 0),
+    dig_T2 = getShort(cal1, 2),
+    dig_T3 = getShort(cal1, 4),
+    dig_P1 = getUShort(cal1, 6),
+    dig_P2 = getShort(cal1, 8),
+    dig_P3 = getShort(cal1, 10),
+    dig_P4 = getShort(cal1, 12),
+    dig_P5 = getShort(cal1, 14),
+    dig_P6 = getShort(cal1, 16),
+    dig_P7 = getShort(cal1, 18),
+    dig_P8 = getShort(cal1, 20),
+    dig_P9 = getShort(cal1, 22),
+    dig_H1 = getUChar(cal2, 0),
+    dig_H2 = getShort(cal3, 0),
+    dig_H3 = getUChar(cal3, 2),
+    dig_H4 = dig_H4,
+    dig_H5 = dig_H5,
+    dig_H6 = getChar(cal3, 6))
+  calibrationCache[addr] = calibration
+  return calibration
+
+def compensate(data, cal):
+  # turn the 8 bytes read from REG_DATA into temperature (C), pressure (hPa) and humidity (%)
   pres_raw = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
   temp_raw = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
   hum_raw = (data[6] << 8) | data[7]
 
   #Refine temperature
-  var1 = ((((temp_raw>>3)-(dig_T1<<1)))*(dig_T2)) >> 11
-  var2 = (((((temp_raw>>4) - (dig_T1)) * ((temp_raw>>4) - (dig_T1))) >> 12) * (dig_T3)) >> 14
+  var1 = ((((temp_raw>>3)-(cal.dig_T1<<1)))*(cal.dig_T2)) >> 11
+  var2 = (((((temp_raw>>4) - (cal.dig_T1)) * ((temp_raw>>4) - (cal.dig_T1))) >> 12) * (cal.dig_T3)) >> 14
   t_fine = var1+var2
   temperature = float(((t_fine * 5) + 128) >> 8);
 
   # Refine pressure and adjust for temperature
   var1 = t_fine / 2.0 - 64000.0
-  var2 = var1 * var1 * dig_P6 / 32768.0
-  var2 = var2 + var1 * dig_P5 * 2.0
-  var2 = var2 / 4.0 + dig_P4 * 65536.0
-  var1 = (dig_P3 * var1 * var1 / 524288.0 + dig_P2 * var1) / 524288.0
-  var1 = (1.0 + var1 / 32768.0) * dig_P1
+  var2 = var1 * var1 * cal.dig_P6 / 32768.0
+  var2 = var2 + var1 * cal.dig_P5 * 2.0
+  var2 = var2 / 4.0 + cal.dig_P4 * 65536.0
+  var1 = (cal.dig_P3 * var1 * var1 / 524288.0 + cal.dig_P2 * var1) / 524288.0
+  var1 = (1.0 + var1 / 32768.0) * cal.dig_P1
   if var1 == 0:
     pressure=0
   else:
     pressure = 1048576.0 - pres_raw
     pressure = ((pressure - var2 / 4096.0) * 6250.0) / var1
-    var1 = dig_P9 * pressure * pressure / 2147483648.0
-    var2 = pressure * dig_P8 / 32768.0
-    pressure = pressure + (var1 + var2 + dig_P7) / 16.0
+    var1 = cal.dig_P9 * pressure * pressure / 2147483648.0
+    var2 = pressure * cal.dig_P8 / 32768.0
+    pressure = pressure + (var1 + var2 + cal.dig_P7) / 16.0
 
   # Refine humidity
   humidity = t_fine - 76800.0
-  humidity = (hum_raw - (dig_H4 * 64.0 + dig_H5 / 16384.0 * humidity)) * (dig_H2 / 65536.0 * (1.0 + dig_H6 / 67108864.0 * humidity * (1.0 + dig_H3 / 67108864.0 * humidity)))
-  humidity = humidity * (1.0 - dig_H1 * humidity / 524288.0)
+  humidity = (hum_raw - (cal.dig_H4 * 64.0 + cal.dig_H5 / 16384.0 * humidity)) * (cal.dig_H2 / 65536.0 * (1.0 + cal.dig_H6 / 67108864.0 * humidity * (1.0 + cal.dig_H3 / 67108864.0 * humidity)))
+  humidity = humidity * (1.0 - cal.dig_H1 * humidity / 524288.0)
   if humidity > 100:
     humidity = 100
   elif humidity < 0:
@@ -156,6 +178,59 @@ def readBME280All(addr=DEVICE):
 
   return temperature/100.0,pressure/100.0,humidity
 
+class BME280:
+  # mode "forced" : one conversion per read() (lowest power, waits for the conversion)
+  # mode "normal" : the sensor measures continuously every standby_ms, read() is a single 8-byte burst
+  def __init__(self, addr=DEVICE, mode="forced", standby_ms=125, iir_filter=4,
+               oversample_temp=OVERSAMPLE_TEMP, oversample_pres=OVERSAMPLE_PRES, oversample_hum=OVERSAMPLE_HUM):
+    if mode not in ("forced", "normal"):
+      raise ValueError("unknown BME280 mode: {}".format(mode))
+    self.addr = addr
+    self.mode = mode
+    self.standby_ms = standby_ms
+    self.iir_filter = iir_filter
+    self.oversample_temp = oversample_temp
+    self.oversample_pres = oversample_pres
+    self.oversample_hum = oversample_hum
+    self.calibration = readCalibration(addr)
+    # Wait in ms (Datasheet Appendix B: Measurement time and current calculation)
+    self.wait_time = 1.25 + (2.3 * oversample_temp) + ((2.3 * oversample_pres) + 0.575) + ((2.3 * oversample_hum)+0.575)
+    self.configure()
+
+  def configure(self):
+    bus = getBus()
+    # config register is only written reliably in sleep mode - page 28
+    bus.write_byte_data(self.addr, REG_CONTROL, MODE_SLEEP)
+    # ctrl_hum only takes effect after a write to ctrl_meas - page 26
+    bus.write_byte_data(self.addr, REG_CONTROL_HUM, self.oversample_hum)
+    config = STANDBY_MS[self.standby_ms]<<5 | IIR_FILTER[self.iir_filter]<<2
+    bus.write_byte_data(self.addr, REG_CONFIG, config)
+    if self.mode == "normal":
+      bus.write_byte_data(self.addr, REG_CONTROL, self.control(MODE_NORMAL))
+      time.sleep(self.wait_time/1000)  # first measurement
+
+  def control(self, mode):
+    return self.oversample_temp<<5 | self.oversample_pres<<2 | mode
+
+  def read(self):
+    bus = getBus()
+    if self.mode == "forced":
+      bus.write_byte_data(self.addr, REG_CONTROL, self.control(MODE_FORCED))
+      time.sleep(self.wait_time/1000)  # Wait the required time
+    # Read temperature/pressure/humidity
+    data = bus.read_i2c_block_data(self.addr, REG_DATA, 8)
+    return compensate(data, self.calibration)
+
+# Forced-mode sensors used by readBME280All, per device address
+sensors = {}
+
+def readBME280All(addr=DEVICE):
+  # one forced conversion; configuration and calibration are only sent/read on the first call
+  # IIR filter off: values are raw single conversions, as with the original driver
+  if addr not in sensors:
+    sensors[addr] = BME280(addr, iir_filter=0)
+  return sensors[addr].read()
+
 def main():
 
   (chip_id, chip_version) = readBME280ID()
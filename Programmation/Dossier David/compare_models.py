@@ -0,0 +1,275 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : compare_models.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Compare deux choix de modèles (variante et moteur)
+#
+# Les deux choix (par défaut fp32 / OpenCV contre int8 ONNX / onnxruntime)
+# analysent les mêmes images d'un dossier local. Le choix de référence
+# sert de vérité : pour les visages et les chats / chiens, rappel et
+# précision des boites du candidat (même classe, IoU >= MATCH_IOU), pour
+# l'age, accord de la tranche la plus probable sur les visages de la
+# référence. La latence de chaque reseau et de l'analyse complète est
+# mesurée sur les mêmes entrées. Les resultats sont enregistrés en JSON.
+#
+# --mode-candidat compare aussi deux modes d'inference avec les mêmes
+# modèles (par exemple single_pass contre pyramide : visages trouvés en
+# plus par le candidat = boites_candidat - rappel x boites_reference).
+#
+# Seuls les modèles Caffe sont livrés, les variantes ONNX (models.py
+# VARIANTS) sont créées en trois étapes, pour chaque reseau :
+#  1. --exporter convertit le modèle Caffe en ONNX FP32 (caffe2onnx) et
+#     vérifie que onnxruntime le charge avec la même forme de sortie ;
+#  2. --quantifier crée la variante int8 de cet ONNX FP32 par
+#     quantification statique (onnxruntime), calibrée sur les entrées que
+#     le moteur de référence prépare pour ces mêmes images ;
+#  3. la comparaison mesure l'écart de l'export (fp32_onnx) puis celui de
+#     la quantification (int8_onnx) par rapport aux modèles Caffe.
+#
+# Utilisation : python3 compare_models.py --images dossier [--candidat int8_onnx:onnxruntime]
+#               [--reseaux face age animal] [--sortie comparaison.json]
+# Exemple pour le reseau d'age :
+#   python3 compare_models.py --images dossier --exporter age
+#   python3 compare_models.py --images dossier --quantifier age face_age_weights/age_net_fp32.onnx face_age_weights/age_net_int8.onnx
+#   python3 compare_models.py --images dossier --reseaux age --candidat fp32_onnx:onnxruntime
+#   python3 compare_models.py --images dossier --reseaux age --candidat int8_onnx:onnxruntime
+#***********************************************************
+
+# --- Import ---
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmark import RESULTS_DIR, statistiques
+from inference import INFERENCE_MODE, INFERENCE_MODES, InferenceEngine
+from models import MODEL_CHOICE, MODEL_DIR, MODELS, VARIANTS, ModelRegistry, charger_reseau
+from sources import lire_fichier
+from tracking import iou_matrix
+
+# IoU minimum pour qu'une boite du candidat corresponde à une boite de la référence
+MATCH_IOU = 0.5
+# Nombre maximum d'images de calibration pour --quantifier
+CALIBRATION_IMAGES = 100
+
+
+# "variante:moteur" -> (variante, moteur)
+def lire_choix(texte):
+    variante, _, moteur = texte.partition(":")
+    return variante, moteur or "opencv"
+
+
+# Moteur d'inference dont les reseaux listés utilisent le choix donné, les autres gardent MODEL_CHOICE
+def creer_engine(choix, reseaux, mode=INFERENCE_MODE):
+    return InferenceEngine(mode=mode, registry=ModelRegistry(choix={nom: choix for nom in reseaux}))
+
+
+# Rappel et précision des boites du candidat par rapport à la référence (même label, IoU >= MATCH_IOU)
+def correspondances(reference, candidat):
+    trouvees = np.zeros(len(reference), dtype=bool)
+    justes = np.zeros(len(candidat), dtype=bool)
+    if len(reference) and len(candidat):
+        iou = iou_matrix(reference.box, candidat.box)
+        accord = (iou >= MATCH_IOU) & (reference.label[:, None] == candidat.label[None, :])
+        trouvees, justes = accord.any(axis=1), accord.any(axis=0)
+    return int(trouvees.sum()), len(reference), int(justes.sum()), len(candidat)
+
+
+# Latence (s) d'une fonction appelée une fois par image
+def chronometrer(fonction, entrees):
+    durees = np.empty(len(entrees))
+    for index, entree in enumerate(entrees):
+        debut = time.perf_counter()
+        fonction(entree)
+        durees[index] = time.perf_counter() - debut
+    return durees
+
+
+# Découpe les visages (boites non vides) d'une frame
+def decouper(frame, faces):
+    return [frame[start_y:end_y, start_x:end_x] for (start_x, start_y, end_x, end_y) in faces["box"]
+            if end_x > start_x and end_y > start_y]
+
+
+def comparer(frames, reference, candidat):
+    # Echauffement : le chargement et la premiere inference ne comptent pas dans les latences
+    for engine in (reference, candidat):
+        engine.visages_et_objets(frames[0])
+
+    comptes = {"face": np.zeros(4, dtype=np.int64), "animal": np.zeros(4, dtype=np.int64)}
+    ages_accord, ages_total, ecarts_age = 0, 0, []
+    visages = []
+    for frame in frames:
+        # Chaque moteur cherche visages et objets selon son mode d'inference
+        faces, objets = reference.visages_et_objets(frame)
+        faces_candidat, objets_candidat = candidat.visages_et_objets(frame)
+        comptes["face"] += correspondances(faces, faces_candidat)
+        comptes["animal"] += correspondances(objets, objets_candidat)
+        crops = decouper(frame, faces)
+        visages.append(crops)
+        if crops:
+            probabilites_ref = reference.predict_age(crops)
+            probabilites_cand = candidat.predict_age(crops)
+            ages_accord += int((probabilites_ref.argmax(axis=1) == probabilites_cand.argmax(axis=1)).sum())
+            ages_total += len(crops)
+            ecarts_age.append(np.abs(probabilites_ref - probabilites_cand).max(axis=1))
+
+    precision = {}
+    for nom, compte in comptes.items():
+        trouvees, attendues, justes, proposees = (int(valeur) for valeur in compte)
+        precision[nom] = {"rappel": round(trouvees / attendues, 4) if attendues else None,
+                          "precision": round(justes / proposees, 4) if proposees else None,
+                          "boites_reference": attendues, "boites_candidat": proposees}
+    precision["age"] = {"accord_top1": round(ages_accord / ages_total, 4) if ages_total else None,
+                        "ecart_proba_max": round(float(np.concatenate(ecarts_age).max()), 4) if ecarts_age else None,
+                        "visages": ages_total}
+
+    latences = {}
+    lots = [crops for crops in visages if crops]
+    for cle, engine in (("reference", reference), ("candidat", candidat)):
+        latences[cle] = {"face": statistiques(chronometrer(engine.get_faces, frames)),
+                         "animal": statistiques(chronometrer(engine.ssd_detection, frames)),
+                         "analyse": statistiques(chronometrer(engine.analyse, frames))}
+        if lots:
+            latences[cle]["age"] = statistiques(chronometrer(engine.predict_age, lots))
+    return precision, latences
+
+
+# Reseau enveloppé qui garde une copie de chaque blob d'entrée (calibration)
+class BlobRecorder:
+    def __init__(self, net):
+        self.net = net
+        self.blobs = []
+
+    def setInput(self, blob):
+        self.blobs.append(blob.copy())
+        self.net.setInput(blob)
+
+    def forward(self):
+        return self.net.forward()
+
+
+# Export ONNX FP32 d'un reseau Caffe (variante fp32) vers le fichier de sa variante fp32_onnx
+# Le modèle exporté est vérifié : onnxruntime doit le charger et donner une sortie de même forme qu'OpenCV
+def exporter(nom):
+    from caffe2onnx.src.caffe2onnx import Caffe2Onnx
+    from caffe2onnx.src.load_save_model import loadcaffemodel, saveonnxmodel
+
+    prototxt, caffemodel = (os.path.join(MODEL_DIR, fichier) for fichier in VARIANTS[nom]["fp32"])
+    destination = os.path.join(MODEL_DIR, VARIANTS[nom]["fp32_onnx"][0])
+    graphe, poids = loadcaffemodel(prototxt, caffemodel)
+    saveonnxmodel(Caffe2Onnx(graphe, poids, nom).createOnnxModel(), destination)
+
+    blob = np.random.default_rng(0).random(MODELS[nom][2], dtype=np.float32)
+    sorties = []
+    for fichiers, moteur in ((VARIANTS[nom]["fp32"], "opencv"), (VARIANTS[nom]["fp32_onnx"], "onnxruntime")):
+        net = charger_reseau(fichiers, moteur)
+        net.setInput(blob)
+        sorties.append(net.forward())
+    if sorties[0].shape != sorties[1].shape:
+        raise ValueError("Export {} : sortie {} au lieu de {}".format(nom, sorties[1].shape, sorties[0].shape))
+    print("{} : modèle ONNX FP32 enregistré dans {} (écart max avec Caffe {:.2e})".format(
+        nom, destination, float(np.abs(sorties[0] - sorties[1]).max())))
+
+
+# Quantification statique int8 d'un modèle ONNX FP32, calibrée sur les entrées de la référence
+def quantifier(nom, source, destination, frames, reference):
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_static
+
+    enregistreur = BlobRecorder(reference.registry.get(nom))
+    engine = InferenceEngine(mode=reference.mode, registry=reference.registry, **{nom + "_net": enregistreur})
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in frames[:CALIBRATION_IMAGES]:
+            engine.analyse(frame)
+    if not enregistreur.blobs:
+        raise ValueError("Aucune entrée de calibration pour {} (pas de visage dans les images ?)".format(nom))
+
+    class Calibration(CalibrationDataReader):
+        def __init__(self, entree, blobs):
+            self.lots = iter([{entree: blob[i:i + 1]} for blob in blobs for i in range(len(blob))])
+
+        def get_next(self):
+            return next(self.lots, None)
+
+    import onnxruntime
+    entree = onnxruntime.InferenceSession(source, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(source, destination, Calibration(entree, enregistreur.blobs),
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    print("{} : {} blobs de calibration, modèle int8 enregistré dans {}".format(nom, len(enregistreur.blobs), destination))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précision et latence de deux choix de modèles sur un dossier d'images")
+    parser.add_argument("--images", required=True, help="dossier d'images ou vidéo")
+    parser.add_argument("--reference", default="fp32:opencv", help="variante:moteur de référence")
+    parser.add_argument("--candidat", default="int8_onnx:onnxruntime", help="variante:moteur comparé")
+    parser.add_argument("--reseaux", nargs="+", default=list(MODEL_CHOICE), choices=list(MODEL_CHOICE),
+                        help="reseaux remplacés par les choix comparés")
+    parser.add_argument("--mode-reference", default=INFERENCE_MODE, choices=INFERENCE_MODES, help="mode d'inference de référence")
+    parser.add_argument("--mode-candidat", default=INFERENCE_MODE, choices=INFERENCE_MODES, help="mode d'inference comparé")
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument("--exporter", nargs="+", choices=list(MODEL_CHOICE), metavar="RESEAU",
+                        help="exporte les modèles Caffe en ONNX FP32 (variante fp32_onnx)")
+    parser.add_argument("--quantifier", nargs=3, metavar=("RESEAU", "SOURCE_ONNX", "DESTINATION"),
+                        help="crée une variante int8 d'un modèle ONNX FP32")
+    parser.add_argument("--sortie", default=None, help="fichier JSON des resultats")
+    args = parser.parse_args()
+
+    if args.exporter:
+        for nom in args.exporter:
+            exporter(nom)
+        return
+
+    frames = [frame for _, frame in zip(range(args.max_images), (frame for _, frame in lire_fichier(args.images)))]
+    if not frames:
+        raise SystemExit("Aucune image dans {}".format(args.images))
+    reference = creer_engine(lire_choix(args.reference), args.reseaux, args.mode_reference)
+
+    if args.quantifier:
+        nom, source, destination = args.quantifier
+        quantifier(nom, source, destination, frames, reference)
+        return
+
+    candidat = creer_engine(lire_choix(args.candidat), args.reseaux, args.mode_candidat)
+    precision, latences = comparer(frames, reference, candidat)
+    rapport = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": platform.machine(),
+        "images": len(frames),
+        "reseaux": args.reseaux,
+        "reference": args.reference,
+        "candidat": args.candidat,
+        "modes": {"reference": args.mode_reference, "candidat": args.mode_candidat},
+        "precision": precision,
+        "latences": latences,
+        "chargement_modeles": {"reference": reference.registry.rapport(), "candidat": candidat.registry.rapport()},
+    }
+
+    sortie = args.sortie
+    if sortie is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        sortie = os.path.join(RESULTS_DIR, "comparaison-{}.json".format(datetime.now().strftime("%Y%m%d-%H%M%S")))
+    with open(sortie, "w") as fichier:
+        json.dump(rapport, fichier, indent=2)
+
+    print("reseau | p50 référence ms | p50 candidat ms | gain  | précision")
+    for nom in ("face", "animal", "age", "analyse"):
+        if nom not in latences["reference"]:
+            continue
+        p50_ref, p50_cand = latences["reference"][nom]["p50_ms"], latences["candidat"][nom]["p50_ms"]
+        gain = p50_ref / p50_cand if p50_cand else float("nan")
+        print(f"{nom:6s} | {p50_ref:16.2f} | {p50_cand:15.2f} | x{gain:4.2f} | {precision.get(nom, '')}")
+    print("Resultats enregistrés dans", sortie)
+
+
+if __name__ == "__main__":
+    main()
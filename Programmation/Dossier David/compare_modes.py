@@ -0,0 +1,102 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : compare_modes.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Compare le service sans écran et l'IHM Tk
+#
+# Lance service.py puis DetectApp.py (IHM locale) dans des processus
+# séparés, sur la même vidéo et pendant la même durée, et compare leur
+# débit (frames traitées par seconde), leur latence capture -> resultat,
+# leur mémoire (résidente et pic) et leur temps CPU. Sans écran
+# (DISPLAY absent) l'IHM est indiquée comme non mesurée.
+#
+# Utilisation : python3 compare_modes.py --video dossier [--duree 60] [--synthetique] [--sortie modes.json]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmark import RESULTS_DIR
+
+# Marge (s) laissée à chaque mode pour démarrer et s'arrêter en plus de la durée mesurée
+MARGE_DEMARRAGE = 60.0
+# Port du flux du service pendant la mesure (différent du service installé)
+PORT_FLUX_MESURE = 8766
+
+
+# Lance un mode dans son propre processus et lit son rapport final
+def mesurer(commande, duree):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fichier:
+        chemin = fichier.name
+    try:
+        processus = subprocess.run(commande + ["--duree", str(duree), "--rapport", chemin],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                   timeout=duree + MARGE_DEMARRAGE)
+        if os.path.getsize(chemin) == 0:
+            return {"erreur": processus.stderr.strip().splitlines()[-1] if processus.stderr.strip() else
+                    "code de sortie {}".format(processus.returncode)}
+        with open(chemin) as fichier:
+            return json.load(fichier)
+    except subprocess.TimeoutExpired:
+        return {"erreur": "pas d'arrêt après {:.0f} s".format(duree + MARGE_DEMARRAGE)}
+    finally:
+        os.remove(chemin)
+
+
+# Colonnes comparées d'un rapport (service.DetectionService.rapport)
+def resume(rapport):
+    if "erreur" in rapport:
+        return rapport
+    pipeline = rapport["pipeline"]
+    return {"frames_traitees": pipeline["frames_traitees"], "fps": round(pipeline["frames_traitees"] / pipeline["duree_s"], 2)
+            if pipeline["duree_s"] else None, "latence_ms": pipeline["latence_resultat_ms"], "rss_mo": rapport["memoire"]["rss_mo"],
+            "rss_max_mo": rapport["memoire"]["rss_max_mo"], "cpu_s": rapport["cpu_s"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit et mémoire du service sans écran et de l'IHM Tk")
+    parser.add_argument("--video", required=True, help="fichier vidéo ou dossier d'images rejoué en boucle")
+    parser.add_argument("--duree", type=float, default=60.0, help="durée de chaque mesure (s)")
+    parser.add_argument("--synthetique", action="store_true", help="reseaux de remplacement (sans les poids des modèles)")
+    parser.add_argument("--sortie", default=None, help="fichier JSON des resultats")
+    args = parser.parse_args()
+
+    options = ["--video", args.video] + (["--synthetique"] if args.synthetique else [])
+    ici = os.path.dirname(os.path.abspath(__file__))
+    resultats = {"service": resume(mesurer([sys.executable, os.path.join(ici, "service.py"), "--sans-capteur", "--silencieux",
+                                             "--port-flux", str(PORT_FLUX_MESURE)] + options, args.duree))}
+    if os.environ.get("DISPLAY"):
+        resultats["ihm"] = resume(mesurer([sys.executable, os.path.join(ici, "DetectApp.py")] + options, args.duree))
+    else:
+        resultats["ihm"] = {"erreur": "pas d'écran (DISPLAY absent), IHM non mesurée"}
+
+    rapport = {"date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "video": args.video, "duree_s": args.duree,
+               "modes": resultats}
+    sortie = args.sortie
+    if sortie is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        sortie = os.path.join(RESULTS_DIR, "modes-{}.json".format(datetime.now().strftime("%Y%m%d-%H%M%S")))
+    with open(sortie, "w") as fichier:
+        json.dump(rapport, fichier, indent=2)
+
+    print("mode    | frames | fps    | latence ms | RSS Mo | pic Mo | CPU s")
+    for mode, resultat in resultats.items():
+        if "erreur" in resultat:
+            print(f"{mode:7s} | {resultat['erreur']}")
+            continue
+        print(f"{mode:7s} | {resultat['frames_traitees']:6} | {resultat['fps']:6.2f} | {resultat['latence_ms']!s:>10} | "
+              f"{resultat['rss_mo']!s:>6} | {resultat['rss_max_mo']:6.1f} | {resultat['cpu_s']:5.1f}")
+    print("Resultats enregistrés dans", sortie)
+
+
+if __name__ == "__main__":
+    main()
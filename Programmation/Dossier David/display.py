@@ -0,0 +1,65 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : display.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Affichage des frames dans l'IHM Tk sans allocation
+#
+# Les tampons (aperçu réduit, image RGBA) sont alloués une fois.
+# L'image PIL partage la mémoire du tampon RGBA (Image.frombuffer) et
+# une seule PhotoImage Tk est mise à jour avec paste() à chaque frame.
+# La conversion BGR (camera / OpenCV) -> RGB est faite par cv2.cvtColor
+# directement dans le tampon. L'aperçu peut être réduit (preview_scale)
+# sans toucher à la frame pleine résolution utilisée par l'inference.
+#***********************************************************
+
+# --- Import ---
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+# Echelle de l'aperçu affiché (1.0 : pleine résolution, 0.5 : moitié), l'inference garde la frame complète
+PREVIEW_SCALE = 1.0
+
+
+class FrameDisplay:
+    def __init__(self, label, shape=(480, 640), preview_scale=PREVIEW_SCALE, fenetre=100):
+        self.label = label
+        hauteur, largeur = shape[:2]
+        self.taille = (max(1, int(largeur * preview_scale)), max(1, int(hauteur * preview_scale)))
+        largeur_apercu, hauteur_apercu = self.taille
+        # Tampon de l'aperçu réduit (BGR), inutile à pleine résolution
+        self.reduite = None
+        if self.taille != (largeur, hauteur):
+            self.reduite = np.empty((hauteur_apercu, largeur_apercu, 3), dtype=np.uint8)
+        # Tampon RGBA partagé avec l'image PIL : "RGBA" est le seul mode couleur que PIL ne recopie pas
+        self.rgba = np.full((hauteur_apercu, largeur_apercu, 4), 255, dtype=np.uint8)
+        self.image = Image.frombuffer("RGBA", self.taille, self.rgba, "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage(self.image)
+        self.label.configure(image=self.photo)
+        self.label.image = self.photo
+        self.durees = deque(maxlen=fenetre)
+        self.frames = 0
+
+    # Affiche une frame BGR : réduction éventuelle, conversion en RGBA dans le tampon, mise à jour de la PhotoImage
+    def show(self, frame):
+        debut = time.perf_counter()
+        if frame.shape[:2] != self.rgba.shape[:2]:
+            if self.reduite is None:
+                self.reduite = np.empty(self.rgba.shape[:2] + (3,), dtype=np.uint8)
+            cv2.resize(frame, self.taille, dst=self.reduite, interpolation=cv2.INTER_AREA)
+            frame = self.reduite
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        self.photo.paste(self.image)
+        self.durees.append(time.perf_counter() - debut)
+        self.frames += 1
+
+    # Temps moyen d'affichage d'une frame (ms)
+    def rapport(self):
+        return {"frames_affichees": self.frames, "taille_apercu": self.taille,
+                "affichage_ms": round(1000.0 * sum(self.durees) / len(self.durees), 2) if self.durees else 0.0}
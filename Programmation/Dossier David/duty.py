@@ -0,0 +1,181 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : duty.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Cadence adaptative de la surveillance
+#
+# Deux états : "veille" (habitacle vide, capture, detection et capteur
+# ralentis) et "actif" (cadence maximum). Le passage en "actif" est
+# immédiat dès qu'une personne, un enfant, un chat / chien ou un corps
+# chaud est detecté, ou que les mesures environnementales se
+# rapprochent des limites de sécurité. Le retour en "veille" demande
+# EMPTY_CYCLES detections vides consécutives, aucune alerte
+# d'occupation en cours et des mesures stables.
+# Le temps, l'utilisation CPU et la puissance (mesurée si un capteur
+# hwmon existe, estimée sinon) de chaque état sont journalisés en CSV.
+#***********************************************************
+
+# --- Import ---
+import csv
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+from sensors import LIMITES
+
+# Période (s) de chaque tache selon l'état : capture camera, detection, lecture du capteur
+RATES = {
+    "actif": {"capture": 0.1, "detection": 0.0, "capteur": 1.0},
+    "veille": {"capture": 1.0, "detection": 5.0, "capteur": 5.0},
+}
+# Nombre de detections vides consécutives avant le passage en veille
+EMPTY_CYCLES = 20
+# Horizon (min) de la projection des mesures : moyenne + pente * horizon
+TREND_HORIZON_MIN = 10.0
+# Marge (unité de la grandeur) en deçà des limites à partir de laquelle la projection réveille la surveillance
+TREND_MARGIN = {"temperature": 2.0, "pression": 20.0, "humidite": 5.0}
+
+# Journal des états (CSV) et période d'écriture (s)
+DUTY_LOG_PATH = "duty_cycle.csv"
+LOG_INTERVAL = 60.0
+# Modèle de puissance du Raspberry Pi 4 (W) quand aucun capteur de puissance n'est présent
+POWER_IDLE_W = 2.7
+POWER_CPU_MAX_W = 6.4
+POWER_CAMERA_W = 1.0
+
+
+# Puissance mesurée (W) par un capteur hwmon (INA219 ...), None si absent
+def lire_puissance():
+    for chemin in glob.glob("/sys/class/hwmon/hwmon*/power1_input"):
+        try:
+            with open(chemin) as fichier:
+                return int(fichier.read()) / 1e6
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+# Puissance estimée (W) à partir de l'utilisation CPU (0-1 sur tous les coeurs) et de la cadence camera
+def estimer_puissance(cpu, periode_capture):
+    camera = POWER_CAMERA_W * min(1.0, RATES["actif"]["capture"] / periode_capture) if periode_capture > 0 else POWER_CAMERA_W
+    return POWER_IDLE_W + cpu * (POWER_CPU_MAX_W - POWER_IDLE_W) + camera
+
+
+class DutyCycleController:
+    def __init__(self, rates=RATES, cycles_vides=EMPTY_CYCLES, journal=DUTY_LOG_PATH, intervalle_journal=LOG_INTERVAL):
+        self.rates = rates
+        self.cycles_vides = cycles_vides
+        self.journal = journal
+        self.intervalle_journal = intervalle_journal
+        self.lock = threading.Lock()
+        # Démarrage à pleine cadence : l'habitacle n'est pas encore connu
+        self.etat = "actif"
+        self.vides = 0
+        self.tendance = False
+        self.changements = 0
+        self.cumuls = {etat: {"duree_s": 0.0, "cpu_s": 0.0, "energie_j": 0.0} for etat in rates}
+        self.debut_segment = time.monotonic()
+        self.cpu_segment = time.process_time()
+
+    # Période (s) d'une tache ("capture", "detection", "capteur") dans l'état courant
+    def periode(self, tache):
+        return self.rates[self.etat][tache]
+
+    # Resultat d'une detection (resume : personnes, vulnérables, alerte, ...)
+    def detection(self, resume_detection):
+        with self.lock:
+            # Habitacle occupé ou occupation encore en alerte (niveau > 0) : la surveillance reste active
+            if resume_detection[0] > 0 or resume_detection[1] > 0 or resume_detection[2] > 0:
+                self.vides = 0
+                self._changer("actif")
+            else:
+                self.vides += 1
+                if self.vides >= self.cycles_vides and not self.tendance:
+                    self._changer("veille")
+            self._journaliser_si_besoin()
+
+    # Agrégat environnemental (voir sensors.statistiques) : la projection à TREND_HORIZON_MIN minutes
+    # s'approche-t-elle d'une limite de sécurité ?
+    def environnement(self, agregat):
+        with self.lock:
+            self.tendance = False
+            for grandeur, (minimum, maximum) in LIMITES.items():
+                if grandeur not in agregat:
+                    continue
+                projection = agregat[grandeur]["moyenne"] + agregat[grandeur]["pente_par_min"] * TREND_HORIZON_MIN
+                marge = TREND_MARGIN.get(grandeur, 0.0)
+                if ((minimum is not None and projection < minimum + marge) or
+                        (maximum is not None and projection > maximum - marge)):
+                    self.tendance = True
+            if self.tendance:
+                self._changer("actif")
+            self._journaliser_si_besoin()
+
+    def _changer(self, etat):
+        if etat != self.etat:
+            self._fermer_segment()
+            print("== Cadence : {} -> {} ==".format(self.etat, etat))
+            self.etat = etat
+            self.changements += 1
+
+    # Segment en cours (depuis le dernier segment fermé) : (durée, cpu_s, utilisation, puissance, puissance mesurée ?)
+    # None si le segment est vide, rien n'est modifié
+    def _segment(self):
+        duree = time.monotonic() - self.debut_segment
+        if duree <= 0:
+            return None
+        cpu = time.process_time() - self.cpu_segment
+        utilisation = cpu / duree / (os.cpu_count() or 1)
+        mesuree = lire_puissance()
+        puissance = mesuree if mesuree is not None else estimer_puissance(utilisation, self.periode("capture"))
+        return duree, cpu, utilisation, puissance, mesuree is not None
+
+    # Ajoute le temps, le CPU et l'énergie depuis le dernier segment à l'état courant, écrit une ligne du journal
+    def _fermer_segment(self):
+        segment = self._segment()
+        if segment is None:
+            return
+        duree, cpu, utilisation, puissance, mesuree = segment
+        cumul = self.cumuls[self.etat]
+        cumul["duree_s"] += duree
+        cumul["cpu_s"] += cpu
+        cumul["energie_j"] += puissance * duree
+        self.debut_segment += duree
+        self.cpu_segment += cpu
+        if self.journal:
+            nouveau = not os.path.exists(self.journal)
+            with open(self.journal, "a", newline="") as fichier:
+                ecrivain = csv.writer(fichier)
+                if nouveau:
+                    ecrivain.writerow(["date", "etat", "duree_s", "cpu_pct", "puissance_w", "puissance_mesuree"])
+                ecrivain.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.etat, round(duree, 1),
+                                   round(100.0 * utilisation, 1), round(puissance, 2), mesuree])
+
+    def _journaliser_si_besoin(self):
+        if time.monotonic() - self.debut_segment >= self.intervalle_journal:
+            self._fermer_segment()
+
+    # Temps, CPU moyen et puissance moyenne de chaque état depuis le démarrage
+    # Le segment en cours est compté sans être fermé : lire le rapport n'écrit pas dans le journal
+    def rapport(self):
+        with self.lock:
+            cumuls = {etat: dict(cumul) for etat, cumul in self.cumuls.items()}
+            segment = self._segment()
+            if segment is not None:
+                duree, cpu, _, puissance, _ = segment
+                cumuls[self.etat]["duree_s"] += duree
+                cumuls[self.etat]["cpu_s"] += cpu
+                cumuls[self.etat]["energie_j"] += puissance * duree
+            resultat = {"etat": self.etat, "changements": self.changements}
+            for etat, cumul in cumuls.items():
+                duree = cumul["duree_s"]
+                resultat[etat] = {"duree_s": round(duree, 1),
+                                  "cpu_pct": round(100.0 * cumul["cpu_s"] / duree / (os.cpu_count() or 1), 1) if duree else 0.0,
+                                  "puissance_moy_w": round(cumul["energie_j"] / duree, 2) if duree else 0.0,
+                                  "energie_wh": round(cumul["energie_j"] / 3600.0, 3)}
+            return resultat
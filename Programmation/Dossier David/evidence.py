@@ -0,0 +1,235 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : evidence.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Preuves des alertes (images et mesures autour de l'alerte)
+#
+# EvidenceRing garde en mémoire, dans un tableau pré-alloué, les frames
+# des dernières secondes d'une camera à cadence réduite (EVIDENCE_FPS).
+# Le thread de capture y copie une frame sans jamais attendre : si le
+# tampon est occupé par une extraction, la frame est simplement sautée.
+#
+# EvidenceStore reçoit les demandes de Surveillance.alerte (identifiant
+# de la ligne alerte) dans une file bornée. Son thread attend la fin de
+# la fenêtre après l'alerte, puis écrit dans EVIDENCE_DIR/alerte-<id>/ les
+# frames de chaque camera en JPEG, la fenêtre du capteur environnemental
+# (capteur.json) et la description (preuve.json). Le dossier est écrit
+# sous un nom temporaire puis renommé : une preuve est complète ou
+# absente. La taille totale est bornée (EVIDENCE_MAX_BYTES) : les preuves
+# les moins récemment écrites ou consultées (ouvrir) sont supprimées.
+#
+# Les clips H.264 ne sont pas utilisés : l'encodeur disponible dépend de
+# la version d'OpenCV, une suite de JPEG se relit partout.
+#***********************************************************
+
+# --- Import ---
+import json
+import math
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import metrics
+
+# Dossier des preuves
+EVIDENCE_DIR = "preuves"
+# Taille maximum (octets) de toutes les preuves sur la carte SD
+EVIDENCE_MAX_BYTES = 500 * 2 ** 20
+# Secondes gardées avant l'alerte et attendues après
+EVIDENCE_PRE_SECONDS = 10.0
+EVIDENCE_POST_SECONDS = 3.0
+# Frames par seconde gardées dans le tampon de preuves (chaque camera)
+EVIDENCE_FPS = 2.0
+# Qualité JPEG des frames des preuves
+EVIDENCE_JPEG_QUALITY = 75
+# Nombre maximum de preuves en attente d'écriture (au-delà, la demande est perdue)
+EVIDENCE_QUEUE_SIZE = 8
+# Secondes de mesures du capteur enregistrées avec une preuve (avant l'alerte)
+EVIDENCE_SENSOR_SECONDS = 120.0
+PREFIXE = "alerte-"
+
+
+# Tampon circulaire pré-alloué des frames récentes d'une camera, à cadence réduite
+class EvidenceRing:
+    def __init__(self, shape=(480, 640, 3), secondes=EVIDENCE_PRE_SECONDS + EVIDENCE_POST_SECONDS, fps=EVIDENCE_FPS):
+        # Une seconde de marge : la fenêtre après l'alerte est extraite un peu après sa fin
+        taille = int(math.ceil((secondes + 1.0) * fps))
+        self.frames = np.empty((taille,) + tuple(shape), dtype=np.uint8)
+        self.instants = np.full(taille, -np.inf)
+        self.periode = 1.0 / fps
+        self.index = 0
+        self.derniere = -np.inf
+        self.sautees = 0
+        self.lock = threading.Lock()
+
+    # Copie la frame si la période est écoulée, sans attendre le verrou (appelée par le thread de capture)
+    def put(self, frame, instant=None):
+        instant = time.monotonic() if instant is None else instant
+        if instant - self.derniere < self.periode:
+            return False
+        if not self.lock.acquire(blocking=False):
+            self.sautees += 1
+            return False
+        try:
+            np.copyto(self.frames[self.index], frame)
+            self.instants[self.index] = instant
+            self.index = (self.index + 1) % len(self.frames)
+            self.derniere = instant
+        finally:
+            self.lock.release()
+        return True
+
+    # Copie des frames prises entre debut et fin (instants monotones), de la plus ancienne à la plus récente
+    def extraire(self, debut, fin):
+        with self.lock:
+            garde = np.flatnonzero((self.instants >= debut) & (self.instants <= fin))
+            garde = garde[np.argsort(self.instants[garde])]
+            return self.frames[garde], self.instants[garde]
+
+
+# Ecriture asynchrone des preuves d'alerte, stockage borné avec éviction LRU
+class EvidenceStore(threading.Thread):
+    def __init__(self, dossier=EVIDENCE_DIR, taille_max=EVIDENCE_MAX_BYTES, avant=EVIDENCE_PRE_SECONDS,
+                 apres=EVIDENCE_POST_SECONDS, qualite=EVIDENCE_JPEG_QUALITY):
+        super().__init__(name="pabo-preuves", daemon=True)
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self.avant = avant
+        self.apres = apres
+        self.qualite = qualite
+        # Tampons des cameras {nom : EvidenceRing} et mesures du capteur (sensors.SensorRing), ajoutés par le service
+        self.rings = {}
+        self.capteur = None
+        self.file = queue.Queue(EVIDENCE_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.enregistrees = 0
+        self.evincees = 0
+        self.perdues = 0
+        os.makedirs(dossier, exist_ok=True)
+        # Index des preuves présentes : {nom du dossier : [taille en octets, dernier accès]}
+        self.index = {}
+        for nom in os.listdir(dossier):
+            chemin = os.path.join(dossier, nom)
+            if nom.endswith(".tmp"):
+                # Preuve interrompue par un arrêt
+                shutil.rmtree(chemin, ignore_errors=True)
+            elif nom.startswith(PREFIXE) and os.path.isdir(chemin):
+                self.index[nom] = [self._taille(chemin), os.path.getmtime(chemin)]
+        self.total = sum(taille for taille, _ in self.index.values())
+
+    @staticmethod
+    def _taille(chemin):
+        return sum(entree.stat().st_size for entree in os.scandir(chemin) if entree.is_file())
+
+    # Tampon des frames d'une camera, à remplir par son thread de capture (pipeline.CaptureThread)
+    def ajouter_camera(self, nom, shape):
+        self.rings[nom] = EvidenceRing(shape, self.avant + self.apres)
+        return self.rings[nom]
+
+    # Demande la preuve d'une alerte (ne bloque pas), renvoie False si la file est pleine
+    def demander(self, alerte_id, date, categorie):
+        try:
+            self.file.put_nowait((alerte_id, date, categorie, time.monotonic()))
+            return True
+        except queue.Full:
+            self.perdues += 1
+            metrics.incrementer("pabo_preuves_total", resultat="perdue")
+            print("Preuve de l'alerte {} perdue : file pleine".format(alerte_id))
+            return False
+
+    def run(self):
+        while not (self.stop_event.is_set() and self.file.empty()):
+            try:
+                demande = self.file.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Attend la fin de la fenêtre après l'alerte (écrite tout de suite à l'arrêt)
+            self.stop_event.wait(max(0.0, demande[3] + self.apres - time.monotonic()))
+            try:
+                self._enregistrer(*demande)
+            except (OSError, ValueError) as erreur:
+                metrics.incrementer("pabo_preuves_total", resultat="erreur")
+                print("Erreur écriture preuve :", erreur)
+
+    def _enregistrer(self, alerte_id, date, categorie, instant):
+        nom = "{}{:06d}".format(PREFIXE, alerte_id)
+        temporaire = os.path.join(self.dossier, nom + ".tmp")
+        os.makedirs(temporaire, exist_ok=True)
+        description = {"alerte_id": alerte_id, "date": date, "categorie": categorie, "cameras": {}}
+        for source, ring in self.rings.items():
+            frames, instants = ring.extraire(instant - self.avant, instant + self.apres)
+            fichiers = []
+            for numero, (frame, vu) in enumerate(zip(frames, instants)):
+                ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.qualite])
+                if not ok:
+                    continue
+                fichier = "{}-{:03d}.jpg".format(source, numero)
+                with open(os.path.join(temporaire, fichier), "wb") as sortie:
+                    sortie.write(jpeg.tobytes())
+                # Décalage (s) de la frame par rapport à l'alerte
+                fichiers.append({"fichier": fichier, "decalage_s": round(float(vu - instant), 2)})
+            description["cameras"][source] = fichiers
+        if self.capteur is not None:
+            mesures = self.capteur.fenetre(EVIDENCE_SENSOR_SECONDS + self.apres, instant + self.apres)
+            with open(os.path.join(temporaire, "capteur.json"), "w") as sortie:
+                json.dump({"colonnes": ["decalage_s", "temperature", "pression", "humidite"],
+                           "mesures": [[round(float(ligne[0] - instant), 2)] + [round(float(v), 2) for v in ligne[1:]]
+                                       for ligne in mesures if ligne[0] <= instant + self.apres]}, sortie)
+        with open(os.path.join(temporaire, "preuve.json"), "w") as sortie:
+            json.dump(description, sortie, indent=2)
+
+        destination = os.path.join(self.dossier, nom)
+        shutil.rmtree(destination, ignore_errors=True)
+        os.replace(temporaire, destination)
+        taille = self._taille(destination)
+        with self.lock:
+            self.total += taille - self.index.get(nom, [0])[0]
+            self.index[nom] = [taille, time.time()]
+            self.enregistrees += 1
+            self._evincer(nom)
+        metrics.incrementer("pabo_preuves_total", resultat="enregistree")
+        metrics.evenement("preuve", alerte_id=alerte_id, octets=taille,
+                          frames={source: len(fichiers) for source, fichiers in description["cameras"].items()})
+
+    # Supprime les preuves les moins récemment utilisées jusqu'à repasser sous la taille maximum (garde la derniere)
+    def _evincer(self, garder):
+        for nom, (taille, _) in sorted(self.index.items(), key=lambda element: element[1][1]):
+            if self.total <= self.taille_max:
+                break
+            if nom == garder:
+                continue
+            shutil.rmtree(os.path.join(self.dossier, nom), ignore_errors=True)
+            del self.index[nom]
+            self.total -= taille
+            self.evincees += 1
+            metrics.incrementer("pabo_preuves_total", resultat="evincee")
+
+    # Dossier de la preuve d'une alerte (None si absente ou évincée), la marque comme récemment utilisée
+    def ouvrir(self, alerte_id):
+        nom = "{}{:06d}".format(PREFIXE, alerte_id)
+        with self.lock:
+            if nom not in self.index:
+                return None
+            self.index[nom][1] = time.time()
+        chemin = os.path.join(self.dossier, nom)
+        os.utime(chemin)
+        return chemin
+
+    def rapport(self):
+        with self.lock:
+            return {"preuves": len(self.index), "octets": self.total, "enregistrees": self.enregistrees,
+                    "evincees": self.evincees, "perdues": self.perdues,
+                    "frames_sautees": sum(ring.sautees for ring in self.rings.values())}
+
+    # Arrête le thread après l'écriture des preuves déjà demandées
+    def stop(self):
+        self.stop_event.set()
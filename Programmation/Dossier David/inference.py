@@ -0,0 +1,413 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : inference.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Moteur d'inference de DetectApp (visage, age, type)
+#
+# Mode "single_pass" : MobileNetSSD est executé une seule fois à sa
+# résolution native 300x300 et fournit les boites personne, chat et chien.
+# Les reseaux visage et age ne sont executés que dans les zones personne.
+# Mode "double" : ancien chemin à deux reseaux (visage sur toute la frame
+# puis MobileNetSSD en pleine résolution), conservé pour comparer la précision.
+# Mode "pyramide" : passe grossière de MobileNetSSD (COARSE_INPUT_SIZE) sur
+# toute la frame, puis reseau visage à la résolution native des seules zones
+# utiles : sièges de l'installation (SEAT_ROIS) et personnes de la passe
+# grossière. Les petits visages des places arrière ne sont plus réduits
+# avec le reste de la frame, les vitres et le tableau de bord ne sont vus
+# qu'à basse résolution.
+#
+# Les sorties SSD (1, 1, N, 7) des deux reseaux sont décodées par
+# decoder_ssd : filtre confiance / classe, mise à l'échelle et bornage
+# des boites en numpy, puis suppression des doublons (cv2.dnn.NMSBoxes).
+# Les resultats publics (annotate, animal_detection, estimate_age,
+# get_faces) sont des tableaux structurés numpy (label, score, box,
+# confiance) : score est la confiance du label (tranche d'age pour un
+# visage), confiance celle du detecteur qui a trouvé la boite.
+#***********************************************************
+
+# --- Import ---
+import cv2
+import numpy as np
+
+from metrics import metrics
+from models import registry
+
+# Chaque Caffe Model impose la forme de l'image d'entrée et un prétraitement de l'image est nécessaire,
+MODEL_MEAN_VALUES = (78.4263377603, 87.7689143744, 114.895847746)
+# Represente les 8 classes d'age de cette couche de probabilité CNN (réseau de neurones convolutifs)
+AGE_INTERVALS = ['(0, 2)', '(4, 6)', '(8, 12)', '(15, 20)','(25, 32)', '(38, 43)', '(48, 53)', '(60, 100)']
+
+TYPE_CLASSES = ["background", "aeroplane", "bicycle", "bird", "boat",
+                "bottle", "bus", "car", "cat", "chair", "cow", "diningtable",
+                "dog", "horse", "motorbike", "person", "pottedplant", "sheep",
+                "sofa", "train", "tvmonitor"] #cat , dog, person
+# Types de MobileNetSSD considérés comme animaux
+ANIMAL_TYPES = ("cat", "dog")
+
+# ------- CONFIGURATION -------
+# "single_pass" (MobileNetSSD 300x300 puis visage/age dans les personnes), "pyramide" (passe grossière
+# puis visages dans les sièges et les personnes à résolution native) ou "double" (ancien chemin)
+INFERENCE_MODE = "single_pass"
+INFERENCE_MODES = ("single_pass", "pyramide", "double")
+# Estimation de l'age de tous les visages en une seule passe du reseau
+AGE_BATCHED = True
+# Taille d'entrée native de MobileNetSSD
+SSD_INPUT_SIZE = (300, 300)
+# Seuils de confiance
+FACE_CONFIDENCE = 0.5
+ANIMAL_CONFIDENCE = 0.63
+PERSON_CONFIDENCE = 0.4
+# Marge (en pixels) ajoutée autour des zones personne avant la recherche de visage
+PERSON_MARGIN = 20
+# Marge (en pixels) ajoutée autour d'un visage avant l'estimation de l'age
+FACE_MARGIN = 10
+# Recouvrement (IoU) au-delà duquel deux boites de même classe sont des doublons (None : pas de NMS)
+NMS_THRESHOLD = 0.4
+# Mode "pyramide" : taille d'entrée de la passe grossière de MobileNetSSD sur toute la frame
+COARSE_INPUT_SIZE = (240, 180)
+# Mode "pyramide" : sièges de l'installation en fraction de la frame (x1, y1, x2, y2), {} : personnes seulement
+# Exemple : {"arriere_gauche": (0.0, 0.3, 0.4, 1.0), "arriere_droit": (0.6, 0.3, 1.0, 1.0)}
+SEAT_ROIS = {}
+# Mode "pyramide" : côté maximum (pixels) de l'entrée du reseau visage dans une zone, en dessous la zone garde sa résolution
+ROI_MAX_INPUT = 300
+
+# Seuil de confiance de chaque classe de MobileNetSSD (inf : classe ignorée)
+SSD_THRESHOLDS = np.full(len(TYPE_CLASSES), np.inf, dtype=np.float32)
+SSD_THRESHOLDS[[TYPE_CLASSES.index(type_race) for type_race in ANIMAL_TYPES]] = ANIMAL_CONFIDENCE
+SSD_THRESHOLDS[TYPE_CLASSES.index("person")] = PERSON_CONFIDENCE
+# Reseau visage : classe 0 fond, classe 1 visage
+FACE_THRESHOLDS = np.array([np.inf, FACE_CONFIDENCE], dtype=np.float32)
+
+# Resultat compact : une ligne par objet (label, score, boite start_x, start_y, end_x, end_y, confiance)
+# score : confiance du label (probabilité de la tranche d'age pour un visage, confiance SSD pour un objet)
+# confiance : confiance du detecteur de la boite (detecteur de visages ou SSD), utilisée par occupancy.py
+RESULT_DTYPE = np.dtype([("label", "U10"), ("score", "f4"), ("box", "i4", (4,)), ("confiance", "f4")])
+
+
+# Construit un resultat structuré à partir d'une liste (label, score, boite[, confiance])
+# sans confiance du detecteur, c'est le score (objets SSD : le label et la boite viennent de la même detection)
+def resultats(lignes=()):
+    return np.array([tuple(ligne) if len(ligne) == 4 else tuple(ligne) + (ligne[1],) for ligne in lignes],
+                    dtype=RESULT_DTYPE).view(np.recarray)
+
+
+# Indices des boites (N, 4) gardées par la suppression des doublons (cv2.dnn.NMSBoxes)
+def indices_nms(boites, scores, seuil=NMS_THRESHOLD):
+    rectangles = np.column_stack((boites[:, :2], boites[:, 2:] - boites[:, :2]))
+    return np.asarray(cv2.dnn.NMSBoxes(rectangles.tolist(), scores.tolist(), 0.0, seuil), dtype=np.int64).reshape(-1)
+
+
+# Taille d'entrée du reseau pour une zone : sa résolution native, réduite si son grand côté dépasse maximum
+def taille_native(largeur, hauteur, maximum=ROI_MAX_INPUT):
+    echelle = min(1.0, maximum / max(largeur, hauteur))
+    return max(int(round(largeur * echelle)), 32), max(int(round(hauteur * echelle)), 32)
+
+
+# Décode la sortie (1, 1, N, 7) d'un reseau SSD : [image, classe, confiance, x1, y1, x2, y2] relatifs
+# seuils : confiance minimum par classe (tableau indexé par la classe, inf pour ignorer la classe)
+# Renvoie (classes, scores, boites entières bornées à l'image) triés par score décroissant, sans doublons
+def decoder_ssd(sortie, largeur, hauteur, seuils, marge=0, nms=NMS_THRESHOLD):
+    lignes = sortie.reshape(-1, 7)
+    classes = lignes[:, 1].astype(np.int32)
+    valides = (classes >= 0) & (classes < len(seuils))
+    classes = np.where(valides, classes, 0)
+    garde = valides & (lignes[:, 2] > seuils[classes])
+    classes, scores = classes[garde], lignes[garde, 2]
+
+    echelle = np.array([largeur, hauteur, largeur, hauteur], dtype=np.float32)
+    boites = lignes[garde, 3:7] * echelle + np.array([-marge, -marge, marge, marge], dtype=np.float32)
+    np.clip(boites, 0, echelle, out=boites)
+    boites = boites.astype(np.int32)
+
+    if nms is not None and len(scores) > 1:
+        # Décalage par classe : NMSBoxes ne compare ainsi que des boites de même classe
+        indices = indices_nms(boites + (classes * (largeur + hauteur + 1))[:, None], scores, nms)
+    else:
+        indices = np.arange(len(scores))
+    indices = indices[np.argsort(-scores[indices], kind="stable")]
+    return classes[indices], scores[indices], boites[indices]
+
+
+# Dessine les boites et les labels des visages (vert / bleu) et des objets (rouge) sur la frame
+# traces : affiche aussi chaque detection dans la console
+def dessiner_detections(frame, age_declare, object_detected, traces=False):
+    for genre, resultat in (("face", age_declare), ("objet", object_detected)):
+        for index, (label_detection, score, (start_x, start_y, end_x, end_y), _) in enumerate(resultat):
+            start_x, start_y, end_x, end_y = int(start_x), int(start_y), int(end_x), int(end_y)
+            if genre == "face":
+                titre = f"Face {index + 1} Prediction Probabilities"
+                label = f"Age:{label_detection} - {score*100:.2f}%"
+                couleur_texte, couleur_boite = (0, 255, 0), (255, 0, 0)
+            else:
+                titre = f"Detection {index + 1} Prediction Probabilities"
+                label = f"Type:{label_detection} - {score*100:.2f}%"
+                couleur_texte = couleur_boite = (0, 0, 255)
+            if traces:
+                print("="*5, titre, "="*5)
+                print(label)
+
+            # Obtient la position où mettre le texte
+            yPos = start_y - 15
+            while yPos < 15:
+                yPos += 15
+            # écrit le text dans la frame
+            frame = cv2.putText(frame, label, (start_x, yPos), cv2.FONT_HERSHEY_SIMPLEX, 0.5, couleur_texte, thickness=2)
+            # Dessine le rectangle autour de la tête / de l'animal
+            frame = cv2.rectangle(frame, (start_x, start_y), (end_x, end_y), couleur_boite, 2)
+    return frame
+
+
+class InferenceEngine:
+    # Les reseaux non fournis sont pris dans le registre (chargés à la premiere utilisation)
+    # rois : sièges du mode "pyramide" (SEAT_ROIS par défaut)
+    def __init__(self, face_net=None, age_net=None, animal_net=None,
+                 mode=INFERENCE_MODE, age_batched=AGE_BATCHED, registry=registry, rois=None):
+        if mode not in INFERENCE_MODES:
+            raise ValueError("Mode d'inference inconnu : {}".format(mode))
+        self.registry = registry
+        self._nets = {"face": face_net, "age": age_net, "animal": animal_net}
+        self.mode = mode
+        self.age_batched = age_batched
+        self.rois = SEAT_ROIS if rois is None else rois
+
+    def _net(self, nom):
+        if self._nets[nom] is None:
+            self._nets[nom] = self.registry.get(nom)
+        return self._nets[nom]
+
+    @property
+    def face_net(self):
+        return self._net("face")
+
+    @property
+    def age_net(self):
+        return self._net("age")
+
+    @property
+    def animal_net(self):
+        return self._net("animal")
+
+
+    # Charge les reseaux et fait une inference à vide pour que la premiere frame ne paie pas l'initialisation
+    def warmup(self):
+        self.registry.warmup()
+        print("== Modèles chargés ==", self.registry.rapport())
+
+
+    # Detecte visages, age et type (chat / chien) sur une frame et l'annote
+    # Renvoie les resultats structurés des visages (label = tranche d'age) et des objets, et la frame annotée
+    def detect(self, frame):
+        return self.annotate(frame, self.analyse(frame))
+
+
+    # Execute les reseaux sans dessiner, renvoie une liste de detections
+    # (genre, label, score, boite, confiance) avec genre "face" (label = tranche d'age) ou "animal" (label = type)
+    def analyse(self, frame):
+        faces, objets = self.visages_et_objets(frame)
+        animaux = objets[np.isin(objets.label, ANIMAL_TYPES)]
+        detections = self.age_detections(frame, faces)
+        detections.extend(("animal", str(label), float(score), tuple(int(v) for v in box), float(confiance))
+                          for (label, score, box, confiance) in animaux)
+        return detections
+
+
+    # Visages et objets MobileNetSSD (resultats structurés) d'une frame, selon le mode d'inference
+    def visages_et_objets(self, frame):
+        if self.mode == "double":
+            faces = self.get_faces(frame)
+            objets = self.ssd_detection(frame, (frame.shape[1], frame.shape[0]))
+        elif self.mode == "pyramide":
+            objets = self.ssd_detection(frame, COARSE_INPUT_SIZE)
+            faces = self.get_faces_in_regions(frame, self.regions(frame, objets.box[objets.label == "person"]))
+        else:
+            objets = self.ssd_detection(frame)
+            faces = self.get_faces_in_persons(frame, objets.box[objets.label == "person"])
+        return faces, objets
+
+
+    # Renvoie les resultats structurés (label, score, box, confiance) des visages et des objets et la frame
+    # dessiner=False (mode sans écran, voir service.py) : ni traces ni dessin, la frame n'est pas modifiée
+    def annotate(self, frame, detections, dessiner=True):
+        age_declare = []
+        object_detected = []
+        for (genre, label_detection, score, (start_x, start_y, end_x, end_y), confiance) in detections:
+            ligne = (label_detection, round(float(score), 4), (int(start_x), int(start_y), int(end_x), int(end_y)),
+                     round(float(confiance), 4))
+            if genre == "face":
+                age_declare.append(ligne)
+            else:
+                object_detected.append(ligne)
+
+        age_declare, object_detected = resultats(age_declare), resultats(object_detected)
+        if dessiner:
+            frame = dessiner_detections(frame, age_declare, object_detected, traces=True)
+        return age_declare, object_detected, frame
+
+
+    # Passe unique de MobileNetSSD, renvoie un resultat structuré (type, confiance, boite) pour person, cat et dog
+    def ssd_detection(self, frame, size=SSD_INPUT_SIZE):
+        (H, W) = frame.shape[:2]
+        # blobFromImage redimensionne la frame, les boites sont en coordonnées relatives
+        blob = cv2.dnn.blobFromImage(frame, 0.007843, size, 127.5)
+        self.animal_net.setInput(blob)
+        with metrics.chrono("pabo_dnn_forward_seconds", reseau="animal"):
+            sortie = self.animal_net.forward()
+        with metrics.chrono("pabo_postprocess_seconds", reseau="animal"):
+            classes, scores, boites = decoder_ssd(sortie, W, H, SSD_THRESHOLDS)
+
+        objets = np.empty(len(scores), dtype=RESULT_DTYPE).view(np.recarray)
+        objets.label = np.array(TYPE_CLASSES)[classes]
+        objets.score = scores
+        objets.box = boites
+        objets.confiance = scores
+        return objets
+
+
+    # Détecte la présence de chien et chat (size=None : résolution native 300x300)
+    def animal_detection(self, frame, size=None):
+        objets = self.ssd_detection(frame, size or SSD_INPUT_SIZE)
+        animaux = [("animal", label, score, box, confiance)
+                   for (label, score, box, confiance) in objets[np.isin(objets.label, ANIMAL_TYPES)]]
+        _, object_detected, frame = self.annotate(frame, animaux)
+        return object_detected, frame
+
+
+    # Cherche les visages dans l'union des zones personne (une seule passe du reseau visage)
+    # et ne garde que ceux dont le centre est dans une personne
+    # personnes : tableau (N, 4) de boites, renvoie un resultat structuré comme get_faces
+    def get_faces_in_persons(self, frame, personnes):
+        personnes = np.asarray(personnes, dtype=np.int32).reshape(-1, 4)
+        if not len(personnes):
+            return resultats()
+        (H, W) = frame.shape[:2]
+        start_x, start_y = np.maximum(personnes[:, :2].min(axis=0) - PERSON_MARGIN, 0)
+        end_x, end_y = np.minimum(personnes[:, 2:].max(axis=0) + PERSON_MARGIN, (W, H))
+        if end_x <= start_x or end_y <= start_y:
+            return resultats()
+
+        faces = self.get_faces(frame[start_y:end_y, start_x:end_x])
+        faces.box += (start_x, start_y, start_x, start_y)
+        # Centre de chaque visage contenu dans au moins une personne (élargie de la marge)
+        centres = (faces.box[:, :2] + faces.box[:, 2:]) / 2
+        zones = personnes + (-PERSON_MARGIN, -PERSON_MARGIN, PERSON_MARGIN, PERSON_MARGIN)
+        dedans = ((centres[:, None, :] >= zones[None, :, :2]) & (centres[:, None, :] <= zones[None, :, 2:])).all(axis=2)
+        return faces[dedans.any(axis=1)]
+
+
+    # Zones du mode "pyramide" : sièges configurés et personnes (élargies de PERSON_MARGIN) hors des sièges
+    # Renvoie un tableau (N, 4) de boites entières bornées à la frame
+    def regions(self, frame, personnes):
+        (H, W) = frame.shape[:2]
+        sieges = (np.array(list(self.rois.values()), dtype=np.float32).reshape(-1, 4) * (W, H, W, H)).astype(np.int32)
+        personnes = np.asarray(personnes, dtype=np.int32).reshape(-1, 4) + (-PERSON_MARGIN, -PERSON_MARGIN, PERSON_MARGIN, PERSON_MARGIN)
+        if len(sieges) and len(personnes):
+            # Une personne dont le centre est dans un siège est déjà couverte par ce siège
+            centres = (personnes[:, :2] + personnes[:, 2:]) / 2
+            dedans = ((centres[:, None, :] >= sieges[None, :, :2]) & (centres[:, None, :] <= sieges[None, :, 2:])).all(axis=2)
+            personnes = personnes[~dedans.any(axis=1)]
+        zones = np.concatenate([sieges, personnes]).astype(np.int32)
+        np.clip(zones, 0, (W, H, W, H), out=zones)
+        return zones[(zones[:, 2] > zones[:, 0]) & (zones[:, 3] > zones[:, 1])]
+
+
+    # Cherche les visages dans chaque zone à sa résolution native (au plus ROI_MAX_INPUT)
+    # Les visages vus dans deux zones qui se recouvrent ne sont gardés qu'une fois
+    def get_faces_in_regions(self, frame, zones):
+        trouves = []
+        for (start_x, start_y, end_x, end_y) in zones:
+            faces = self.get_faces(frame[start_y:end_y, start_x:end_x], taille_native(end_x - start_x, end_y - start_y))
+            faces.box += (start_x, start_y, start_x, start_y)
+            trouves.append(faces)
+        if not trouves:
+            return resultats()
+        faces = np.concatenate(trouves).view(np.recarray)
+        if len(trouves) > 1 and len(faces) > 1 and NMS_THRESHOLD is not None:
+            indices = indices_nms(faces.box, faces.score, NMS_THRESHOLD)
+            faces = faces[indices[np.argsort(-faces.score[indices], kind="stable")]]
+        return faces
+
+
+    # Identifie des visage et retourne un resultat structuré (label "face", score, boite élargie de FACE_MARGIN)
+    # size : taille d'entrée du reseau (300x300 par défaut, voir taille_native pour une zone)
+    def get_faces(self, frame, size=(300, 300)):
+        # Un blob est essentiellement un tenseur multidimensionnel (tableau de valeurs) qui représente l'image
+        # convertir la frame en un blob prêt pour l'entrée dans le Reseau Neuronal
+        blob = cv2.dnn.blobFromImage(frame, 1.0, size, (104, 177.0, 123.0))
+
+        # définir l'image comme entrée du RN
+        self.face_net.setInput(blob)
+        # effectuer une inférence, filtrer, borner les boites à l'image et supprimer les doublons
+        with metrics.chrono("pabo_dnn_forward_seconds", reseau="face"):
+            sortie = self.face_net.forward()
+        with metrics.chrono("pabo_postprocess_seconds", reseau="face"):
+            _, scores, boites = decoder_ssd(sortie, frame.shape[1], frame.shape[0], FACE_THRESHOLDS, marge=FACE_MARGIN)
+        faces = np.empty(len(scores), dtype=RESULT_DTYPE).view(np.recarray)
+        faces.label = "face"
+        faces.score = scores
+        faces.box = boites
+        faces.confiance = scores
+        return faces
+
+
+    # Renvoie les probabilités d'age (une ligne par visage) pour une liste d'images de visage
+    # batched : un seul blob (blobFromImages) et une seule passe, sinon une passe par visage
+    def predict_age(self, face_imgs, batched=None):
+        if batched is None:
+            batched = self.age_batched
+        if not face_imgs:
+            return np.empty((0, len(AGE_INTERVALS)), dtype=np.float32)
+        if batched:
+            blob = cv2.dnn.blobFromImages(
+                images=face_imgs, scalefactor=1.0, size=(227, 227),
+                mean=MODEL_MEAN_VALUES, swapRB=False
+            )
+            self.age_net.setInput(blob)
+            with metrics.chrono("pabo_dnn_forward_seconds", reseau="age"):
+                return self.age_net.forward().reshape(len(face_imgs), -1)
+
+        predictions = []
+        for face_img in face_imgs:
+            # image --> Input image pour preprocess avant de la passer dans le dnn pour la classification.
+            blob = cv2.dnn.blobFromImage(
+                image=face_img, scalefactor=1.0, size=(227, 227),
+                mean=MODEL_MEAN_VALUES, swapRB=False
+            )
+            self.age_net.setInput(blob)
+            with metrics.chrono("pabo_dnn_forward_seconds", reseau="age"):
+                predictions.append(self.age_net.forward()[0])
+        return np.array(predictions)
+
+
+    # Classe l'age de chaque visage, renvoie des detections ("face", age, score, boite, confiance)
+    # faces : resultat de get_faces ou liste de boites (supposées sûres : confiance 1)
+    # score : probabilité de la tranche d'age, confiance : celle du detecteur de visages
+    def age_detections(self, frame, faces, batched=None):
+        if isinstance(faces, np.ndarray) and faces.dtype.names:
+            confiances = [float(confiance) for confiance in faces["confiance"]]
+            faces = faces["box"]
+        else:
+            confiances = [1.0] * len(faces)
+        # Découpe tous les visages (les boites vides sont ignorées)
+        visages = [((int(start_x), int(start_y), int(end_x), int(end_y)), confiance)
+                   for (start_x, start_y, end_x, end_y), confiance in zip(faces, confiances)
+                   if end_x > start_x and end_y > start_y]
+        face_imgs = [frame[start_y: end_y, start_x: end_x] for (start_x, start_y, end_x, end_y), _ in visages]
+        # Estime Age, chaque ligne de prediction correspond à une boite de faces
+        age_predictions = self.predict_age(face_imgs, batched)
+
+        detections = []
+        for age_prediction, (box, confiance) in zip(age_predictions, visages):
+            #for i in range(age_prediction.shape[0]):
+            #    print(f"{AGE_INTERVALS[i]}: {age_prediction[i]*100:.2f}%")
+            age_in_tab = age_prediction.argmax()
+            detections.append(("face", AGE_INTERVALS[age_in_tab], float(age_prediction[age_in_tab]), box, confiance))
+        return detections
+
+
+    # Estime l'age des visage detecté par get face
+    def estimate_age(self, frame, faces, batched=None):
+        age_declare, _, frame = self.annotate(frame, self.age_detections(frame, faces, batched))
+        return age_declare, frame
@@ -0,0 +1,352 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : metrics.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Mesures de fonctionnement d'une unité déployée
+#
+# Le registre partagé "metrics" reçoit des compteurs (frames traitées,
+# abandonnées, alertes ...), des jauges (température CPU, mémoire) et des
+# durées par étape (capture, passe de chaque reseau, post-traitement,
+# écriture en base, lecture du capteur) rangées en histogrammes.
+# MetricsServer les sert en HTTP local au format texte Prometheus
+# (/metrics), en JSON (/etat) et écrit un journal structuré (une ligne
+# JSON par événement et un instantané périodique). /profil?secondes=N
+# active cProfile sur le thread de detection pendant N secondes et
+# renvoie les fonctions les plus coûteuses, sans arrêter l'application.
+#
+# Avec backends.ProcessPoolBackend, les passes des reseaux ont lieu dans
+# les processus d'inference : seules les étapes du processus principal
+# sont mesurées.
+#
+# Utilisation : curl http://127.0.0.1:9100/metrics
+#               curl "http://127.0.0.1:9100/profil?secondes=10"
+#***********************************************************
+
+# --- Import ---
+import cProfile
+import contextlib
+import io
+import json
+import math
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Port local du serveur de mesures (None : pas de serveur)
+METRICS_PORT = 9100
+# Adresse d'écoute (127.0.0.1 : seulement depuis l'unité, 0.0.0.0 : depuis le reseau local)
+METRICS_HOST = "127.0.0.1"
+# Journal structuré (JSON lignes) et période des instantanés (s)
+METRICS_LOG_PATH = "metrics.jsonl"
+LOG_INTERVAL = 60.0
+# Dossier des profils cProfile (.prof, lisibles par pstats / snakeviz)
+PROFILE_DIR = "profils"
+# Durées minimum et maximum d'un profil à la demande (s) et nombre de fonctions renvoyées
+PROFILE_MIN_SECONDS = 1.0
+PROFILE_MAX_SECONDS = 120.0
+PROFILE_TOP = 30
+# Limites des histogrammes de durée (s)
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Description de chaque mesure : nom -> (type Prometheus, aide)
+DESCRIPTIONS = {
+    "pabo_frames_capturees_total": ("counter", "Frames lues par les sources de capture"),
+    "pabo_frames_traitees_total": ("counter", "Frames analysées par les reseaux"),
+    "pabo_frames_abandonnees_total": ("counter", "Frames remplacées par une plus récente avant analyse"),
+    "pabo_frames_ignorees_total": ("counter", "Frames sans changement de scène, non analysées"),
+    "pabo_alertes_total": ("counter", "Alertes levées par categorie"),
+    "pabo_envois_total": ("counter", "Essais d'envoi d'alerte par destination et resultat"),
+    "pabo_erreurs_capture_total": ("counter", "Erreurs des sources de capture (source relancée)"),
+    "pabo_erreurs_capteur_total": ("counter", "Lectures ratées du capteur environnemental"),
+    "pabo_erreurs_detection_total": ("counter", "Frames dont la detection a levé une erreur"),
+    "pabo_lignes_base_total": ("counter", "Lignes écrites dans la base par table"),
+    "pabo_preuves_total": ("counter", "Preuves d'alerte enregistrées, évincées ou perdues"),
+    "pabo_capture_seconds": ("histogram", "Attente d'une frame de la source"),
+    "pabo_dnn_forward_seconds": ("histogram", "Passe d'un reseau de neurones"),
+    "pabo_postprocess_seconds": ("histogram", "Post-traitement des sorties des reseaux"),
+    "pabo_detection_seconds": ("histogram", "Detection complète d'une frame (reseaux, suivi, enregistrement)"),
+    "pabo_resultat_latence_seconds": ("histogram", "Latence capture -> resultat publié"),
+    "pabo_db_ecriture_seconds": ("histogram", "Transaction d'écriture dans la base"),
+    "pabo_capteur_lecture_seconds": ("histogram", "Lecture du capteur environnemental"),
+    "pabo_cpu_temperature_celsius": ("gauge", "Température du processeur"),
+    "pabo_memoire_rss_octets": ("gauge", "Mémoire résidente du processus"),
+    "pabo_cpu_secondes": ("gauge", "Temps CPU consommé par le processus"),
+    "pabo_uptime_secondes": ("gauge", "Temps depuis le démarrage"),
+}
+
+
+# Température du processeur (°C), None si la zone thermique n'existe pas
+def temperature_cpu(chemin="/sys/class/thermal/thermal_zone0/temp"):
+    try:
+        with open(chemin) as fichier:
+            return int(fichier.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+# Mémoire résidente du processus (octets), None hors Linux
+def memoire_rss():
+    try:
+        with open("/proc/self/statm") as fichier:
+            return int(fichier.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, supplement=()):
+    paires = list(labels) + list(supplement)
+    if not paires:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(cle, str(valeur).replace('"', '\\"')) for cle, valeur in paires) + "}"
+
+
+class Metrics:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.debut = time.monotonic()
+        self.compteurs = {}
+        self.jauges = {}
+        self.fonctions = {}
+        # nom -> {labels : [compte par limite ..., total, somme]}
+        self.histogrammes = {}
+        self.journal = None
+        self.lock_journal = threading.Lock()
+
+    def incrementer(self, nom, valeur=1, **labels):
+        cle = (nom, _labels(labels))
+        with self.lock:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    def jauge(self, nom, valeur, **labels):
+        with self.lock:
+            self.jauges[(nom, _labels(labels))] = valeur
+
+    # Jauge lue à chaque consultation (fonction sans argument, None : pas de valeur)
+    def jauge_fonction(self, nom, fonction):
+        self.fonctions[nom] = fonction
+
+    # Ajoute une durée (s) à un histogramme
+    def observer(self, nom, secondes, **labels):
+        cle = _labels(labels)
+        with self.lock:
+            series = self.histogrammes.setdefault(nom, {})
+            serie = series.get(cle)
+            if serie is None:
+                serie = series[cle] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, limite in enumerate(self.buckets):
+                if secondes <= limite:
+                    serie[index] += 1
+                    break
+            serie[-2] += 1
+            serie[-1] += secondes
+
+    # Mesure la durée du bloc : with metrics.chrono("pabo_dnn_forward_seconds", reseau="face"): ...
+    @contextlib.contextmanager
+    def chrono(self, nom, **labels):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(nom, time.perf_counter() - debut, **labels)
+
+    def _valeurs_fonctions(self):
+        valeurs = {"pabo_uptime_secondes": time.monotonic() - self.debut}
+        for nom, fonction in self.fonctions.items():
+            valeur = fonction()
+            if valeur is not None:
+                valeurs[nom] = valeur
+        return valeurs
+
+    # Texte au format d'exposition Prometheus
+    def prometheus(self):
+        with self.lock:
+            compteurs = dict(self.compteurs)
+            jauges = dict(self.jauges)
+            histogrammes = {nom: {cle: list(serie) for cle, serie in series.items()} for nom, series in self.histogrammes.items()}
+        for nom, valeur in self._valeurs_fonctions().items():
+            jauges[(nom, ())] = valeur
+
+        series = {}
+        for (nom, labels), valeur in list(compteurs.items()) + list(jauges.items()):
+            series.setdefault(nom, []).append("{}{} {}".format(nom, _format_labels(labels), valeur))
+        for nom, par_labels in histogrammes.items():
+            lignes = series.setdefault(nom, [])
+            for labels, serie in par_labels.items():
+                cumul = 0
+                for limite, compte in zip(self.buckets, serie):
+                    cumul += compte
+                    lignes.append("{}_bucket{} {}".format(nom, _format_labels(labels, [("le", limite)]), cumul))
+                lignes.append("{}_bucket{} {}".format(nom, _format_labels(labels, [("le", "+Inf")]), serie[-2]))
+                lignes.append("{}_sum{} {:.6f}".format(nom, _format_labels(labels), serie[-1]))
+                lignes.append("{}_count{} {}".format(nom, _format_labels(labels), serie[-2]))
+
+        texte = []
+        for nom in sorted(series):
+            type_mesure, aide = DESCRIPTIONS.get(nom, ("untyped", nom))
+            texte.append("# HELP {} {}".format(nom, aide))
+            texte.append("# TYPE {} {}".format(nom, type_mesure))
+            texte.extend(series[nom])
+        return "\n".join(texte) + "\n"
+
+    # Instantané JSON : compteurs et jauges, nombre et durée moyenne (ms) de chaque histogramme
+    def instantane(self):
+        with self.lock:
+            resultat = {}
+            for (nom, labels), valeur in list(self.compteurs.items()) + list(self.jauges.items()):
+                resultat[nom + _format_labels(labels)] = valeur
+            for nom, series in self.histogrammes.items():
+                for labels, serie in series.items():
+                    resultat[nom + _format_labels(labels)] = {
+                        "nombre": serie[-2], "moyenne_ms": round(1000.0 * serie[-1] / serie[-2], 3) if serie[-2] else 0.0}
+        resultat.update({nom: round(valeur, 3) for nom, valeur in self._valeurs_fonctions().items()})
+        return resultat
+
+    # Ecrit une ligne JSON dans le journal structuré (si un journal est ouvert)
+    def evenement(self, type_evenement, **champs):
+        if self.journal is None:
+            return
+        ligne = json.dumps(dict({"date": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], "type": type_evenement}, **champs),
+                           ensure_ascii=False, default=str)
+        with self.lock_journal:
+            with open(self.journal, "a") as fichier:
+                fichier.write(ligne + "\n")
+
+
+# Profil cProfile à la demande d'un thread : le thread instrumenté passe son travail par executer(),
+# un autre thread demande un profil de N secondes avec demander()
+class ProfileSnapshot:
+    def __init__(self, dossier=PROFILE_DIR, top=PROFILE_TOP):
+        self.dossier = dossier
+        self.top = top
+        self.lock = threading.Lock()
+        self.demande = None
+
+    # Demande un profil de duree secondes, attend sa fin et renvoie le résumé texte (None si le thread ne tourne pas)
+    def demander(self, duree, attente_max=None):
+        duree = min(max(duree, PROFILE_MIN_SECONDS), PROFILE_MAX_SECONDS)
+        with self.lock:
+            if self.demande is not None:
+                demande = self.demande
+            else:
+                demande = self.demande = {"duree": duree, "profil": cProfile.Profile(), "debut": None,
+                                          "appels": 0, "fin": threading.Event(), "resultat": None}
+        if not demande["fin"].wait(attente_max or duree + 10.0):
+            with self.lock:
+                if self.demande is demande:
+                    self.demande = None
+            return None
+        return demande["resultat"]
+
+    # Execute fonction, sous cProfile si un profil est en cours
+    def executer(self, fonction, *args, **kwargs):
+        demande = self.demande
+        if demande is None:
+            return fonction(*args, **kwargs)
+        if demande["debut"] is None:
+            demande["debut"] = time.monotonic()
+        try:
+            return demande["profil"].runcall(fonction, *args, **kwargs)
+        finally:
+            demande["appels"] += 1
+            if time.monotonic() - demande["debut"] >= demande["duree"]:
+                self._terminer(demande)
+
+    def _terminer(self, demande):
+        with self.lock:
+            if self.demande is not demande:
+                return
+            self.demande = None
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = os.path.join(self.dossier, "profil-{}.prof".format(datetime.now().strftime("%Y%m%d-%H%M%S")))
+        demande["profil"].dump_stats(chemin)
+        texte = io.StringIO()
+        pstats.Stats(demande["profil"], stream=texte).sort_stats("cumulative").print_stats(self.top)
+        demande["resultat"] = "{} appels profilés, profil complet : {}\n{}".format(demande["appels"], chemin, texte.getvalue())
+        metrics.evenement("profil", chemin=chemin, appels=demande["appels"], duree_s=demande["duree"])
+        demande["fin"].set()
+
+
+# Serveur HTTP local : /metrics (Prometheus), /etat (JSON), /profil?secondes=N (cProfile du thread de detection)
+# et écriture périodique d'un instantané dans le journal structuré
+class MetricsServer:
+    def __init__(self, port=METRICS_PORT, hote=METRICS_HOST, journal=METRICS_LOG_PATH, intervalle=LOG_INTERVAL,
+                 registre=None, profileur=None):
+        self.registre = registre or metrics
+        self.profileur = profileur or profileur_detection
+        self.intervalle = intervalle
+        self.registre.journal = journal
+        serveur = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requete = urlparse(self.path)
+                if requete.path == "/metrics":
+                    self._repondre(200, serveur.registre.prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+                elif requete.path == "/etat":
+                    self._repondre(200, json.dumps(serveur.registre.instantane(), ensure_ascii=False), "application/json")
+                elif requete.path == "/profil":
+                    try:
+                        secondes = float(parse_qs(requete.query).get("secondes", ["10"])[0])
+                    except ValueError:
+                        secondes = math.nan
+                    if not math.isfinite(secondes):
+                        self._repondre(400, "secondes doit être un nombre (borné entre {:g} et {:g} s)\n".format(
+                            PROFILE_MIN_SECONDS, PROFILE_MAX_SECONDS), "text/plain; charset=utf-8")
+                        return
+                    # La durée est bornée par demander() : PROFILE_MIN_SECONDS à PROFILE_MAX_SECONDS
+                    resultat = serveur.profileur.demander(secondes)
+                    if resultat is None:
+                        self._repondre(503, "Aucune detection pendant le profil\n", "text/plain; charset=utf-8")
+                    else:
+                        self._repondre(200, resultat, "text/plain; charset=utf-8")
+                else:
+                    self._repondre(404, "Inconnu : /metrics, /etat, /profil?secondes=N\n", "text/plain; charset=utf-8")
+
+            def _repondre(self, code, texte, type_contenu):
+                corps = texte.encode()
+                self.send_response(code)
+                self.send_header("Content-Type", type_contenu)
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((hote, port), Gestionnaire)
+        self.port = self.httpd.server_address[1]
+        self.stop_event = threading.Event()
+        self.threads = [threading.Thread(target=self.httpd.serve_forever, name="pabo-metrics", daemon=True),
+                        threading.Thread(target=self._journaliser, name="pabo-metrics-journal", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def _journaliser(self):
+        while not self.stop_event.wait(self.intervalle):
+            self.registre.evenement("metriques", **self.registre.instantane())
+
+    def stop(self):
+        self.stop_event.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.registre.evenement("metriques", **self.registre.instantane())
+
+
+# Registre et profileur partagés par le processus
+metrics = Metrics()
+metrics.jauge_fonction("pabo_cpu_temperature_celsius", temperature_cpu)
+metrics.jauge_fonction("pabo_memoire_rss_octets", memoire_rss)
+metrics.jauge_fonction("pabo_cpu_secondes", time.process_time)
+profileur_detection = ProfileSnapshot()
@@ -0,0 +1,178 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : models.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Registre des modèles de reseaux de neurones
+#
+# Chaque reseau est chargé à sa premiere utilisation (et une seule fois
+# par processus), avec le backend et la cible OpenCV préférés. Les temps
+# de chargement sont mesurés et une inference d'échauffement peut être
+# lancée pour que la premiere vraie frame ne paie pas l'initialisation.
+#
+# Chaque reseau existe en plusieurs variantes (VARIANTS) : les modèles
+# Caffe FP32 d'origine, leur export ONNX FP32 et sa version quantifiée
+# int8. Les fichiers ONNX sont créés par compare_models.py (--exporter
+# puis --quantifier). MODEL_CHOICE choisit par reseau la variante et le
+# moteur d'execution : OpenCV DNN ou onnxruntime. onnxruntime est
+# enveloppé pour offrir la même interface qu'un cv2.dnn.Net (setInput /
+# forward), le reste du programme ne change pas.
+# compare_models.py mesure précision et latence de deux choix.
+#***********************************************************
+
+# --- Import ---
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Les chemins des poids sont relatifs au dossier du programme
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -------------- WEIGHTS --------------
+
+# ------- AGE -------
+# The model architecture for age estimation
+AGE_MODEL = 'face_age_weights/deploy_age.prototxt' # download from: https://drive.google.com/open?id=1kiusFljZc9QfcIYdU2s7xrtWHTraHwmW
+# The model pre-trained weights for age estimation
+AGE_PROTO = 'face_age_weights/age_net.caffemodel' # download from: https://drive.google.com/open?id=1kWv0AjxGSN0g31OeJa02eBGM0R_jcjIl
+
+# ------- FACE -------
+# The model architecture for face detection
+FACE_MODEL = "face_age_weights/res10_300x300_ssd_iter_140000_fp16.caffemodel" # download from: https://raw.githubusercontent.com/opencv/opencv_3rdparty/dnn_samples_face_detector_20180205_fp16/res10_300x300_ssd_iter_140000_fp16.caffemodel
+# The model pre-trained weights for face detection
+FACE_PROTO = "face_age_weights/deploy.prototxt" # download from: https://raw.githubusercontent.com/opencv/opencv/master/samples/dnn/face_detector/deploy.prototxt
+
+# ------- ANIMAL -------
+# The model architecture for animal detection
+ANIMAL_MODEL = "cat-dog-weights/MobileNetSSD_deploy.caffemodel"
+# The model pre-trained weights for animal detection
+ANIMAL_PROTO = "cat-dog-weights/MobileNetSSD_deploy.prototxt"
+
+# nom : (prototxt, caffemodel, forme de l'entrée pour l'échauffement)
+MODELS = {
+    "face": (FACE_PROTO, FACE_MODEL, (1, 3, 300, 300)),
+    "age": (AGE_MODEL, AGE_PROTO, (1, 3, 227, 227)),
+    "animal": (ANIMAL_PROTO, ANIMAL_MODEL, (1, 3, 300, 300)),
+}
+
+# ------- VARIANTES ONNX -------
+# Exportées des modèles Caffe ci-dessus (même entrée, même sortie, voir compare_models.py --exporter)
+FACE_FP32_ONNX = "face_age_weights/res10_300x300_ssd_fp32.onnx"
+AGE_FP32_ONNX = "face_age_weights/age_net_fp32.onnx"
+ANIMAL_FP32_ONNX = "cat-dog-weights/MobileNetSSD_fp32.onnx"
+# Exports ONNX quantifiés en int8 (voir compare_models.py --quantifier)
+FACE_INT8_ONNX = "face_age_weights/res10_300x300_ssd_int8.onnx"
+AGE_INT8_ONNX = "face_age_weights/age_net_int8.onnx"
+ANIMAL_INT8_ONNX = "cat-dog-weights/MobileNetSSD_int8.onnx"
+
+# nom : {variante : fichiers}, le format est déduit de l'extension du premier fichier
+VARIANTS = {
+    "face": {"fp32": (FACE_PROTO, FACE_MODEL), "fp32_onnx": (FACE_FP32_ONNX,), "int8_onnx": (FACE_INT8_ONNX,)},
+    "age": {"fp32": (AGE_MODEL, AGE_PROTO), "fp32_onnx": (AGE_FP32_ONNX,), "int8_onnx": (AGE_INT8_ONNX,)},
+    "animal": {"fp32": (ANIMAL_PROTO, ANIMAL_MODEL), "fp32_onnx": (ANIMAL_FP32_ONNX,), "int8_onnx": (ANIMAL_INT8_ONNX,)},
+}
+
+# Moteurs d'execution : "opencv" (Caffe et ONNX), "onnxruntime" (.onnx)
+RUNTIMES = ("opencv", "onnxruntime")
+# Variante et moteur de chaque reseau pour ce déploiement
+MODEL_CHOICE = {
+    "face": ("fp32", "opencv"),
+    "age": ("fp32", "opencv"),
+    "animal": ("fp32", "opencv"),
+}
+
+# Backend et cible OpenCV appliqués à chaque reseau chargé
+PREFERRED_BACKEND = cv2.dnn.DNN_BACKEND_OPENCV
+PREFERRED_TARGET = cv2.dnn.DNN_TARGET_CPU
+# Nombre de threads du moteur onnxruntime (0 : choix du moteur)
+RUNTIME_THREADS = 0
+
+
+# Reseau exécuté par onnxruntime sur le CPU, même interface qu'un cv2.dnn.Net
+class OnnxRuntimeNet:
+    def __init__(self, chemin, threads=RUNTIME_THREADS):
+        # Import au chargement : onnxruntime n'est nécessaire que si un reseau l'utilise
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(chemin, options, providers=["CPUExecutionProvider"])
+        self.entree = self.session.get_inputs()[0].name
+        self.blob = None
+
+    def setInput(self, blob):
+        self.blob = np.ascontiguousarray(blob, dtype=np.float32)
+
+    def forward(self):
+        return self.session.run(None, {self.entree: self.blob})[0]
+
+
+# Charge un reseau avec le moteur demandé, fichiers relatifs à MODEL_DIR
+def charger_reseau(fichiers, runtime="opencv", backend=PREFERRED_BACKEND, target=PREFERRED_TARGET):
+    if runtime not in RUNTIMES:
+        raise ValueError("Moteur d'execution inconnu : {}".format(runtime))
+    chemins = [os.path.join(MODEL_DIR, fichier) for fichier in fichiers]
+    if runtime == "onnxruntime":
+        return OnnxRuntimeNet(chemins[0])
+    if chemins[0].endswith(".prototxt"):
+        net = cv2.dnn.readNetFromCaffe(*chemins)
+    else:
+        net = cv2.dnn.readNet(*chemins)
+    net.setPreferableBackend(backend)
+    net.setPreferableTarget(target)
+    return net
+
+
+class ModelRegistry:
+    # choix : {nom : (variante, moteur)}, voir MODEL_CHOICE
+    def __init__(self, models=MODELS, backend=PREFERRED_BACKEND, target=PREFERRED_TARGET, choix=None):
+        self.models = models
+        self.backend = backend
+        self.target = target
+        self.choix = dict(MODEL_CHOICE, **(choix or {}))
+        self.nets = {}
+        self.temps_chargement = {}
+        self.temps_echauffement = {}
+        self.lock = threading.Lock()
+
+    # Renvoie le reseau demandé, le charge à la premiere utilisation
+    def get(self, nom):
+        with self.lock:
+            if nom not in self.nets:
+                debut = time.perf_counter()
+                net = charger_reseau(self.fichiers(nom), self.choix[nom][1], self.backend, self.target)
+                self.temps_chargement[nom] = time.perf_counter() - debut
+                self.nets[nom] = net
+            return self.nets[nom]
+
+    # Fichiers de la variante choisie d'un reseau
+    def fichiers(self, nom):
+        variante = self.choix[nom][0]
+        if variante not in VARIANTS[nom]:
+            raise ValueError("Variante inconnue pour {} : {}".format(nom, variante))
+        return VARIANTS[nom][variante]
+
+    # Charge les reseaux et execute une inference sur une entrée nulle
+    def warmup(self, noms=None):
+        for nom in noms or self.models:
+            net = self.get(nom)
+            net.setInput(np.zeros(self.models[nom][2], dtype=np.float32))
+            debut = time.perf_counter()
+            net.forward()
+            self.temps_echauffement[nom] = time.perf_counter() - debut
+
+    # Temps de chargement et d'échauffement de chaque reseau (ms)
+    def rapport(self):
+        return {nom: {"variante": self.choix[nom][0], "moteur": self.choix[nom][1],
+                      "chargement_ms": round(1000.0 * self.temps_chargement[nom], 1),
+                      "echauffement_ms": round(1000.0 * self.temps_echauffement.get(nom, 0.0), 1)}
+                for nom in self.temps_chargement}
+
+
+# Registre partagé par le processus
+registry = ModelRegistry()
@@ -0,0 +1,79 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : motion.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Filtre de changement de scène placé avant les
+# reseaux de neurones
+#
+# La frame est réduite en niveaux de gris puis comparée à celle de la
+# derniere detection (différence de pixels ou histogramme). Si rien n'a
+# changé, l'inference est sautée et le dernier resultat est conservé.
+# Une detection complète est tout de même forcée à intervalle régulier
+# pour ne jamais manquer un enfant endormi (immobile).
+#***********************************************************
+
+# --- Import ---
+import time
+
+import cv2
+
+# Méthode de comparaison : "diff" (différence de frames) ou "histogram"
+MOTION_METHOD = "diff"
+# Seuil de changement au-delà duquel la detection est relancée
+# diff : fraction des pixels modifiés ; histogram : distance de Bhattacharyya
+MOTION_THRESHOLD = 0.02
+# Ecart de niveau de gris (0-255) à partir duquel un pixel est considéré modifié
+PIXEL_DELTA = 25
+# Durée maximum (s) sans detection complète, même si la scène est immobile
+MAX_DETECTION_INTERVAL = 10.0
+# Taille de l'image réduite utilisée pour la comparaison
+SIGNATURE_SIZE = (80, 60)
+
+
+class MotionGate:
+    def __init__(self, methode=MOTION_METHOD, seuil=MOTION_THRESHOLD,
+                 intervalle_max=MAX_DETECTION_INTERVAL, taille=SIGNATURE_SIZE):
+        if methode not in ("diff", "histogram"):
+            raise ValueError("Méthode de comparaison inconnue : {}".format(methode))
+        self.methode = methode
+        self.seuil = seuil
+        self.intervalle_max = intervalle_max
+        self.taille = taille
+        self.reference = None
+        self.derniere_detection = 0.0
+        self.dernier_score = 0.0
+
+    # Image réduite (ou son histogramme) qui sert à comparer deux frames
+    def _signature(self, frame):
+        petite = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), self.taille, interpolation=cv2.INTER_AREA)
+        petite = cv2.GaussianBlur(petite, (5, 5), 0)
+        if self.methode == "histogram":
+            histogramme = cv2.calcHist([petite], [0], None, [32], [0, 256])
+            return cv2.normalize(histogramme, histogramme)
+        return petite
+
+    # Score de changement entre la signature et la reference
+    def _score(self, signature):
+        if self.methode == "histogram":
+            return cv2.compareHist(self.reference, signature, cv2.HISTCMP_BHATTACHARYYA)
+        difference = cv2.absdiff(self.reference, signature)
+        return cv2.countNonZero(cv2.threshold(difference, PIXEL_DELTA, 255, cv2.THRESH_BINARY)[1]) / difference.size
+
+    # Renvoie True si la detection doit être executée sur cette frame
+    def should_detect(self, frame, maintenant=None):
+        if maintenant is None:
+            maintenant = time.monotonic()
+        signature = self._signature(frame)
+
+        if self.reference is not None and maintenant - self.derniere_detection < self.intervalle_max:
+            self.dernier_score = self._score(signature)
+            if self.dernier_score <= self.seuil:
+                return False
+
+        # La reference est la frame de la derniere detection : une dérive lente finit par la déclencher
+        self.reference = signature
+        self.derniere_detection = maintenant
+        return True
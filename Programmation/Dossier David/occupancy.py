@@ -0,0 +1,177 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : occupancy.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Occupation de l'habitacle, machine à états incrémentale
+#
+# Chaque label detecté est converti une fois en classe entière
+# (ADULTE, ENFANT, ANIMAL). Pour chaque classe, une croyance entre 0 et 1
+# tend vers 1 quand la classe est detectée et vers 0 sinon, avec une
+# constante de temps : une detection isolée sur une frame ne fait presque
+# pas bouger la croyance, une presence qui dure la fait passer le seuil.
+# Le score de la detection (confiance du detecteur, déjà au-dessus de son
+# seuil) règle seulement la vitesse de montée : une detection peu sûre
+# mais continue finit aussi par compter. La presence d'une classe a une
+# hystérésis (seuils haut et bas).
+#
+# L'habitacle est "vide", "occupe" (un adulte) ou "seul" (enfant ou
+# animal sans adulte). Un nouvel état doit durer DWELL_TIMES avant d'être
+# adopté. Après ALERT_DWELL secondes "seul" (ALERT_DWELL_ENV si une
+# alerte environnementale est active) l'état passe à "alerte", puis à
+# "critique" si l'environnement se dégrade pendant l'alerte. Les alertes
+# ne sont émises qu'à ces transitions, pas à chaque frame.
+#
+# Chaque mise à jour coute O(detections + cameras).
+#***********************************************************
+
+# --- Import ---
+import numpy as np
+
+from inference import AGE_INTERVALS, ANIMAL_TYPES
+
+# Classes d'occupation (indices des tableaux de croyance)
+ADULTE, ENFANT, ANIMAL = 0, 1, 2
+CLASSES = ("adulte", "enfant", "animal")
+# Label d'une detection -> classe : les trois premieres tranches d'age sont des enfants
+CLASSE_PAR_LABEL = {**{age: ENFANT for age in AGE_INTERVALS[:3]},
+                    **{age: ADULTE for age in AGE_INTERVALS[3:]},
+                    **{type_race: ANIMAL for type_race in ANIMAL_TYPES}}
+# Constante de temps (s) de la croyance de chaque classe (adulte, enfant, animal)
+BELIEF_TIME_CONSTANT = np.array([1.5, 1.5, 1.5])
+# Écart maximum (s) pris en compte entre deux mises à jour : une frame après une longue pause ne remplace pas tout
+MAX_UPDATE_GAP = 1.5
+# Seuils de presence : une classe devient présente au-dessus du seuil haut, absente sous le seuil bas
+PRESENCE_ON = 0.5
+PRESENCE_OFF = 0.2
+# Durée (s) pendant laquelle le dernier resultat d'une camera compte dans l'occupation de l'habitacle
+OCCUPANCY_MAX_AGE = 5.0
+# Durée (s) pendant laquelle un nouvel état doit se maintenir avant d'être adopté
+DWELL_TIMES = {"vide": 5.0, "occupe": 1.0, "seul": 2.0}
+# Durée (s) "seul" avant l'alerte, sans et avec alerte environnementale active
+ALERT_DWELL = 10.0
+ALERT_DWELL_ENV = 3.0
+# Niveau d'alerte de chaque état (0 : pas d'alerte)
+ALERT_LEVELS = {"vide": 0, "occupe": 0, "seul": 0, "alerte": 1, "critique": 2}
+
+
+# Labels detectés -> (classes, scores) en tableaux, les labels sans classe (person du SSD ...) sont ignorés
+# scores : confiance du detecteur de chaque detection (colonne confiance de inference.RESULT_DTYPE)
+def classer(labels, scores):
+    paires = [(CLASSE_PAR_LABEL[str(label)], float(score)) for label, score in zip(labels, scores)
+              if str(label) in CLASSE_PAR_LABEL]
+    if not paires:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    classes, scores = zip(*paires)
+    return np.array(classes, dtype=np.intp), np.array(scores)
+
+
+class OccupancyEngine:
+    def __init__(self, constantes=BELIEF_TIME_CONSTANT, dwell=DWELL_TIMES, alert_dwell=ALERT_DWELL,
+                 alert_dwell_env=ALERT_DWELL_ENV, max_age=OCCUPANCY_MAX_AGE):
+        self.constantes = np.asarray(constantes, dtype=np.float64)
+        self.dwell = dwell
+        self.alert_dwell = alert_dwell
+        self.alert_dwell_env = alert_dwell_env
+        self.max_age = max_age
+        self.croyances = np.zeros(len(CLASSES))
+        self.presents = np.zeros(len(CLASSES), dtype=bool)
+        # Derniere observation de chaque camera : {source : (meilleurs scores, nombres, instant)}
+        self.observations = {}
+        self.instant = None
+        self.etat = "vide"
+        self.depuis = None
+        self.candidat = None
+        self.candidat_depuis = None
+        self.transitions = {}
+
+    # Observation fusionnée des cameras récentes : meilleur score et nombre de chaque classe
+    def _fusionner(self, instant):
+        scores = np.zeros(len(CLASSES))
+        nombres = np.zeros(len(CLASSES), dtype=np.int64)
+        for source, (scores_source, nombres_source, vu) in list(self.observations.items()):
+            if instant - vu > self.max_age:
+                del self.observations[source]
+                continue
+            np.maximum(scores, scores_source, out=scores)
+            nombres += nombres_source
+        return scores, nombres
+
+    # Etat brut des presences, avant les durées de maintien
+    def _etat_brut(self):
+        if self.presents[ADULTE]:
+            return "occupe"
+        if self.presents[ENFANT] or self.presents[ANIMAL]:
+            return "seul"
+        return "vide"
+
+    # Etat visé : l'état brut, ou l'escalade "seul" -> "alerte" -> "critique" tant que personne ne revient
+    def _etat_vise(self, brut, instant, environnement):
+        if brut != "seul" or self.etat not in ("seul", "alerte", "critique"):
+            return brut
+        if self.etat == "seul":
+            attente = self.alert_dwell_env if environnement else self.alert_dwell
+            return "alerte" if instant - self.depuis >= attente else "seul"
+        if self.etat == "alerte" and environnement:
+            return "critique"
+        return self.etat
+
+    def _changer(self, etat, instant):
+        transition = (self.etat, etat)
+        self.transitions[transition] = self.transitions.get(transition, 0) + 1
+        self.etat = etat
+        self.depuis = instant
+        self.candidat = None
+        return transition
+
+    # Met à jour l'occupation avec les detections d'une camera
+    # classes, scores : tableaux (voir classer) ; corps : corps chauds (thermal.ThermalMonitor.presence)
+    # environnement : nombre d'alertes environnementales actives
+    # Renvoie (nombres par classe, transition (ancien, nouveau) ou None)
+    def update(self, classes, scores, instant, source=None, corps=(), environnement=0):
+        meilleurs = np.zeros(len(CLASSES))
+        np.maximum.at(meilleurs, classes, scores)
+        self.observations[source] = (meilleurs, np.bincount(classes, minlength=len(CLASSES)), instant)
+        observes, nombres = self._fusionner(instant)
+
+        # Un corps chaud que les cameras n'expliquent pas (enfant couvert, habitacle dans le noir) compte comme enfant
+        inexpliques = max(0, len(corps) - int(nombres.sum()))
+        if inexpliques:
+            nombres[ENFANT] += inexpliques
+            observes[ENFANT] = max(observes[ENFANT], corps[0]["confiance"])
+
+        # Croyance : tend vers 1 (classe observée) ou 0 selon le temps écoulé, la montée est ralentie par un score faible
+        if self.instant is None:
+            self.depuis = instant
+        else:
+            ecart = min(max(instant - self.instant, 0.0), MAX_UPDATE_GAP)
+            vus = observes > 0
+            poids = np.exp(-ecart * np.where(vus, observes, 1.0) / self.constantes)
+            self.croyances = self.croyances * poids + vus * (1.0 - poids)
+        self.instant = instant
+        self.presents = np.where(self.presents, self.croyances >= PRESENCE_OFF, self.croyances >= PRESENCE_ON)
+
+        vise = self._etat_vise(self._etat_brut(), instant, environnement)
+        if vise == self.etat:
+            self.candidat = None
+            return nombres, None
+        # Les escalades ont déjà attendu leur durée dans l'état précédent
+        if ALERT_LEVELS[vise] > 0:
+            return nombres, self._changer(vise, instant)
+        if vise != self.candidat:
+            self.candidat = vise
+            self.candidat_depuis = instant
+        if instant - self.candidat_depuis >= self.dwell[vise]:
+            return nombres, self._changer(vise, instant)
+        return nombres, None
+
+    # Niveau d'alerte de l'état courant (0, 1 alerte, 2 critique)
+    def niveau(self):
+        return ALERT_LEVELS[self.etat]
+
+    def rapport(self):
+        return {"etat": self.etat, "croyances": {nom: round(float(croyance), 3) for nom, croyance in zip(CLASSES, self.croyances)},
+                "transitions": {"{}->{}".format(*transition): nombre for transition, nombre in self.transitions.items()},
+                "alertes": sum(nombre for (_, etat), nombre in self.transitions.items() if ALERT_LEVELS[etat] > 0)}
@@ -0,0 +1,340 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : pipeline.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Chaine producteur / consommateur entre la camera
+# et les reseaux de neurones.
+#
+# Un thread de capture remplit un tampon circulaire borné de frames,
+# un thread d'inference prend toujours la frame la plus récente (les
+# frames trop anciennes sont abandonnées) et publie le resultat que
+# l'IHM Tk se contente d'afficher. Un filtre de changement optionnel
+# (motion.MotionGate) évite l'inference quand la scène est immobile.
+# Avec plusieurs cameras, chaque source a son thread de capture et son
+# tampon, le thread d'inference les sert via sources.SourceScheduler.
+# Les compteurs et durées sont aussi publiés dans metrics.metrics.
+#***********************************************************
+
+# --- Import ---
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from metrics import metrics, profileur_detection
+from sources import SourceScheduler
+
+# Nom de la source quand une seule camera est utilisée
+SOURCE_PAR_DEFAUT = "camera"
+
+# Redémarrage d'une source en erreur : attente (s) multipliée par le nombre d'échecs consécutifs,
+# abandon de la source après CAPTURE_MAX_RESTARTS échecs sans aucune frame
+CAPTURE_RESTART_DELAY = 2.0
+CAPTURE_MAX_RESTARTS = 5
+
+
+# Tampon circulaire de frames pré-alloué, le consommateur lit toujours la plus récente
+# condition : partagée entre les tampons de plusieurs cameras (voir sources.SourceScheduler)
+class FrameRing:
+    def __init__(self, taille=4, shape=(480, 640, 3), condition=None):
+        self.slots = [np.empty(shape, dtype=np.uint8) for _ in range(taille)]
+        self.timestamps = [0.0] * taille
+        self.index = -1
+        self.sequence = 0
+        self.condition = condition or threading.Condition()
+
+    # Copie la frame dans la case suivante (écrase la plus ancienne)
+    def put(self, frame):
+        with self.condition:
+            self.index = (self.index + 1) % len(self.slots)
+            slot = self.slots[self.index]
+            if slot.shape != frame.shape:
+                slot = self.slots[self.index] = np.empty_like(frame)
+            np.copyto(slot, frame)
+            self.timestamps[self.index] = time.monotonic()
+            self.sequence += 1
+            self.condition.notify_all()
+            return self.sequence
+
+    # Attend une frame plus récente que derniere_sequence et en renvoie une copie
+    def get_latest(self, derniere_sequence=0, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > derniere_sequence, timeout):
+                return None
+            return (self.sequence, self.slots[self.index].copy(), self.timestamps[self.index])
+
+
+# Mesure du débit (images/s) et de la latence capture -> resultat / alerte
+class PipelineStats:
+    def __init__(self, fenetre=100):
+        self.lock = threading.Lock()
+        self.debut = time.monotonic()
+        self.frames_capturees = 0
+        self.frames_traitees = 0
+        self.frames_abandonnees = 0
+        self.frames_ignorees = 0
+        self.alertes = 0
+        self.instants_capture = deque(maxlen=fenetre)
+        self.instants_traitement = deque(maxlen=fenetre)
+        self.latences_resultat = deque(maxlen=fenetre)
+        self.latences_alerte = deque(maxlen=fenetre)
+
+    def capture(self, source=SOURCE_PAR_DEFAUT):
+        metrics.incrementer("pabo_frames_capturees_total", source=source)
+        with self.lock:
+            self.frames_capturees += 1
+            self.instants_capture.append(time.monotonic())
+
+    # alerte : la frame a levé une alerte (transition vers alerte ou critique, pas chaque frame en alerte)
+    def traitement(self, t_capture, abandonnees=0, alerte=False, source=SOURCE_PAR_DEFAUT):
+        maintenant = time.monotonic()
+        metrics.incrementer("pabo_frames_traitees_total", source=source)
+        metrics.observer("pabo_resultat_latence_seconds", maintenant - t_capture)
+        if abandonnees:
+            metrics.incrementer("pabo_frames_abandonnees_total", abandonnees)
+        with self.lock:
+            self.frames_traitees += 1
+            self.frames_abandonnees += abandonnees
+            self.instants_traitement.append(maintenant)
+            self.latences_resultat.append(maintenant - t_capture)
+            if alerte:
+                self.alertes += 1
+                self.latences_alerte.append(maintenant - t_capture)
+
+    def abandon(self, abandonnees):
+        if abandonnees:
+            metrics.incrementer("pabo_frames_abandonnees_total", abandonnees)
+        with self.lock:
+            self.frames_abandonnees += abandonnees
+
+    # Frame sans changement de scène : l'inference n'est pas executée
+    def ignoree(self, abandonnees=0):
+        metrics.incrementer("pabo_frames_ignorees_total")
+        if abandonnees:
+            metrics.incrementer("pabo_frames_abandonnees_total", abandonnees)
+        with self.lock:
+            self.frames_ignorees += 1
+            self.frames_abandonnees += abandonnees
+
+    # Nombre d'evenements par seconde sur la fenêtre glissante
+    @staticmethod
+    def _debit(instants):
+        if len(instants) < 2:
+            return 0.0
+        duree = instants[-1] - instants[0]
+        return (len(instants) - 1) / duree if duree > 0 else 0.0
+
+    @staticmethod
+    def _moyenne_ms(valeurs):
+        return round(1000.0 * sum(valeurs) / len(valeurs), 1) if valeurs else 0.0
+
+    # Renvoie un dictionnaire résumé des performances
+    def rapport(self):
+        with self.lock:
+            return {
+                "duree_s": round(time.monotonic() - self.debut, 1),
+                "frames_capturees": self.frames_capturees,
+                "frames_traitees": self.frames_traitees,
+                "frames_abandonnees": self.frames_abandonnees,
+                "frames_ignorees": self.frames_ignorees,
+                "alertes": self.alertes,
+                "fps_capture": round(self._debit(self.instants_capture), 2),
+                "fps_inference": round(self._debit(self.instants_traitement), 2),
+                "latence_resultat_ms": self._moyenne_ms(self.latences_resultat),
+                "latence_alerte_ms": self._moyenne_ms(self.latences_alerte),
+            }
+
+
+# Thread producteur : lit une source de capture en continu (voir sources.py) et remplit son tampon
+# duty (optionnel, voir duty.py) : espace les captures selon l'état veille / actif
+# preuves (optionnel, evidence.EvidenceRing) : reçoit chaque frame, ne bloque jamais la capture
+# Une erreur de la source est affichée et comptée, la source est fermée puis relancée (voir CAPTURE_RESTART_DELAY)
+class CaptureThread(threading.Thread):
+    def __init__(self, source, ring, stats, duty=None, preuves=None):
+        super().__init__(name="pabo-capture-{}".format(source.nom), daemon=True)
+        self.source = source
+        self.ring = ring
+        self.stats = stats
+        self.duty = duty
+        self.preuves = preuves
+        self.stop_event = threading.Event()
+
+    def run(self):
+        nom = self.source.nom
+        echecs = 0
+        while not self.stop_event.is_set():
+            try:
+                for _ in self._lire():
+                    echecs = 0
+                # Fin normale de la source (fichier sans boucle) ou arrêt demandé
+                if not self.stop_event.is_set():
+                    print("Fin de la source {}".format(nom))
+                break
+            except Exception as erreur:
+                echecs += 1
+                metrics.incrementer("pabo_erreurs_capture_total", source=nom)
+                print("Erreur capture ({}) : {!r}".format(nom, erreur))
+            finally:
+                try:
+                    self.source.close()
+                except Exception as erreur:
+                    print("Erreur fermeture source ({}) : {!r}".format(nom, erreur))
+            if echecs >= CAPTURE_MAX_RESTARTS:
+                print("Source {} abandonnée après {} échecs".format(nom, echecs))
+                break
+            self.stop_event.wait(CAPTURE_RESTART_DELAY * echecs)
+
+    # Lit la source et remplit le tampon, produit un element par frame (l'appelant compte les frames reçues)
+    def _lire(self):
+        derniere = time.monotonic()
+        attente = time.perf_counter()
+        for frame in self.source.frames():
+            # Temps passé à attendre la source (camera, décodage vidéo)
+            metrics.observer("pabo_capture_seconds", time.perf_counter() - attente, source=self.source.nom)
+            self.ring.put(frame)
+            if self.preuves is not None:
+                self.preuves.put(frame)
+            self.stats.capture(self.source.nom)
+            yield
+            if self.duty is not None:
+                self.stop_event.wait(max(0.0, self.duty.periode("capture") - (time.monotonic() - derniere)))
+                derniere = time.monotonic()
+            if self.stop_event.is_set():
+                break
+            attente = time.perf_counter()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# Thread consommateur : applique la detection sur la frame la plus récente
+# entree : tampon d'une camera (FrameRing) ou ordonnanceur de plusieurs cameras (sources.SourceScheduler)
+# detect(frame, source=nom) doit renvoyer un tuple dont le dernier element est le resumé de detection
+# gate (optionnel) : filtre de changement (ou {source : filtre}), si la scène n'a pas changé le dernier resultat reste affiché
+# backend (optionnel, voir backends.py) : les reseaux tournent en parallèle sur plusieurs frames,
+# detect(frame, detections, source=nom) n'applique alors que le suivi, l'annotation et l'enregistrement
+# duty (optionnel, voir duty.py) : reçoit chaque resumé de detection et espace les detections en veille
+class InferenceWorker(threading.Thread):
+    def __init__(self, entree, detect, stats, gate=None, backend=None, intervalle_rapport=30.0, duty=None):
+        super().__init__(name="pabo-inference", daemon=True)
+        if isinstance(entree, FrameRing):
+            entree = SourceScheduler({SOURCE_PAR_DEFAUT: entree})
+        self.scheduler = entree
+        self.detect = detect
+        self.stats = stats
+        if gate is not None and not isinstance(gate, dict):
+            gate = {nom: gate for nom in self.scheduler.noms}
+        self.gates = gate or {}
+        self.backend = backend
+        self.intervalle_rapport = intervalle_rapport
+        self.duty = duty
+        self.derniere_analyse = 0.0
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.resultats = {}
+        self.resultats_sequences = {nom: 0 for nom in self.scheduler.noms}
+        # Numero de tache (backend) -> (source, sequence de la frame dans sa source)
+        self.taches = {}
+        self.numero_tache = 0
+        self.dernier_rapport = time.monotonic()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            # En veille les detections sont espacées
+            attente = 0.0
+            if self.duty is not None:
+                attente = self.duty.periode("detection") - (time.monotonic() - self.derniere_analyse)
+            if self.backend is None:
+                if attente > 0:
+                    self.stop_event.wait(min(attente, 0.5))
+                    continue
+                entree = self._prochaine_frame(timeout=0.5)
+                if entree is not None:
+                    nom, sequence, frame, t_capture, abandonnees = entree
+                    resultat = self._detecter(frame, source=nom)
+                    if resultat is None:
+                        self.stats.abandon(abandonnees)
+                    else:
+                        self._publier(nom, sequence, t_capture, resultat, abandonnees)
+            else:
+                # Remplit les workers libres (sauf pendant une pause de veille) puis récupère les analyses terminées
+                if attente > 0 and not self.backend.en_cours():
+                    self.stop_event.wait(min(attente, 0.5))
+                    continue
+                if self.backend.disponible() and attente <= 0:
+                    entree = self._prochaine_frame(timeout=0.01 if self.backend.en_cours() else 0.5)
+                    if entree is not None:
+                        nom, sequence, frame, t_capture, abandonnees = entree
+                        self.numero_tache += 1
+                        self.taches[self.numero_tache] = (nom, sequence)
+                        self.backend.submit(self.numero_tache, frame, t_capture)
+                        self.stats.abandon(abandonnees)
+                for numero, frame, t_capture, detections in self.backend.poll(timeout=0.01):
+                    nom, sequence = self.taches.pop(numero)
+                    # Analyse en erreur dans le backend (voir backends.py)
+                    if detections is None:
+                        metrics.incrementer("pabo_erreurs_detection_total", source=nom)
+                        self.stats.abandon(1)
+                        continue
+                    # Un resultat plus ancien que celui déjà affiché pour cette source est abandonné
+                    if sequence < self.resultats_sequences[nom]:
+                        self.stats.abandon(1)
+                        continue
+                    resultat = self._detecter(frame, detections, source=nom)
+                    if resultat is not None:
+                        self._publier(nom, sequence, t_capture, resultat)
+
+            if time.monotonic() - self.dernier_rapport >= self.intervalle_rapport:
+                self.dernier_rapport = time.monotonic()
+                print("== Performances pipeline ==", self.stats.rapport())
+
+    # Detection mesurée, sous cProfile quand un profil est demandé (voir metrics.MetricsServer /profil)
+    # Une erreur sur une frame est comptée et affichée, la boucle continue avec la suivante (renvoie None)
+    def _detecter(self, *args, source=SOURCE_PAR_DEFAUT, **kwargs):
+        try:
+            with metrics.chrono("pabo_detection_seconds"):
+                return profileur_detection.executer(self.detect, *args, source=source, **kwargs)
+        except Exception as erreur:
+            metrics.incrementer("pabo_erreurs_detection_total", source=source)
+            print("Erreur detection ({}) : {!r}".format(source, erreur))
+            return None
+
+    # Attend la frame la plus récente qui doit être analysée (None si aucune)
+    def _prochaine_frame(self, timeout):
+        entree = self.scheduler.prochaine(timeout=timeout)
+        if entree is None:
+            return None
+        self.derniere_analyse = time.monotonic()
+        nom, sequence, frame, t_capture, abandonnees = entree
+        gate = self.gates.get(nom)
+        if gate is not None and not gate.should_detect(frame) and nom in self.resultats:
+            self.stats.ignoree(abandonnees)
+            return None
+        return entree
+
+    def _publier(self, nom, sequence, t_capture, resultat, abandonnees=0):
+        resume_detection = resultat[-1]
+        # Alerte levée par cette frame (5e element du resumé, voir surveillance.Surveillance.security_data_detection) :
+        # l'occupation fusionne les cameras, une alerte n'est comptée qu'une fois même avec plusieurs sources
+        alerte = len(resume_detection) > 4 and bool(resume_detection[4])
+        self.stats.traitement(t_capture, abandonnees, alerte=alerte, source=nom)
+        if self.duty is not None:
+            self.duty.detection(resume_detection)
+        with self.lock:
+            self.resultats[nom] = resultat
+            self.resultats_sequences[nom] = sequence
+
+    # Renvoie le dernier resultat d'une source (la premiere par défaut) s'il est plus récent que derniere_sequence
+    def get_result(self, derniere_sequence=0, source=None):
+        nom = source or self.scheduler.noms[0]
+        with self.lock:
+            if self.resultats_sequences[nom] > derniere_sequence:
+                return self.resultats_sequences[nom], self.resultats[nom]
+            return None
+
+    def stop(self):
+        self.stop_event.set()
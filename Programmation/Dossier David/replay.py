@@ -0,0 +1,152 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : replay.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Rejeu hors ligne de la chaine de detection
+#
+# Lit une vidéo (ou un dossier d'images) et un journal des mesures
+# du BME280 (CSV ou base SQLite), puis les fait passer dans la même
+# logique que l'application (Surveillance) sans camera ni capteur.
+# Les detections et alertes sont écrites dans une base séparée.
+# Le rejeu se fait au plus vite ou au rythme réel.
+#
+# Utilisation : python3 replay.py video.h264 --capteurs mesures.csv
+#               python3 replay.py dossier_images/ --capteurs detection_data.sqlite --temps-reel
+#***********************************************************
+
+# --- Import ---
+import argparse
+import contextlib
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from inference import INFERENCE_MODES, InferenceEngine
+from motion import MotionGate
+from sources import lire_fichier as lire_frames
+from storage import DetectionStorage
+from surveillance import Surveillance
+from tracking import TrackedDetector
+
+# Base de données de sortie du rejeu (jamais la base de l'application)
+REPLAY_DB_PATH = "replay_data.sqlite"
+# Cadence des images d'un dossier (images par seconde)
+REPLAY_FPS = 10.0
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# Lit le journal des mesures : CSV (date, temperature, pression, humidite) ou table environnement d'une base SQLite
+# Renvoie une liste triée de (date, temperature, pression, humidite)
+def lire_capteur(chemin):
+    if chemin.lower().endswith((".sqlite", ".db")):
+        connexion = sqlite3.connect(chemin)
+        try:
+            lignes = connexion.execute("SELECT date, temperature, pression, humidite FROM environnement ORDER BY id").fetchall()
+        finally:
+            connexion.close()
+    else:
+        with open(chemin, newline="") as fichier:
+            lignes = [(ligne["date"], ligne["temperature"], ligne["pression"], ligne["humidite"])
+                      for ligne in csv.DictReader(fichier)]
+
+    mesures = [(datetime.strptime(date, DATE_FORMAT), float(temperature), float(pression), float(humidite))
+               for (date, temperature, pression, humidite) in lignes]
+    return sorted(mesures, key=lambda mesure: mesure[0])
+
+
+class Replay:
+    def __init__(self, surveillance, gate=None, temps_reel=False):
+        self.surveillance = surveillance
+        self.gate = gate
+        self.temps_reel = temps_reel
+
+    # Rejoue les frames et les mesures dans l'ordre chronologique, renvoie un rapport
+    def run(self, frames, mesures=(), debut=None):
+        mesures = list(mesures)
+        # L'horloge du rejeu démarre à la premiere mesure (ou à debut / maintenant)
+        debut = debut or (mesures[0][0] if mesures else datetime.now())
+        rapport = {"frames": 0, "frames_analysees": 0, "mesures": 0,
+                   "alertes_detection": 0, "alertes_environnement": 0}
+        index_mesure = 0
+        depart = time.perf_counter()
+        duree_detection = 0.0
+
+        for instant, frame in frames:
+            date = debut + timedelta(seconds=instant)
+            if self.temps_reel:
+                attente = instant - (time.perf_counter() - depart)
+                if attente > 0:
+                    time.sleep(attente)
+
+            # Mesures du capteur antérieures à cette frame
+            while index_mesure < len(mesures) and mesures[index_mesure][0] <= date:
+                date_mesure, temperature, pression, humidite = mesures[index_mesure]
+                if self.surveillance.data_environnement_db(temperature, pression, humidite, date_mesure) > 0:
+                    rapport["alertes_environnement"] += 1
+                rapport["mesures"] += 1
+                index_mesure += 1
+
+            rapport["frames"] += 1
+            if self.gate is not None and not self.gate.should_detect(frame, instant) and rapport["frames_analysees"]:
+                continue
+            debut_detection = time.perf_counter()
+            self.surveillance.detection_all(frame, date=date)
+            duree_detection += time.perf_counter() - debut_detection
+            rapport["frames_analysees"] += 1
+
+        # Mesures restantes après la derniere frame
+        for date_mesure, temperature, pression, humidite in mesures[index_mesure:]:
+            if self.surveillance.data_environnement_db(temperature, pression, humidite, date_mesure) > 0:
+                rapport["alertes_environnement"] += 1
+            rapport["mesures"] += 1
+
+        # Alertes de detection : passages à l'état "alerte" ou "critique" de l'occupation
+        occupation = self.surveillance.occupation.rapport()
+        rapport["alertes_detection"] = occupation["alertes"]
+        rapport["occupation"] = occupation["transitions"]
+
+        duree = time.perf_counter() - depart
+        rapport["duree_s"] = round(duree, 2)
+        rapport["fps"] = round(rapport["frames"] / duree, 2) if duree > 0 else 0.0
+        rapport["detection_ms"] = round(1000.0 * duree_detection / max(rapport["frames_analysees"], 1), 1)
+        return rapport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu hors ligne de la detection PABO")
+    parser.add_argument("source", help="fichier vidéo ou dossier d'images")
+    parser.add_argument("--capteurs", help="journal des mesures BME280 (CSV ou base SQLite)")
+    parser.add_argument("--base", default=REPLAY_DB_PATH, help="base de données de sortie")
+    parser.add_argument("--fps", type=float, default=REPLAY_FPS, help="cadence d'un dossier d'images")
+    parser.add_argument("--temps-reel", action="store_true", help="rejoue au rythme de l'enregistrement")
+    parser.add_argument("--sans-filtre", action="store_true", help="analyse toutes les frames (pas de filtre de changement)")
+    parser.add_argument("--mode", default=None, choices=INFERENCE_MODES,
+                        help="mode du moteur d'inference (single_pass, pyramide ou double)")
+    parser.add_argument("--silencieux", action="store_true", help="masque les traces de detection")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.base) == os.path.abspath("detection_data.sqlite"):
+        parser.error("le rejeu ne doit pas écrire dans la base de l'application")
+
+    engine = InferenceEngine(mode=args.mode) if args.mode else InferenceEngine()
+    engine.warmup()
+    storage = DetectionStorage(args.base)
+    replay = Replay(Surveillance(storage, TrackedDetector(engine)),
+                    None if args.sans_filtre else MotionGate(), args.temps_reel)
+    mesures = lire_capteur(args.capteurs) if args.capteurs else []
+
+    try:
+        with open(os.devnull, "w") as nul, (contextlib.redirect_stdout(nul) if args.silencieux else contextlib.nullcontext()):
+            rapport = replay.run(lire_frames(args.source, args.fps), mesures)
+    finally:
+        storage.close()
+    print("== Rapport de rejeu ==", rapport)
+
+
+if __name__ == "__main__":
+    main()
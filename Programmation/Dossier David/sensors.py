@@ -0,0 +1,214 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : sensors.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Echantillonnage des conditions environnementales
+#
+# Un thread lit le BME280 (mode normal) à cadence fixe et range les
+# mesures dans un tampon circulaire numpy. Toutes les N secondes un
+# agrégat (moyenne, min, max, pente par minute) est calculé sur la
+# fenêtre écoulée : seul cet agrégat est enregistré dans la base et
+# affiché par l'IHM. Les alertes environnementales sont décidées sur
+# les moyennes de fenêtre, avec anti-rebond et hystérésis, pour qu'une
+# mesure isolée bruitée ne crée pas de ligne alerte.
+#***********************************************************
+
+# --- Import ---
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from metrics import metrics
+
+# Période d'échantillonnage du capteur (s)
+SAMPLE_PERIOD = 1.0
+# Nombre de mesures conservées (10 minutes à 1 Hz)
+RING_SIZE = 600
+# Période des agrégats envoyés à la base et à l'IHM (s)
+AGGREGATE_PERIOD = 10.0
+# Temps de veille du BME280 en mode normal (ms, voir bme280.STANDBY_MS)
+SENSOR_STANDBY_MS = 250
+# Attente (s) avant une nouvelle tentative quand le capteur ne répond pas au démarrage
+SENSOR_RETRY_DELAY = 5.0
+
+GRANDEURS = ("temperature", "pression", "humidite")
+
+# Limites de sécurité (min, max) de chaque grandeur, None : pas de limite
+#https://mobile.interieur.gouv.fr/Archives/Archives-de-la-rubrique-Ma-securite/Avec-votre-vehicule/Chaleur-quels-reflexes-adopter-en-voiture-avec-des-enfants
+# >1500m altitude enfant = début diffculté respiratoire enfant ; 1500m = 850hPa
+LIMITES = {"temperature": (18.0, 30.0), "pression": (850.0, None), "humidite": (35.0, 80.0)}
+# Marge à regagner à l'intérieur des limites pour lever une alerte
+HYSTERESIS = {"temperature": 1.0, "pression": 10.0, "humidite": 3.0}
+# Nombre d'agrégats consécutifs nécessaires pour déclencher ou lever une alerte
+DEBOUNCE_COUNT = 3
+
+
+# Tampon circulaire pré-alloué de mesures (instant, temperature, pression, humidite)
+class SensorRing:
+    def __init__(self, taille=RING_SIZE):
+        self.mesures = np.zeros((taille, 1 + len(GRANDEURS)), dtype=np.float64)
+        self.index = 0
+        self.nombre = 0
+        self.lock = threading.Lock()
+
+    def put(self, instant, temperature, pression, humidite):
+        with self.lock:
+            self.mesures[self.index] = (instant, temperature, pression, humidite)
+            self.index = (self.index + 1) % len(self.mesures)
+            self.nombre = min(self.nombre + 1, len(self.mesures))
+
+    # Copie des mesures des duree dernieres secondes, de la plus ancienne à la plus récente
+    def fenetre(self, duree=None, maintenant=None):
+        with self.lock:
+            if self.nombre < len(self.mesures):
+                mesures = self.mesures[:self.nombre].copy()
+            else:
+                mesures = np.roll(self.mesures, -self.index, axis=0)
+        if duree is not None and len(mesures):
+            maintenant = mesures[-1, 0] if maintenant is None else maintenant
+            mesures = mesures[mesures[:, 0] > maintenant - duree]
+        return mesures
+
+
+# Moyenne, min, max et pente (par minute) de chaque grandeur d'une fenêtre de mesures
+def statistiques(mesures):
+    resultat = {"echantillons": len(mesures)}
+    if not len(mesures):
+        return resultat
+    minutes = (mesures[:, 0] - mesures[0, 0]) / 60.0
+    for colonne, grandeur in enumerate(GRANDEURS, start=1):
+        valeurs = mesures[:, colonne]
+        pente = 0.0
+        if len(valeurs) > 1 and minutes[-1] > 0:
+            pente = float(np.polyfit(minutes, valeurs, 1)[0])
+        resultat[grandeur] = {"moyenne": float(valeurs.mean()), "min": float(valeurs.min()),
+                              "max": float(valeurs.max()), "pente_par_min": pente}
+    return resultat
+
+
+# Alertes environnementales avec anti-rebond et hystérésis sur les moyennes de fenêtre
+class EnvironmentAlarm:
+    def __init__(self, limites=LIMITES, hysteresis=HYSTERESIS, debounce=DEBOUNCE_COUNT):
+        self.limites = limites
+        self.hysteresis = hysteresis
+        self.debounce = debounce
+        self.actives = {grandeur: False for grandeur in limites}
+        self.compteurs = {grandeur: 0 for grandeur in limites}
+
+    def _hors_limites(self, grandeur, valeur, marge=0.0):
+        minimum, maximum = self.limites[grandeur]
+        return ((minimum is not None and valeur < minimum + marge) or
+                (maximum is not None and valeur > maximum - marge))
+
+    # Met à jour l'état avec un agrégat, renvoie (nombre d'alertes actives, grandeurs nouvellement en alerte)
+    def update(self, agregat):
+        nouvelles = []
+        for grandeur in self.limites:
+            if grandeur not in agregat:
+                continue
+            valeur = agregat[grandeur]["moyenne"]
+            if self.actives[grandeur]:
+                # Levée seulement une fois revenu à l'intérieur des limites avec la marge
+                changement = not self._hors_limites(grandeur, valeur, self.hysteresis.get(grandeur, 0.0))
+            else:
+                changement = self._hors_limites(grandeur, valeur)
+            self.compteurs[grandeur] = self.compteurs[grandeur] + 1 if changement else 0
+            if self.compteurs[grandeur] >= self.debounce:
+                self.actives[grandeur] = not self.actives[grandeur]
+                self.compteurs[grandeur] = 0
+                if self.actives[grandeur]:
+                    print("Alerte", grandeur)
+                    nouvelles.append(grandeur)
+        return sum(self.actives.values()), nouvelles
+
+
+# Thread d'échantillonnage du capteur
+# lecture() renvoie (temperature, pression, humidite), par défaut un BME280 en mode normal
+# traiter(agregat) (optionnel) reçoit chaque agrégat, renvoie le nombre d'alertes actives
+# duty (optionnel, voir duty.py) : période de lecture selon l'état veille / actif, reçoit les agrégats
+class SensorSampler(threading.Thread):
+    def __init__(self, lecture=None, traiter=None, periode=SAMPLE_PERIOD, taille=RING_SIZE,
+                 periode_agregat=AGGREGATE_PERIOD, duty=None):
+        super().__init__(name="pabo-capteur", daemon=True)
+        self.lecture = lecture
+        self.traiter = traiter
+        self.periode = periode
+        self.periode_agregat = periode_agregat
+        self.duty = duty
+        self.ring = SensorRing(taille)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.erreurs = 0
+        self.agregat = None
+        self.agregat_sequence = 0
+
+    def run(self):
+        prochaine = time.monotonic()
+        prochain_agregat = prochaine + self.periode_agregat
+        while not self.stop_event.wait(max(0.0, prochaine - time.monotonic())):
+            # Capteur absent ou muet au démarrage : nouvelle tentative après SENSOR_RETRY_DELAY
+            if self.lecture is None and not self._ouvrir_capteur():
+                prochaine = time.monotonic() + SENSOR_RETRY_DELAY
+                continue
+            prochaine += self.duty.periode("capteur") if self.duty is not None else self.periode
+            maintenant = time.monotonic()
+            try:
+                with metrics.chrono("pabo_capteur_lecture_seconds"):
+                    mesure = self.lecture()
+                self.ring.put(maintenant, *mesure)
+            except OSError as erreur:
+                # Lecture I2C ratée : la mesure est perdue, la fenêtre continue
+                self.erreurs += 1
+                metrics.incrementer("pabo_erreurs_capteur_total")
+                print("Erreur lecture capteur :", erreur)
+            if maintenant >= prochain_agregat:
+                prochain_agregat += self.periode_agregat
+                self.agreger(maintenant)
+
+    # Crée le BME280 par défaut, renvoie False si le capteur ne répond pas (erreur comptée)
+    def _ouvrir_capteur(self):
+        try:
+            # Import dans le thread : le module reste importable sans bus I2C (smbus est importé par le BME280)
+            import bme280
+            self.lecture = bme280.BME280(mode="normal", standby_ms=SENSOR_STANDBY_MS).read
+        except ImportError as erreur:
+            # Module absent : aucune nouvelle tentative n'y changera rien, le thread s'arrête
+            metrics.incrementer("pabo_erreurs_capteur_total")
+            print("Capteur indisponible, échantillonnage arrêté :", erreur)
+            self.stop()
+            return False
+        except OSError as erreur:
+            self.erreurs += 1
+            metrics.incrementer("pabo_erreurs_capteur_total")
+            print("Erreur ouverture capteur :", erreur)
+            return False
+        return True
+
+    # Calcule l'agrégat de la derniere période, le transmet à traiter() et le publie pour l'IHM
+    def agreger(self, maintenant=None):
+        agregat = statistiques(self.ring.fenetre(self.periode_agregat, maintenant))
+        if not agregat["echantillons"]:
+            return None
+        agregat["date"] = datetime.now()
+        agregat["alertes"] = self.traiter(agregat) if self.traiter is not None else 0
+        if self.duty is not None:
+            self.duty.environnement(agregat)
+        with self.lock:
+            self.agregat = agregat
+            self.agregat_sequence += 1
+        return agregat
+
+    # Renvoie le dernier agrégat s'il est plus récent que derniere_sequence
+    def get_agregat(self, derniere_sequence=0):
+        with self.lock:
+            if self.agregat_sequence > derniere_sequence:
+                return self.agregat_sequence, self.agregat
+            return None
+
+    def stop(self):
+        self.stop_event.set()
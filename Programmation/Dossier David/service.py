@@ -0,0 +1,273 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : service.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Service de surveillance sans écran (démon systemd)
+#
+# DetectionService réunit toute la chaine sans Tk : sources de capture,
+# tampons, detection (thread ou processus), suivi, base de données,
+# capteur environnemental, camera thermique, envoi des alertes, cadence
+# adaptative, preuves des alertes (evidence.py) et mesures. En mode service les detections ne sont pas
+# dessinées (ni traces ni conversion d'image), les resultats sont
+# publiés par stream.ResultStream : l'IHM (DetectApp.py --client) s'y
+# connecte quand quelqu'un veut regarder. DetectApp.py sans --client
+# exécute le même service dans son processus, avec dessin.
+#
+# Le service s'arrête proprement sur SIGTERM / SIGINT et prévient
+# systemd (Type=notify, voir pabo.service) quand il est prêt.
+#
+# Utilisation : python3 service.py [--video fichier] [--duree 60] [--rapport service.json]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import contextlib
+import json
+import os
+import resource
+import signal
+import socket
+import threading
+import time
+
+from alerts import AlertDispatcher, creer_sink
+from backends import INFERENCE_WORKERS, ProcessPoolBackend
+from duty import DutyCycleController
+from evidence import EvidenceStore
+from inference import InferenceEngine
+from metrics import METRICS_PORT, MetricsServer, memoire_rss
+from motion import MotionGate
+from pipeline import CaptureThread, FrameRing, InferenceWorker, PipelineStats
+from sensors import SensorSampler
+from sources import SCHEDULER_MODE, SourceScheduler, creer_source
+from storage import DetectionStorage
+from stream import STREAM_PORT, ResultStream
+from surveillance import Surveillance
+from thermal import ThermalMonitor
+from tracking import TrackedDetector
+
+frame_width = 640
+frame_height = 480
+# Nombre de frames conservées dans le tampon circulaire de capture
+FRAME_RING_SIZE = 4
+# Cameras de l'habitacle : nom -> (type de source, options), voir sources.py
+# Exemple monospace avec deux rangées : {"avant": ("picamera", {"framerate": 10}), "arriere": ("v4l2", {"device": 0})}
+CAPTURE_SOURCES = {"camera": ("picamera", {"framerate": 10})}
+# Poids de chaque camera pour l'ordonnanceur en mode "priorite" (sources.SCHEDULER_MODE)
+SOURCE_PRIORITIES = {}
+# Cadence adaptative veille / actif (duty.py)
+DUTY_CYCLING = True
+# Camera thermique MLX90640 présente (presence sous une couverture ou dans le noir)
+THERMAL_CAMERA = False
+# Capteur environnemental BME280 présent
+ENVIRONMENT_SENSOR = True
+# Frames et mesures autour de chaque alerte gardées sur disque (evidence.py)
+EVIDENCE_STORE = True
+# Destinations des alertes : nom -> (type, options), voir alerts.py ({} : alertes seulement enregistrées)
+# Exemple : {"webhook": ("webhook", {"url": "http://192.168.1.10:8080/alerte"}), "sms": ("sms", {"destinataire": "+33600000000"})}
+ALERT_SINKS = {}
+
+
+# Prévient systemd (Type=notify) : "READY=1", "STOPPING=1" ... Sans effet hors systemd
+def notifier_systemd(etat):
+    adresse = os.environ.get("NOTIFY_SOCKET")
+    if not adresse:
+        return
+    if adresse.startswith("@"):
+        adresse = "\0" + adresse[1:]
+    with contextlib.closing(socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)) as connexion:
+        connexion.sendto(etat.encode(), adresse)
+
+
+# Mémoire du processus (Mo) : résidente actuelle et pic depuis le démarrage
+def memoire():
+    rss = memoire_rss()
+    return {"rss_mo": round(rss / 2 ** 20, 1) if rss is not None else None,
+            "rss_max_mo": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)}
+
+
+class DetectionService:
+    # sources : {nom : (type, options)}, CAPTURE_SOURCES par défaut
+    # engine : moteur d'inference fourni (essais), sinon les modèles du registre, chargés au démarrage
+    # dessiner : dessine les detections sur les frames (IHM dans le même processus)
+    def __init__(self, sources=None, engine=None, dessiner=False, capteur=ENVIRONMENT_SENSOR,
+                 thermique=THERMAL_CAMERA, metrics_port=METRICS_PORT, stream_port=STREAM_PORT):
+        self.config_sources = sources or CAPTURE_SOURCES
+        self.echauffement = engine is None and INFERENCE_WORKERS == 0
+        # Connexion unique à la base de données, partagée par la capture et le capteur
+        self.storage = DetectionStorage()
+        # Moteur d'inference (visage, age, chat / chien), mode configuré par inference.INFERENCE_MODE
+        self.engine = engine or InferenceEngine()
+        # Les reseaux ne tournent que toutes les N frames, les pistes sont suivies entre deux
+        self.detector = TrackedDetector(self.engine, dessiner=dessiner)
+        # Envoi des alertes dans ses propres threads, la file d'envoi est dans la base (None : pas de destination)
+        self.dispatcher = AlertDispatcher(self.storage, [creer_sink(nom, type_sink, **options)
+                                                         for nom, (type_sink, options) in ALERT_SINKS.items()]) if ALERT_SINKS else None
+        # Images et mesures autour des alertes, écrites par leur propre thread (None : pas de preuve)
+        self.preuves = EvidenceStore() if EVIDENCE_STORE else None
+        # Logique de detection, de sécurité et d'enregistrement
+        self.surveillance = Surveillance(self.storage, self.detector, dispatcher=self.dispatcher, preuves=self.preuves)
+        # Cadence réduite quand l'habitacle est vide, maximum dès qu'il est occupé (None : cadence fixe)
+        self.duty = DutyCycleController() if DUTY_CYCLING else None
+        self.capteur = capteur
+        self.thermique = ThermalMonitor() if thermique else None
+        self.surveillance.thermique = self.thermique
+        self.metrics_port = metrics_port
+        self.stream_port = stream_port
+        self.metrics_server = None
+        self.stream = None
+        self.sampler = None
+        self.backend = None
+        self.debut = None
+
+    # Construit et démarre la chaine : capture, detection, capteur, camera thermique, mesures, flux
+    def start(self):
+        # Charge les reseaux et fait une inference à vide avant la premiere frame
+        if self.echauffement:
+            self.engine.warmup()
+
+        self.pipeline_stats = PipelineStats()
+        # Les tampons des cameras partagent une condition : le thread d'inference attend n'importe laquelle
+        condition = threading.Condition()
+        self.sources = {}
+        self.frame_rings = {}
+        self.capture_threads = []
+        for nom, (type_source, options) in self.config_sources.items():
+            source = creer_source(nom, type_source, resolution=(frame_width, frame_height), **options)
+            self.sources[nom] = source
+            self.frame_rings[nom] = FrameRing(FRAME_RING_SIZE, source.shape, condition)
+            preuves = self.preuves.ajouter_camera(nom, source.shape) if self.preuves is not None else None
+            self.capture_threads.append(CaptureThread(source, self.frame_rings[nom], self.pipeline_stats, self.duty, preuves))
+        self.scheduler = SourceScheduler(self.frame_rings, SCHEDULER_MODE, SOURCE_PRIORITIES)
+        # Le filtre de changement saute l'inference tant que l'habitacle est immobile (un par camera)
+        self.motion_gates = {nom: MotionGate() for nom in self.sources}
+        # Reseaux repartis sur plusieurs processus si INFERENCE_WORKERS > 0
+        if INFERENCE_WORKERS > 0:
+            self.backend = ProcessPoolBackend(INFERENCE_WORKERS, (frame_height, frame_width, 3))
+        self.inference_worker = InferenceWorker(self.scheduler, self.surveillance.detection_all, self.pipeline_stats,
+                                                self.motion_gates, self.backend, duty=self.duty)
+
+        if self.capteur:
+            # Les agrégats sont enregistrés par le thread du capteur
+            self.sampler = SensorSampler(traiter=self.surveillance.data_environnement_agregat, duty=self.duty)
+            if self.preuves is not None:
+                self.preuves.capteur = self.sampler.ring
+            self.sampler.start()
+        if self.preuves is not None:
+            self.preuves.start()
+        if self.thermique is not None:
+            # Les corps chauds sont fusionnés avec les detections visuelles
+            self.thermique.start()
+        if self.metrics_port is not None:
+            try:
+                self.metrics_server = MetricsServer(self.metrics_port)
+            except OSError as erreur:
+                print("Serveur de mesures indisponible :", erreur)
+        if self.stream_port is not None:
+            self.stream = ResultStream(self, port=self.stream_port)
+            self.stream.start()
+
+        self.debut = time.monotonic()
+        for capture_thread in self.capture_threads:
+            capture_thread.start()
+        self.inference_worker.start()
+
+    def noms_sources(self):
+        return list(self.sources)
+
+    # Dernier resultat de detection d'une camera (frame, visages, objets, resumé) plus récent que derniere_sequence
+    def get_result(self, derniere_sequence=0, source=None):
+        return self.inference_worker.get_result(derniere_sequence, source)
+
+    # Dernier agrégat du capteur plus récent que derniere_sequence (None sans capteur)
+    def get_agregat(self, derniere_sequence=0):
+        return self.sampler.get_agregat(derniere_sequence) if self.sampler is not None else None
+
+    # Performances : débit, frames, mémoire, cadence, envois, preuves, flux
+    def rapport(self):
+        rapport = {"pipeline": self.pipeline_stats.rapport(), "frames_par_camera": self.scheduler.rapport(),
+                   "memoire": memoire(), "cpu_s": round(time.process_time(), 1)}
+        if self.duty is not None:
+            rapport["cadence"] = self.duty.rapport()
+        if self.dispatcher is not None:
+            rapport["envois"] = self.dispatcher.rapport()
+        if self.preuves is not None:
+            rapport["preuves"] = self.preuves.rapport()
+        if self.stream is not None:
+            rapport["flux"] = self.stream.rapport()
+        return rapport
+
+    # Arrête tous les threads, ferme les sources et la base, renvoie le rapport final
+    def stop(self):
+        for capture_thread in self.capture_threads:
+            capture_thread.stop()
+        self.inference_worker.stop()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.thermique is not None:
+            self.thermique.stop()
+        if self.stream is not None:
+            self.stream.stop()
+        self.inference_worker.join(timeout=2)
+        for capture_thread in self.capture_threads:
+            capture_thread.join(timeout=2)
+        if self.sampler is not None:
+            self.sampler.join(timeout=2)
+        if self.backend is not None:
+            self.backend.close()
+        if self.preuves is not None:
+            # Les preuves déjà demandées sont écrites avant la fermeture
+            self.preuves.stop()
+            self.preuves.join(timeout=10)
+        rapport = self.rapport()
+        for source in self.sources.values():
+            source.close()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.storage.close()
+        return rapport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service de surveillance PABO sans écran")
+    parser.add_argument("--video", help="fichier vidéo ou dossier d'images rejoué en boucle à la place des cameras")
+    parser.add_argument("--duree", type=float, default=None, help="arrêt après cette durée (s), pour les mesures")
+    parser.add_argument("--rapport", default=None, help="enregistre le rapport final en JSON")
+    parser.add_argument("--sans-capteur", action="store_true", help="pas de BME280")
+    parser.add_argument("--synthetique", action="store_true", help="reseaux de remplacement (sans les poids des modèles)")
+    parser.add_argument("--port-flux", type=int, default=STREAM_PORT, help="port du flux des resultats")
+    parser.add_argument("--silencieux", action="store_true", help="masque les traces de detection")
+    args = parser.parse_args()
+
+    sources = {"video": ("fichier", {"chemin": args.video, "boucle": True})} if args.video else None
+    engine = None
+    if args.synthetique:
+        from benchmark import reseaux_de_remplacement
+        engine = InferenceEngine(**reseaux_de_remplacement())
+    service = DetectionService(sources, engine, capteur=ENVIRONMENT_SENSOR and not args.sans_capteur,
+                               stream_port=args.port_flux)
+
+    arret = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: arret.set())
+    signal.signal(signal.SIGINT, lambda *_: arret.set())
+    with open(os.devnull, "w") as nul, (contextlib.redirect_stdout(nul) if args.silencieux else contextlib.nullcontext()):
+        service.start()
+        notifier_systemd("READY=1")
+        print("== Service PABO démarré ==", service.noms_sources())
+        arret.wait(args.duree)
+        notifier_systemd("STOPPING=1")
+        rapport = service.stop()
+    rapport["mode"] = "service"
+    print("== Rapport du service ==", rapport)
+    if args.rapport:
+        with open(args.rapport, "w") as fichier:
+            json.dump(rapport, fichier, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : sources.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Sources de capture et ordonnanceur multi-camera
+#
+# Une source fournit des frames BGR par frames() : camera Raspberry Pi
+# (PiCameraSource), camera USB / V4L2 (VideoCaptureSource) ou fichier
+# vidéo / dossier d'images (FileSource). Chaque source a son propre
+# thread de capture (pipeline.CaptureThread) et son tampon circulaire.
+# Le SourceScheduler choisit la prochaine frame à analyser parmi les
+# sources, à tour de rôle ou selon une priorité, pour partager un seul
+# moteur d'inference (ou un pool de processus) entre les cameras.
+#***********************************************************
+
+# --- Import ---
+import glob
+import itertools
+import os
+import time
+
+import cv2
+
+# Cadence des images d'un dossier (images par seconde)
+FILE_FPS = 10.0
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+# "round_robin" : chaque source à tour de rôle, "priorite" : la source la plus prioritaire en attente depuis le plus longtemps
+SCHEDULER_MODE = "round_robin"
+
+
+# Renvoie les frames (instant en secondes depuis le début, frame) d'une vidéo ou d'un dossier d'images
+def lire_fichier(source, fps=FILE_FPS):
+    if os.path.isdir(source):
+        images = sorted(chemin for chemin in glob.glob(os.path.join(source, "*"))
+                        if chemin.lower().endswith(IMAGE_EXTENSIONS))
+        for index, chemin in enumerate(images):
+            frame = cv2.imread(chemin)
+            if frame is not None:
+                yield index / fps, frame
+        return
+
+    video = cv2.VideoCapture(source)
+    if not video.isOpened():
+        raise IOError("Impossible d'ouvrir la vidéo {}".format(source))
+    index = 0
+    try:
+        while True:
+            ok, frame = video.read()
+            if not ok:
+                break
+            instant = video.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 or index / fps
+            yield instant, frame
+            index += 1
+    finally:
+        video.release()
+
+
+# Camera Raspberry Pi (picamera)
+class PiCameraSource:
+    def __init__(self, nom="camera", resolution=(640, 480), framerate=10):
+        self.nom = nom
+        self.resolution = resolution
+        self.framerate = framerate
+        self.shape = (resolution[1], resolution[0], 3)
+        self.camera = None
+
+    def frames(self):
+        # Import de la camera seulement au démarrage de la capture (module importable sans Raspberry Pi)
+        from picamera import PiCamera
+        from picamera.array import PiRGBArray
+
+        self.camera = PiCamera()
+        self.camera.resolution = self.resolution
+        self.camera.framerate = self.framerate
+        raw_capture = PiRGBArray(self.camera, size=self.resolution)
+        time.sleep(0.2)
+        for capture in self.camera.capture_continuous(raw_capture, format="bgr", use_video_port=True):
+            yield capture.array
+            # Réinitialiser le tampon de la camera
+            raw_capture.truncate(0)
+
+    def close(self):
+        if self.camera is not None:
+            self.camera.close()
+
+
+# Camera USB / V4L2 (device : index ou chemin /dev/videoN)
+class VideoCaptureSource:
+    def __init__(self, nom="usb", device=0, resolution=(640, 480), framerate=10):
+        self.nom = nom
+        self.device = device
+        self.resolution = resolution
+        self.framerate = framerate
+        self.shape = (resolution[1], resolution[0], 3)
+        self.video = None
+
+    def frames(self):
+        self.video = cv2.VideoCapture(self.device, cv2.CAP_V4L2) if os.name == "posix" else cv2.VideoCapture(self.device)
+        if not self.video.isOpened():
+            raise IOError("Impossible d'ouvrir la camera {}".format(self.device))
+        self.video.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+        self.video.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        self.video.set(cv2.CAP_PROP_FPS, self.framerate)
+        # Une seule frame en attente dans le driver : toujours la plus récente
+        self.video.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        while True:
+            ok, frame = self.video.read()
+            if not ok:
+                # Camera débranchée ou driver en erreur : CaptureThread relance la source
+                raise IOError("Lecture impossible sur la camera {}".format(self.device))
+            if frame.shape != self.shape:
+                frame = cv2.resize(frame, self.resolution)
+            yield frame
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+
+
+# Fichier vidéo ou dossier d'images, rejoué au rythme de l'enregistrement (et en boucle si demandé)
+class FileSource:
+    def __init__(self, nom="fichier", chemin=None, fps=FILE_FPS, boucle=False, resolution=(640, 480)):
+        self.nom = nom
+        self.chemin = chemin
+        self.fps = fps
+        self.boucle = boucle
+        self.resolution = resolution
+        self.shape = (resolution[1], resolution[0], 3)
+
+    def frames(self):
+        while True:
+            depart = time.monotonic()
+            for instant, frame in lire_fichier(self.chemin, self.fps):
+                attente = instant - (time.monotonic() - depart)
+                if attente > 0:
+                    time.sleep(attente)
+                if frame.shape != self.shape:
+                    frame = cv2.resize(frame, self.resolution)
+                yield frame
+            if not self.boucle:
+                break
+
+    def close(self):
+        pass
+
+
+SOURCE_TYPES = {"picamera": PiCameraSource, "v4l2": VideoCaptureSource, "fichier": FileSource}
+
+
+# Crée une source à partir de son type ("picamera", "v4l2", "fichier") et de ses options
+def creer_source(nom, type_source, **options):
+    return SOURCE_TYPES[type_source](nom=nom, **options)
+
+
+# Choisit la prochaine frame à analyser parmi les tampons des sources
+# rings : {nom : FrameRing}, les tampons doivent partager la même condition (voir FrameRing)
+# priorites : {nom : poids} pour le mode "priorite" (1.0 par défaut)
+class SourceScheduler:
+    def __init__(self, rings, mode=SCHEDULER_MODE, priorites=None):
+        if mode not in ("round_robin", "priorite"):
+            raise ValueError("Mode d'ordonnancement inconnu : {}".format(mode))
+        conditions = {id(ring.condition) for ring in rings.values()}
+        if len(conditions) != 1:
+            raise ValueError("Les tampons des sources doivent partager la même condition")
+        self.rings = rings
+        self.mode = mode
+        self.priorites = priorites or {}
+        self.noms = list(rings)
+        self.condition = next(iter(rings.values())).condition
+        self.dernieres_sequences = {nom: 0 for nom in rings}
+        self.derniers_services = {nom: time.monotonic() for nom in rings}
+        self.tour = itertools.cycle(self.noms)
+        self.servies = {nom: 0 for nom in rings}
+
+    def _en_attente(self):
+        return [nom for nom in self.noms if self.rings[nom].sequence > self.dernieres_sequences[nom]]
+
+    def _choisir(self, en_attente):
+        if self.mode == "priorite":
+            maintenant = time.monotonic()
+            # La priorité augmente avec l'attente : une source peu prioritaire n'est jamais affamée
+            return max(en_attente, key=lambda nom: self.priorites.get(nom, 1.0) * (maintenant - self.derniers_services[nom]))
+        for _ in range(len(self.noms)):
+            nom = next(self.tour)
+            if nom in en_attente:
+                return nom
+
+    # Attend une nouvelle frame sur l'une des sources
+    # Renvoie (nom, sequence, copie de la frame, instant de capture, frames abandonnées) ou None
+    def prochaine(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(self._en_attente, timeout):
+                return None
+            nom = self._choisir(self._en_attente())
+            ring = self.rings[nom]
+            sequence, frame, t_capture = ring.sequence, ring.slots[ring.index].copy(), ring.timestamps[ring.index]
+        derniere = self.dernieres_sequences[nom]
+        # Les frames arrivées depuis la derniere analyse de cette source sont abandonnées
+        abandonnees = sequence - derniere - 1 if derniere else 0
+        self.dernieres_sequences[nom] = sequence
+        self.derniers_services[nom] = time.monotonic()
+        self.servies[nom] += 1
+        return nom, sequence, frame, t_capture, abandonnees
+
+    # Nombre de frames analysées par source
+    def rapport(self):
+        return dict(self.servies)
@@ -0,0 +1,390 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : storage.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Couche de stockage SQLite du projet PABO
+#
+# Une seule connexion ouverte au démarrage (mode WAL), le schéma
+# est créé une fois. Les lignes de detection et d'environnement
+# sont mises en file et écrites par lots dans une seule transaction
+# (seuil de taille ou de temps) pour limiter les fsync sur la carte SD.
+# Une alerte force l'écriture immédiate de la file.
+#
+# Historique : les colonnes date sont indexées et chaque écriture met à
+# jour, dans la même transaction, une table de cumuls par minute et par
+# heure (moyennes, min / max, nombre de detections et d'alertes). Les
+# lignes brutes plus anciennes que la durée de rétention sont supprimées
+# périodiquement, les cumuls horaires sont conservés. historique() et
+# resume() répondent aux requêtes "dernières 24 h" à partir des cumuls.
+#
+# Envois d'alerte (voir alerts.py) : la table envoi sert de file d'envoi
+# persistante. Ses lignes (une par destination) sont écrites dans la même
+# transaction que la ligne alerte, une alerte enregistrée n'est donc
+# jamais perdue même si le programme s'arrête avant son envoi.
+#
+# Utilisation : python3 storage.py [--heures 24] [--granularite heure] [--csv export.csv]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import csv
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from metrics import metrics
+
+DB_PATH = "detection_data.sqlite"
+
+# Nombre de lignes en attente qui déclenche une écriture
+BATCH_SIZE = 50
+# Délai maximum (s) avant qu'une ligne en attente soit écrite
+FLUSH_INTERVAL = 5.0
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS detection(id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, number_things_detected INTEGER, personne_detected INTEGER, baby_animal_detected INTEGER)",
+    "CREATE TABLE IF NOT EXISTS environnement(id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, temperature REAL, pression REAL, humidite REAL)",
+    "CREATE TABLE IF NOT EXISTS alerte (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, alerte INTEGER)",
+    "CREATE INDEX IF NOT EXISTS detection_date ON detection(date)",
+    "CREATE INDEX IF NOT EXISTS environnement_date ON environnement(date)",
+    "CREATE INDEX IF NOT EXISTS alerte_date ON alerte(date)",
+    "CREATE TABLE IF NOT EXISTS rollup(granularite TEXT NOT NULL, debut TEXT NOT NULL,"
+    " mesures INTEGER NOT NULL DEFAULT 0,"
+    " temperature_somme REAL NOT NULL DEFAULT 0, temperature_min REAL, temperature_max REAL,"
+    " pression_somme REAL NOT NULL DEFAULT 0, pression_min REAL, pression_max REAL,"
+    " humidite_somme REAL NOT NULL DEFAULT 0, humidite_min REAL, humidite_max REAL,"
+    " detections INTEGER NOT NULL DEFAULT 0, personnes_max INTEGER, vulnerables_max INTEGER,"
+    " detections_vulnerables INTEGER NOT NULL DEFAULT 0, alertes INTEGER NOT NULL DEFAULT 0,"
+    " PRIMARY KEY (granularite, debut)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS envoi(id INTEGER PRIMARY KEY AUTOINCREMENT, alerte_id INTEGER NOT NULL REFERENCES alerte(id),"
+    " date TEXT, destination TEXT NOT NULL, categorie TEXT, details TEXT, statut TEXT NOT NULL DEFAULT 'en_attente',"
+    " tentatives INTEGER NOT NULL DEFAULT 0, prochain_essai REAL NOT NULL, t_detection REAL,"
+    " envoye_le REAL, latence_ms REAL, erreur TEXT)",
+    "CREATE INDEX IF NOT EXISTS envoi_attente ON envoi(destination, statut, prochain_essai)",
+]
+
+INSERT = {
+    "detection": "INSERT INTO detection (date, number_things_detected, personne_detected, baby_animal_detected) VALUES (?, ?, ?, ?)",
+    "environnement": "INSERT INTO environnement (date, temperature, pression, humidite) VALUES (?, ?, ?, ?)",
+}
+
+
+# Granularité des cumuls : longueur du préfixe de date ("2026-10-18 07:42" / "2026-10-18 07")
+GRANULARITES = {"minute": 16, "heure": 13}
+
+# Colonnes de cumul : comment deux cumuls se combinent
+FUSION = {
+    "mesures": "somme",
+    "temperature_somme": "somme", "temperature_min": "min", "temperature_max": "max",
+    "pression_somme": "somme", "pression_min": "min", "pression_max": "max",
+    "humidite_somme": "somme", "humidite_min": "min", "humidite_max": "max",
+    "detections": "somme", "personnes_max": "max", "vulnerables_max": "max",
+    "detections_vulnerables": "somme", "alertes": "somme",
+}
+
+# Contribution de chaque table brute aux colonnes de cumul (agrégats SQL)
+CUMULS = {
+    "environnement": {
+        "mesures": "count(*)",
+        "temperature_somme": "sum(temperature)", "temperature_min": "min(temperature)", "temperature_max": "max(temperature)",
+        "pression_somme": "sum(pression)", "pression_min": "min(pression)", "pression_max": "max(pression)",
+        "humidite_somme": "sum(humidite)", "humidite_min": "min(humidite)", "humidite_max": "max(humidite)",
+    },
+    "detection": {
+        "detections": "count(*)", "personnes_max": "max(personne_detected)", "vulnerables_max": "max(baby_animal_detected)",
+        "detections_vulnerables": "sum(baby_animal_detected > 0)",
+    },
+    "alerte": {"alertes": "count(*)"},
+}
+
+# Durée de conservation (jours) : lignes brutes, cumuls par minute ; les cumuls horaires sont gardés
+RETENTION_DAYS = 7
+ROLLUP_MINUTE_RETENTION_DAYS = 30
+# Intervalle (s) entre deux purges
+RETENTION_INTERVAL = 3600.0
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# Requete qui ajoute aux cumuls les lignes d'une table dont l'id dépasse le paramètre
+def _requete_cumul(table, granularite):
+    colonnes = CUMULS[table]
+    mises_a_jour = []
+    for colonne in colonnes:
+        if FUSION[colonne] == "somme":
+            mises_a_jour.append("{0} = {0} + excluded.{0}".format(colonne))
+        else:
+            comparaison = "<" if FUSION[colonne] == "min" else ">"
+            mises_a_jour.append("{0} = CASE WHEN {0} IS NULL OR excluded.{0} {1} {0} THEN excluded.{0} ELSE {0} END"
+                                .format(colonne, comparaison))
+    return ("INSERT INTO rollup (granularite, debut, {colonnes}) "
+            "SELECT '{granularite}', substr(date, 1, {longueur}), {agregats} FROM {table} WHERE id > ? GROUP BY 2 "
+            "ON CONFLICT (granularite, debut) DO UPDATE SET {mises_a_jour}").format(
+                colonnes=", ".join(colonnes), granularite=granularite, longueur=GRANULARITES[granularite],
+                agregats=", ".join(colonnes.values()), table=table, mises_a_jour=", ".join(mises_a_jour))
+
+
+ROLLUP = {table: [_requete_cumul(table, granularite) for granularite in GRANULARITES] for table in CUMULS}
+
+
+class DetectionStorage:
+    def __init__(self, chemin=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 retention_days=RETENTION_DAYS, retention_interval=RETENTION_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.retention_interval = retention_interval
+        self.derniere_purge = time.monotonic()
+        self.lock = threading.Lock()
+        self.en_attente = {table: [] for table in INSERT}
+        self.nombre_en_attente = 0
+        self.dernier_flush = time.monotonic()
+
+        # Connexion unique partagée par les threads de capture et de capteur (protégée par self.lock)
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        with self.connexion:
+            for requete in SCHEMA:
+                self.connexion.execute(requete)
+            # Base créée avant les cumuls : ils sont calculés une fois à partir des lignes brutes
+            if self.connexion.execute("SELECT count(*) FROM rollup").fetchone()[0] == 0:
+                for table in CUMULS:
+                    self._cumuler(table, 0)
+            # Envois interrompus par un arrêt du programme : ils seront repris
+            self.connexion.execute("UPDATE envoi SET statut = 'en_attente' WHERE statut = 'en_cours'")
+
+        # Thread d'écriture périodique pour le seuil de temps
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._flush_periodique, name="pabo-storage", daemon=True)
+        self.thread.start()
+
+    # Met une ligne en file, écrit le lot si le seuil de taille est atteint
+    def _ajouter(self, table, valeurs):
+        with self.lock:
+            self.en_attente[table].append(valeurs)
+            self.nombre_en_attente += 1
+            if self.nombre_en_attente >= self.batch_size:
+                self._flush_locked()
+
+    def add_detection(self, date, number_things_detected, personne_detected, baby_animal_detected):
+        self._ajouter("detection", (date, number_things_detected, personne_detected, baby_animal_detected))
+
+    def add_environnement(self, date, temperature, pression, humidite):
+        self._ajouter("environnement", (date, temperature, pression, humidite))
+
+    # Une alerte n'attend jamais : la file et l'alerte sont écrites dans la même transaction
+    # envois : liste de (destination, categorie, details JSON, t_detection) mis en file d'envoi avec l'alerte
+    # Renvoie l'id de la ligne alerte
+    def add_alerte(self, date, alerte, envois=()):
+        with self.lock:
+            with metrics.chrono("pabo_db_ecriture_seconds", operation="alerte"), self.connexion:
+                self._ecrire_file()
+                curseur = self.connexion.execute("INSERT INTO alerte (date, alerte) VALUES (?, ?)", (date, alerte))
+                alerte_id = curseur.lastrowid
+                self._cumuler("alerte", alerte_id - 1)
+                maintenant = time.time()
+                self.connexion.executemany(
+                    "INSERT INTO envoi (alerte_id, date, destination, categorie, details, prochain_essai, t_detection)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(alerte_id, date, destination, categorie, details, maintenant, t_detection)
+                     for (destination, categorie, details, t_detection) in envois])
+            self.dernier_flush = time.monotonic()
+            return alerte_id
+
+    # Réserve le plus ancien envoi dû d'une destination (statut "en_cours"), renvoie un dictionnaire ou None
+    def prendre_envoi(self, destination, maintenant=None):
+        maintenant = maintenant or time.time()
+        with self.lock:
+            with self.connexion:
+                curseur = self.connexion.execute(
+                    "SELECT envoi.id, alerte_id, envoi.date, categorie, details, tentatives, t_detection, alerte.alerte"
+                    " FROM envoi LEFT JOIN alerte ON alerte.id = alerte_id"
+                    " WHERE destination = ? AND statut = 'en_attente' AND prochain_essai <= ? ORDER BY envoi.id LIMIT 1",
+                    (destination, maintenant))
+                ligne = curseur.fetchone()
+                if ligne is None:
+                    return None
+                self.connexion.execute("UPDATE envoi SET statut = 'en_cours' WHERE id = ?", (ligne[0],))
+        return dict(zip(["id", "alerte_id", "date", "categorie", "details", "tentatives", "t_detection", "alerte"], ligne))
+
+    # Instant (epoch) du prochain envoi en attente d'une destination, None si la file est vide
+    def prochain_envoi(self, destination):
+        with self.lock:
+            return self.connexion.execute(
+                "SELECT min(prochain_essai) FROM envoi WHERE destination = ? AND statut = 'en_attente'",
+                (destination,)).fetchone()[0]
+
+    # Résultat d'un envoi : "envoyee" (avec la latence), "en_attente" (nouvel essai à prochain_essai) ou "echec"
+    def terminer_envoi(self, envoi_id, statut, tentatives, prochain_essai=None, envoye_le=None, latence_ms=None, erreur=None):
+        with self.lock:
+            with self.connexion:
+                self.connexion.execute(
+                    "UPDATE envoi SET statut = ?, tentatives = ?, prochain_essai = coalesce(?, prochain_essai),"
+                    " envoye_le = ?, latence_ms = ?, erreur = ? WHERE id = ?",
+                    (statut, tentatives, prochain_essai, envoye_le, latence_ms, erreur, envoi_id))
+
+    # Nombre d'envois par destination et statut, latences (ms) des envois réussis
+    def statistiques_envois(self):
+        with self.lock:
+            comptes = self.connexion.execute(
+                "SELECT destination, statut, count(*) FROM envoi GROUP BY destination, statut").fetchall()
+            latences = self.connexion.execute(
+                "SELECT destination, latence_ms FROM envoi WHERE statut = 'envoyee' AND latence_ms IS NOT NULL").fetchall()
+        resultat = {}
+        for destination, statut, nombre in comptes:
+            resultat.setdefault(destination, {"latences_ms": []})[statut] = nombre
+        for destination, latence in latences:
+            resultat[destination]["latences_ms"].append(latence)
+        return resultat
+
+    # Ecrit toutes les lignes en attente dans une seule transaction
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self.nombre_en_attente:
+            with metrics.chrono("pabo_db_ecriture_seconds", operation="lot"), self.connexion:
+                self._ecrire_file()
+        self.dernier_flush = time.monotonic()
+
+    def _ecrire_file(self):
+        for table, lignes in self.en_attente.items():
+            if lignes:
+                dernier_id = self.connexion.execute("SELECT coalesce(max(id), 0) FROM {}".format(table)).fetchone()[0]
+                self.connexion.executemany(INSERT[table], lignes)
+                self._cumuler(table, dernier_id)
+                metrics.incrementer("pabo_lignes_base_total", len(lignes), table=table)
+                lignes.clear()
+        self.nombre_en_attente = 0
+
+    # Ajoute aux cumuls minute et heure les lignes de table écrites après dernier_id
+    def _cumuler(self, table, dernier_id):
+        for requete in ROLLUP[table]:
+            self.connexion.execute(requete, (dernier_id,))
+
+    def _flush_periodique(self):
+        while not self.stop_event.wait(self.flush_interval / 2):
+            if time.monotonic() - self.dernier_flush >= self.flush_interval:
+                self.flush()
+            if self.retention_days is not None and time.monotonic() - self.derniere_purge >= self.retention_interval:
+                self.purger()
+
+    # Supprime les lignes brutes et les cumuls par minute trop anciens, renvoie le nombre de lignes supprimées par table
+    def purger(self, maintenant=None):
+        maintenant = maintenant or datetime.now()
+        limite = (maintenant - timedelta(days=self.retention_days)).strftime(DATE_FORMAT)
+        limite_minute = (maintenant - timedelta(days=ROLLUP_MINUTE_RETENTION_DAYS)).strftime(DATE_FORMAT)
+        supprimees = {}
+        with self.lock:
+            self._flush_locked()
+            with self.connexion:
+                # Les envois d'abord : ils référencent les lignes alerte
+                supprimees["envoi"] = self.connexion.execute(
+                    "DELETE FROM envoi WHERE date < ? AND statut IN ('envoyee', 'echec')", (limite,)).rowcount
+                for table in CUMULS:
+                    supprimees[table] = self.connexion.execute(
+                        "DELETE FROM {} WHERE date < ?".format(table), (limite,)).rowcount
+                supprimees["rollup"] = self.connexion.execute(
+                    "DELETE FROM rollup WHERE granularite = 'minute' AND debut < ?",
+                    (limite_minute[:GRANULARITES["minute"]],)).rowcount
+            self.derniere_purge = time.monotonic()
+        return supprimees
+
+    # Cumuls (minute ou heure) de la période [maintenant - duree, maintenant], du plus ancien au plus récent
+    # Chaque element contient debut, les moyennes / min / max des mesures, les detections et les alertes
+    def historique(self, duree=timedelta(hours=24), granularite="heure", maintenant=None):
+        longueur = GRANULARITES[granularite]
+        maintenant = maintenant or datetime.now()
+        debut = (maintenant - duree).strftime(DATE_FORMAT)[:longueur]
+        fin = maintenant.strftime(DATE_FORMAT)[:longueur]
+        with self.lock:
+            self._flush_locked()
+            curseur = self.connexion.execute(
+                "SELECT * FROM rollup WHERE granularite = ? AND debut BETWEEN ? AND ? ORDER BY debut",
+                (granularite, debut, fin))
+            noms = [description[0] for description in curseur.description]
+            lignes = [dict(zip(noms, ligne)) for ligne in curseur.fetchall()]
+        return [_moyennes(ligne) for ligne in lignes]
+
+    # Un seul cumul pour toute la période (par exemple les dernières 24 h)
+    def resume(self, duree=timedelta(hours=24), granularite="heure", maintenant=None):
+        total = {"debut": None, "granularite": granularite}
+        for ligne in self.historique(duree, granularite, maintenant):
+            total["debut"] = total["debut"] or ligne["debut"]
+            for colonne, fusion in FUSION.items():
+                valeur = ligne[colonne]
+                if fusion == "somme":
+                    total[colonne] = total.get(colonne, 0) + valeur
+                elif valeur is not None:
+                    courant = total.get(colonne)
+                    total[colonne] = valeur if courant is None else (min if fusion == "min" else max)(courant, valeur)
+        for colonne, fusion in FUSION.items():
+            total.setdefault(colonne, 0 if fusion == "somme" else None)
+        return _moyennes(total)
+
+    # Exporte l'historique en CSV, renvoie le nombre de lignes écrites
+    def exporter_csv(self, chemin, duree=timedelta(hours=24), granularite="heure", maintenant=None):
+        lignes = self.historique(duree, granularite, maintenant)
+        with open(chemin, "w", newline="") as fichier:
+            ecrivain = csv.DictWriter(fichier, fieldnames=["debut"] + COLONNES_EXPORT)
+            ecrivain.writeheader()
+            for ligne in lignes:
+                ecrivain.writerow({colonne: ligne[colonne] for colonne in ["debut"] + COLONNES_EXPORT})
+        return len(lignes)
+
+    # Ecrit la file restante et ferme la connexion
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=self.flush_interval)
+        with self.lock:
+            self._flush_locked()
+            self.connexion.close()
+
+
+COLONNES_EXPORT = ["mesures", "temperature_moy", "temperature_min", "temperature_max",
+                   "pression_moy", "pression_min", "pression_max",
+                   "humidite_moy", "humidite_min", "humidite_max",
+                   "detections", "personnes_max", "vulnerables_max", "detections_vulnerables", "alertes"]
+
+
+# Ajoute les moyennes (somme / nombre de mesures) à un cumul
+def _moyennes(ligne):
+    for grandeur in ("temperature", "pression", "humidite"):
+        ligne[grandeur + "_moy"] = (round(ligne[grandeur + "_somme"] / ligne["mesures"], 2)
+                                    if ligne["mesures"] else None)
+    return ligne
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historique de la base PABO à partir des cumuls")
+    parser.add_argument("--base", default=DB_PATH)
+    parser.add_argument("--heures", type=float, default=24.0, help="durée de l'historique")
+    parser.add_argument("--granularite", choices=sorted(GRANULARITES), default="heure")
+    parser.add_argument("--csv", help="exporte l'historique dans ce fichier CSV")
+    args = parser.parse_args()
+
+    # Pas de purge depuis l'outil de consultation
+    storage = DetectionStorage(args.base, retention_days=None)
+    try:
+        debut = time.perf_counter()
+        duree = timedelta(hours=args.heures)
+        if args.csv:
+            print(storage.exporter_csv(args.csv, duree, args.granularite), "lignes exportées dans", args.csv)
+        else:
+            for ligne in storage.historique(duree, args.granularite):
+                print({colonne: ligne[colonne] for colonne in ["debut"] + COLONNES_EXPORT})
+        print("Resume :", {colonne: valeur for colonne, valeur in storage.resume(duree, args.granularite).items()
+                           if not colonne.endswith("_somme")})
+        print("Requete en {:.1f} ms".format(1000.0 * (time.perf_counter() - debut)))
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : stream.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Flux des resultats du service vers les clients (IHM)
+#
+# ResultStream (dans le service) publie sur une socket TCP locale les
+# resultats de detection de chaque camera et les agrégats du capteur.
+# Chaque message est une ligne JSON, suivie des octets d'une image JPEG
+# quand l'en-tête indique "jpeg" (taille). Un client qui le demande à la
+# connexion reçoit aussi les frames : elles ne sont encodées que si un
+# tel client est connecté. Chaque client a son thread d'envoi et ne
+# garde que le dernier message de chaque type : un client lent ne
+# freine jamais la detection, il saute des resultats.
+#
+# ResultClient (dans l'IHM) reçoit ce flux et offre la même interface
+# que le service : get_result(derniere_sequence, source) et
+# get_agregat(derniere_sequence).
+#***********************************************************
+
+# --- Import ---
+import json
+import socket
+import threading
+
+import cv2
+import numpy as np
+
+from inference import resultats
+
+# Adresse et port du flux (127.0.0.1 : IHM sur l'unité, 0.0.0.0 : IHM sur une autre machine du reseau local)
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 8765
+# Période de lecture des nouveaux resultats (s)
+STREAM_PERIOD = 0.05
+# Qualité JPEG des frames envoyées aux clients
+JPEG_QUALITY = 80
+# Délai (s) entre deux tentatives de connexion du client
+RECONNECT_DELAY = 2.0
+
+
+# Resultat structuré (inference.RESULT_DTYPE) -> liste JSON
+def _vers_json(resultat):
+    return [{"label": str(label), "score": float(score), "box": [int(v) for v in box], "confiance": float(confiance)}
+            for (label, score, box, confiance) in resultat]
+
+
+def _depuis_json(lignes):
+    return resultats([(ligne["label"], ligne["score"], ligne["box"], ligne.get("confiance", ligne["score"])) for ligne in lignes])
+
+
+# Envoie un message : en-tête JSON sur une ligne, puis l'image JPEG éventuelle
+def _envoyer(connexion, entete, jpeg=b""):
+    entete = dict(entete, jpeg=len(jpeg))
+    connexion.sendall(json.dumps(entete, default=str).encode() + b"\n" + jpeg)
+
+
+# Client connecté au flux : thread d'envoi, seul le dernier message de chaque clé est gardé
+class _StreamClient:
+    def __init__(self, connexion, adresse, images):
+        self.connexion = connexion
+        self.adresse = adresse
+        self.images = images
+        self.condition = threading.Condition()
+        self.en_attente = {}
+        self.actif = True
+        self.sautes = 0
+        self.thread = threading.Thread(target=self._envoyer, name="pabo-flux-{}".format(adresse[1]), daemon=True)
+        self.thread.start()
+
+    def publier(self, cle, entete, jpeg=b""):
+        with self.condition:
+            if cle in self.en_attente:
+                self.sautes += 1
+            self.en_attente[cle] = (entete, jpeg if self.images else b"")
+            self.condition.notify()
+
+    def _envoyer(self):
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.en_attente or not self.actif)
+                    if not self.actif:
+                        return
+                    messages = list(self.en_attente.values())
+                    self.en_attente.clear()
+                for entete, jpeg in messages:
+                    _envoyer(self.connexion, entete, jpeg)
+        except OSError:
+            pass
+        finally:
+            self.actif = False
+            self.connexion.close()
+
+    def fermer(self):
+        with self.condition:
+            self.actif = False
+            self.condition.notify()
+
+
+# Publie les resultats d'un service (get_result / get_agregat, voir service.DetectionService) aux clients connectés
+class ResultStream(threading.Thread):
+    def __init__(self, service, hote=STREAM_HOST, port=STREAM_PORT, periode=STREAM_PERIOD, qualite=JPEG_QUALITY):
+        super().__init__(name="pabo-flux", daemon=True)
+        self.service = service
+        self.periode = periode
+        self.qualite = qualite
+        self.clients = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.serveur = socket.create_server((hote, port), reuse_port=False)
+        self.port = self.serveur.getsockname()[1]
+        self.thread_accueil = threading.Thread(target=self._accueillir, name="pabo-flux-accueil", daemon=True)
+        self.messages = 0
+        self.images_encodees = 0
+
+    def start(self):
+        self.thread_accueil.start()
+        super().start()
+
+    # Accepte les clients : la premiere ligne du client indique s'il veut les frames ({"images": true})
+    def _accueillir(self):
+        while not self.stop_event.is_set():
+            try:
+                connexion, adresse = self.serveur.accept()
+            except OSError:
+                return
+            try:
+                connexion.settimeout(5.0)
+                with connexion.makefile("rb") as lecteur:
+                    demande = json.loads(lecteur.readline() or b"{}")
+                connexion.settimeout(None)
+                _envoyer(connexion, {"type": "bonjour", "sources": self.service.noms_sources(),
+                                     "thermique": self.service.thermique is not None})
+            except (OSError, ValueError) as erreur:
+                print("Client du flux refusé :", erreur)
+                connexion.close()
+                continue
+            print("== Client du flux connecté ==", adresse)
+            with self.lock:
+                self.clients.append(_StreamClient(connexion, adresse, bool(demande.get("images"))))
+
+    def run(self):
+        sequences = {}
+        sequence_agregat = 0
+        while not self.stop_event.wait(self.periode):
+            with self.lock:
+                self.clients = [client for client in self.clients if client.actif]
+                clients = list(self.clients)
+            if not clients:
+                continue
+            images = any(client.images for client in clients)
+
+            for nom in self.service.noms_sources():
+                nouveau = self.service.get_result(sequences.get(nom, 0), nom)
+                if nouveau is None:
+                    continue
+                sequences[nom], (frame, age_declare, object_detected, resume_detection) = nouveau
+                entete = {"type": "detection", "source": nom, "sequence": sequences[nom],
+                          "visages": _vers_json(age_declare), "objets": _vers_json(object_detected),
+                          "resume": [float(valeur) for valeur in resume_detection]}
+                jpeg = b""
+                if images:
+                    ok, tampon = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.qualite])
+                    jpeg = tampon.tobytes() if ok else b""
+                    self.images_encodees += 1
+                for client in clients:
+                    client.publier(("detection", nom), entete, jpeg)
+                self.messages += 1
+
+            nouveau = self.service.get_agregat(sequence_agregat)
+            if nouveau is not None:
+                sequence_agregat, agregat = nouveau
+                for client in clients:
+                    client.publier(("environnement",), {"type": "environnement", "sequence": sequence_agregat, "agregat": agregat})
+                self.messages += 1
+
+    def rapport(self):
+        with self.lock:
+            return {"clients": len([client for client in self.clients if client.actif]), "messages": self.messages,
+                    "images_encodees": self.images_encodees, "messages_sautes": sum(client.sautes for client in self.clients)}
+
+    def stop(self):
+        self.stop_event.set()
+        self.serveur.close()
+        with self.lock:
+            for client in self.clients:
+                client.fermer()
+
+
+# Client du flux : reçoit les resultats du service, même interface de lecture que le service
+class ResultClient(threading.Thread):
+    def __init__(self, hote=STREAM_HOST, port=STREAM_PORT, images=True):
+        super().__init__(name="pabo-flux-client", daemon=True)
+        self.hote = hote
+        self.port = port
+        self.images = images
+        self.stop_event = threading.Event()
+        self.pret = threading.Event()
+        self.lock = threading.Lock()
+        self.sources = []
+        self.thermique = False
+        self.resultats = {}
+        self.resultats_sequences = {}
+        self.agregat = None
+        self.agregat_sequence = 0
+        self.connexion = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.connexion = socket.create_connection((self.hote, self.port), timeout=5.0)
+                self.connexion.settimeout(None)
+                self.connexion.sendall(json.dumps({"images": self.images}).encode() + b"\n")
+                with self.connexion.makefile("rb") as lecteur:
+                    self._recevoir(lecteur)
+            except OSError as erreur:
+                if not self.stop_event.is_set():
+                    print("Flux du service indisponible :", erreur)
+            # Message illisible (flux coupé au milieu d'une ligne, version différente) : reconnexion
+            except (ValueError, KeyError) as erreur:
+                print("Message du flux invalide, reconnexion :", repr(erreur))
+            finally:
+                if self.connexion is not None:
+                    self.connexion.close()
+            self.stop_event.wait(RECONNECT_DELAY)
+
+    def _recevoir(self, fichier):
+        while not self.stop_event.is_set():
+            ligne = fichier.readline()
+            if not ligne:
+                return
+            entete = json.loads(ligne)
+            jpeg = fichier.read(entete["jpeg"]) if entete["jpeg"] else b""
+            if entete["type"] == "bonjour":
+                self.sources = entete["sources"]
+                self.thermique = entete["thermique"]
+                self.pret.set()
+            elif entete["type"] == "detection":
+                frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR) if jpeg else None
+                resultat = (frame, _depuis_json(entete["visages"]), _depuis_json(entete["objets"]), entete["resume"])
+                with self.lock:
+                    # Numérotation locale : la sequence du service repart de zéro s'il redémarre
+                    self.resultats_sequences[entete["source"]] = self.resultats_sequences.get(entete["source"], 0) + 1
+                    self.resultats[entete["source"]] = resultat
+            elif entete["type"] == "environnement":
+                with self.lock:
+                    self.agregat_sequence += 1
+                    self.agregat = entete["agregat"]
+
+    # Noms des cameras du service (attend la connexion au plus timeout secondes, liste vide sans connexion)
+    def noms_sources(self, timeout=0):
+        self.pret.wait(timeout)
+        return list(self.sources)
+
+    def get_result(self, derniere_sequence=0, source=None):
+        with self.lock:
+            nom = source or (self.sources[0] if self.sources else None)
+            if self.resultats_sequences.get(nom, 0) > derniere_sequence:
+                return self.resultats_sequences[nom], self.resultats[nom]
+            return None
+
+    def get_agregat(self, derniere_sequence=0):
+        with self.lock:
+            if self.agregat_sequence > derniere_sequence:
+                return self.agregat_sequence, self.agregat
+            return None
+
+    def stop(self):
+        self.stop_event.set()
+        if self.connexion is not None:
+            try:
+                self.connexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
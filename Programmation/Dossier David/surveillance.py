@@ -0,0 +1,216 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : surveillance.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Logique de surveillance de l'habitacle, sans IHM
+#
+# Detection (visage, age, forme), vérification de sécurité de la
+# detection et de l'environnement, enregistrement dans la base de
+# données. La presence thermique (thermal.py) complète les detections
+# visuelles.
+#
+# L'occupation de l'habitacle est suivie par occupancy.py. Une alerte
+# de detection n'est émise qu'au passage à l'état "alerte" ou
+# "critique", pas à chaque frame où un enfant est vu seul.
+#
+# Les mesures environnementales arrivent une par une
+# (data_environnement_db) ou en agrégats de fenêtre
+# (data_environnement_agregat, voir sensors.py).
+#
+# Les alertes sont transmises par alerts.AlertDispatcher s'il est
+# fourni, sinon seulement enregistrées. Les images et les mesures
+# autour de chaque alerte sont gardées par evidence.EvidenceStore s'il
+# est fourni.
+#
+# Utilisée par le service de detection (service.py, que l'IHM Tk
+# DetectApp.py affiche) et par le rejeu hors ligne (replay.py).
+#***********************************************************
+
+# --- Import ---
+import time
+from datetime import datetime
+
+import numpy as np
+
+from metrics import metrics
+from occupancy import ALERT_LEVELS, ADULTE, ANIMAL, ENFANT, OccupancyEngine, classer
+from sensors import EnvironmentAlarm
+from tracking import TrackedDetector
+
+
+class Surveillance:
+    def __init__(self, storage, detector, alarme=None, thermique=None, dispatcher=None, occupation=None, preuves=None):
+        self.storage = storage
+        self.detector = detector
+        # Envoi des alertes (alerts.AlertDispatcher), optionnel
+        self.dispatcher = dispatcher
+        # Preuves des alertes (evidence.EvidenceStore), optionnelles
+        self.preuves = preuves
+        # Camera thermique (thermal.ThermalMonitor), optionnelle
+        self.thermique = thermique
+        # Alertes environnementales sur les agrégats du capteur (anti-rebond et hystérésis)
+        self.alarme = alarme or EnvironmentAlarm()
+        # Un detecteur (pistes) par camera, tous partagent le moteur d'inference
+        self.detectors = {}
+        # Occupation de l'habitacle (croyances par classe, états et durées de maintien), toutes cameras confondues
+        self.occupation = occupation or OccupancyEngine()
+        # Nombre d'alertes environnementales actives (dernier agrégat ou derniere mesure)
+        self.alerte_environnement = 0
+
+
+    # Detecteur d'une camera, le premier est celui passé au constructeur
+    def detecteur(self, source=None):
+        if source is None:
+            return self.detector
+        if source not in self.detectors:
+            self.detectors[source] = self.detector if not self.detectors else TrackedDetector(
+                self.detector.engine, self.detector.intervalle, self.detector.tracker_type, self.detector.min_hits,
+                self.detector.dessiner)
+        return self.detectors[source]
+
+
+    # Fonction Appelant les différente détection (visage, age, forme) et la fonction de sauvegarde
+    # detections : resultat des reseaux déjà calculé par un processus d'inference
+    # date : horodatage de la frame (rejeu), l'heure courante sinon
+    # source : nom de la camera (plusieurs cameras), None pour une seule camera
+    def detection_all(self, frame, detections=None, date=None, source=None):
+        print("== Detection visage / age / forme ==")
+        detector = self.detecteur(source)
+        if detections is None:
+            age_declare, object_detected, frame = detector.detect(frame)
+        else:
+            age_declare, object_detected, frame = detector.update(frame, detections)
+        print(object_detected)
+
+        print("== Resume detection ==")
+        resume_detection = self.detection_data_db(age_declare, object_detected, date, source)
+
+        return frame, age_declare, object_detected, resume_detection
+
+
+    # Enregistre les données de detection dans une base de données SQLite et renvoie le résumé
+    def detection_data_db(self, age_detected, object_detected, date=None, source=None):
+        # Classes entières (adulte, enfant, animal) des "choses" detectées
+        # (resultats structurés de inference.annotate : tranche d'age des visages, type des objets)
+        # La croyance d'occupation suit la confiance du detecteur, pas la probabilité de la tranche d'age
+        classes, scores = classer(np.concatenate([age_detected["label"], object_detected["label"]]),
+                                  np.concatenate([age_detected["confiance"], object_detected["confiance"]]))
+
+        # Tableau Résumé de la détection
+        # L'horloge de l'occupation est celle des frames en rejeu (date fournie), monotone sinon
+        instant = date.timestamp() if date is not None else time.monotonic()
+        resume_detection, transition = self.security_data_detection(classes, scores, instant, source)
+        print(resume_detection)
+
+        # Enregistrer l'heure de détection et les données dans la base de données
+        date_detection = (date or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        number_things_detected = resume_detection[0] + resume_detection[1]
+        personne_detected = resume_detection[0]
+        baby_animal_detected = resume_detection[1]
+
+        # La ligne est mise en file, elle sera écrite avec le prochain lot
+        self.storage.add_detection(date_detection, number_things_detected, personne_detected, baby_animal_detected)
+
+        if transition is not None:
+            metrics.evenement("occupation", ancien=transition[0], nouveau=transition[1], source=source)
+            if resume_detection[4]:
+                print("*== == == Envoie Alerte == == ==*")
+                self.alerte(date_detection, resume_detection[2], "detection",
+                            {"etat": transition[1], "personnes": resume_detection[0], "vulnerables": resume_detection[1],
+                             "thermique": resume_detection[3], "environnement": self.alerte_environnement, "source": source},
+                            cle="detection:" + transition[1])
+
+        return resume_detection
+
+
+    # Enregistre une alerte et la confie au dispatcher (envoi asynchrone) s'il existe
+    # cle : alerte identique pour la déduplication des envois (categorie par défaut)
+    # Renvoie l'identifiant de la ligne alerte, qui nomme aussi sa preuve
+    def alerte(self, date, valeur, categorie, details=None, cle=None):
+        metrics.incrementer("pabo_alertes_total", categorie=categorie)
+        metrics.evenement("alerte", date_alerte=date, valeur=valeur, categorie=categorie, details=details)
+        if self.dispatcher is not None:
+            alerte_id = self.dispatcher.signaler(date, valeur, categorie, details, cle)
+        else:
+            alerte_id = self.storage.add_alerte(date, valeur)
+        if self.preuves is not None:
+            self.preuves.demander(alerte_id, date, categorie)
+        return alerte_id
+
+
+    # Met à jour l'occupation de l'habitacle avec une detection et renvoie (tableau résumé, transition ou None)
+    # source : les detections d'une camera sont fusionnées avec les derniers resultats récents des autres cameras,
+    # l'alerte porte sur tout l'habitacle (un adulte vu à l'avant couvre un enfant vu à l'arrière)
+    # Résumé : personnes, vulnérables, niveau d'alerte de l'état (0, 1 alerte, 2 critique), confiance thermique,
+    # alerte levée par cette detection (1 si l'occupation vient de passer en alerte ou critique, 0 sinon)
+    def security_data_detection(self, classes, scores, instant, source=None):
+        # Corps chauds vus par la camera thermique (tout l'habitacle)
+        corps = self.thermique.presence() if self.thermique is not None else []
+        nombres, transition = self.occupation.update(classes, scores, instant, source, corps, self.alerte_environnement)
+
+        # 4e element : confiance du meilleur corps thermique (0 sans camera thermique)
+        # 5e element : la transition porte sur tout l'habitacle, une alerte n'est levée qu'une fois quelle que soit la camera
+        alerte_levee = int(transition is not None and ALERT_LEVELS[transition[1]] > 0)
+        resume_detection = [int(nombres[ADULTE]), int(nombres[ENFANT] + nombres[ANIMAL]), self.occupation.niveau(),
+                            corps[0]["confiance"] if corps else 0.0, alerte_levee]
+
+        return resume_detection, transition
+
+
+    # Verifie le resultat de sécurité de l'environnement et renvoie le nombre d'alerte detecté
+    def security_data_environnement(self, temperature, pression, humidite):
+    #https://mobile.interieur.gouv.fr/Archives/Archives-de-la-rubrique-Ma-securite/Avec-votre-vehicule/Chaleur-quels-reflexes-adopter-en-voiture-avec-des-enfants
+    # >1500m altitude enfant = début diffculté respiratoire enfant ; 1500m = 850hPa
+        nombreAlerte = 0
+        if(temperature > 30.0 or temperature < 18.0):
+            print("Alerte temperature ")
+            nombreAlerte = nombreAlerte + 1
+        if(pression < 850.0):
+            print("Alerte pression")
+            nombreAlerte = nombreAlerte + 1
+        if(humidite > 80.0 or humidite < 35.0):
+            print("Alerte humidite")
+            nombreAlerte = nombreAlerte + 1
+
+        return nombreAlerte
+
+
+    # Enregistre les données environnementale dans une base de données SQLite
+    # Renvoie le nombre d'alerte environnementale
+    def data_environnement_db(self, temperature, pression, humidite, date=None):
+        # Enregistrer l'heure de détection et les données dans la base de données
+        date_detection = (date or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        self.storage.add_environnement(date_detection, temperature, pression, humidite)
+        print("Donnees environnement mises en file pour la base de donnees")
+
+        alerte_environnement = self.security_data_environnement(temperature, pression, humidite)
+        self.alerte_environnement = alerte_environnement
+        if alerte_environnement > 0:
+            print("*== == == Envoie Alerte == == ==*")
+            self.alerte(date_detection, alerte_environnement, "environnement",
+                        {"temperature": temperature, "pression": pression, "humidite": humidite})
+
+        return alerte_environnement
+
+
+    # Enregistre la moyenne d'un agrégat du capteur (voir sensors.SensorSampler)
+    # Une ligne alerte n'est écrite que lorsqu'une grandeur passe en alerte
+    # Renvoie le nombre d'alerte environnementale active
+    def data_environnement_agregat(self, agregat, date=None):
+        date_detection = (date or agregat.get("date") or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        self.storage.add_environnement(date_detection, round(agregat["temperature"]["moyenne"], 2),
+                                       round(agregat["pression"]["moyenne"], 2), round(agregat["humidite"]["moyenne"], 2))
+
+        alerte_environnement, nouvelles = self.alarme.update(agregat)
+        self.alerte_environnement = alerte_environnement
+        if nouvelles:
+            print("*== == == Envoie Alerte == == ==*")
+            details = {grandeur: round(agregat[grandeur]["moyenne"], 2) for grandeur in ("temperature", "pression", "humidite")}
+            details["grandeurs"] = nouvelles
+            self.alerte(date_detection, alerte_environnement, "environnement", details,
+                        cle="environnement:" + ",".join(sorted(nouvelles)))
+
+        return alerte_environnement
@@ -0,0 +1,75 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_alerts.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests de l'envoi asynchrone des alertes (alerts.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import time
+
+import pytest
+
+import alerts
+from storage import DetectionStorage
+
+
+# Destination qui lève une erreur (broker MQTT non connecté) tant que pannes > 0
+class SinkEnPanne:
+    def __init__(self, nom="essai", pannes=1, erreur=RuntimeError):
+        self.nom = nom
+        self.pannes = pannes
+        self.erreur = erreur
+        self.recus = []
+
+    def envoyer(self, message):
+        if self.pannes > 0:
+            self.pannes -= 1
+            raise self.erreur("The client is not currently connected.")
+        self.recus.append(message)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    base = DetectionStorage(str(tmp_path / "pabo.sqlite"))
+    yield base
+    base.close()
+
+
+def attendre(condition, duree=5.0):
+    limite = time.monotonic() + duree
+    while not condition() and time.monotonic() < limite:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_erreur_inattendue_du_sink_retentee(storage, monkeypatch):
+    monkeypatch.setattr(alerts, "backoff", lambda tentatives, **options: 0.05)
+    sink = SinkEnPanne()
+    dispatcher = alerts.AlertDispatcher(storage, [sink])
+    try:
+        dispatcher.signaler("2026-10-18 12:00:00", 1, "detection")
+        assert attendre(lambda: sink.recus)
+        assert all(thread.is_alive() for thread in dispatcher.threads)
+        # Le premier essai (RuntimeError) compte comme un échec retenté, le thread d'envoi continue
+        assert storage.connexion.execute("SELECT statut, tentatives FROM envoi").fetchone() == ("envoyee", 2)
+    finally:
+        dispatcher.stop()
+
+
+def test_envoi_abandonne_apres_max_attempts(storage, monkeypatch):
+    monkeypatch.setattr(alerts, "backoff", lambda tentatives, **options: 0.01)
+    sink = SinkEnPanne(pannes=10, erreur=OSError)
+    dispatcher = alerts.AlertDispatcher(storage, [sink], max_attempts=3)
+    try:
+        dispatcher.signaler("2026-10-18 12:00:00", 1, "detection")
+        assert attendre(lambda: storage.statistiques_envois().get("essai", {}).get("echec"))
+        assert sink.pannes == 7
+        assert all(thread.is_alive() for thread in dispatcher.threads)
+    finally:
+        dispatcher.stop()
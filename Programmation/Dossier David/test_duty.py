@@ -0,0 +1,35 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_duty.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests de la cadence adaptative (duty.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+from duty import DutyCycleController
+
+
+def test_reste_actif_tant_que_l_occupation_est_en_alerte(tmp_path):
+    duty = DutyCycleController(cycles_vides=3, journal=str(tmp_path / "duty.csv"))
+    # Personne n'est vu mais l'occupation est encore en alerte (niveau 1)
+    for _ in range(10):
+        duty.detection([0, 0, 1, 0.0, 0])
+    assert duty.etat == "actif"
+    for _ in range(3):
+        duty.detection([0, 0, 0, 0.0, 0])
+    assert duty.etat == "veille"
+
+
+def test_rapport_n_ecrit_pas_dans_le_journal(tmp_path):
+    journal = tmp_path / "duty.csv"
+    duty = DutyCycleController(journal=str(journal))
+    for _ in range(5):
+        rapport = duty.rapport()
+    assert not journal.exists()
+    assert rapport["actif"]["duree_s"] >= 0.0
+    assert duty.cumuls["actif"]["duree_s"] == 0.0
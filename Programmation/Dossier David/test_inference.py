@@ -0,0 +1,91 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_inference.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests du post-traitement des reseaux (inference.py)
+#
+# Les reseaux sont remplacés par benchmark.reseaux_de_remplacement : les
+# poids des modèles ne sont pas nécessaires.
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import numpy as np
+
+from benchmark import reseaux_de_remplacement
+from inference import (AGE_INTERVALS, ANIMAL_CONFIDENCE, FACE_THRESHOLDS, PERSON_CONFIDENCE, SSD_THRESHOLDS,
+                       TYPE_CLASSES, InferenceEngine, decoder_ssd, resultats)
+
+
+def test_age_detections_separe_age_et_confiance_du_visage():
+    # Le reseau d'age de remplacement répartit 0.125 sur chaque tranche : score = probabilité de la tranche,
+    # confiance = celle du detecteur de visages
+    engine = InferenceEngine(**reseaux_de_remplacement())
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    faces = resultats([("face", 0.93, (100, 100, 200, 200)), ("face", 0.61, (300, 100, 400, 220))])
+    detections = engine.age_detections(frame, faces)
+    assert [(genre, label) for genre, label, _, _, _ in detections] == [("face", AGE_INTERVALS[0])] * 2
+    assert np.allclose([score for _, _, score, _, _ in detections], [0.125, 0.125])
+    assert np.allclose([confiance for _, _, _, _, confiance in detections], [0.93, 0.61])
+    assert [box for _, _, _, box, _ in detections] == [(100, 100, 200, 200), (300, 100, 400, 220)]
+
+    age_declare, _, _ = engine.annotate(frame, detections, dessiner=False)
+    assert np.allclose(age_declare.score, [0.125, 0.125])
+    assert np.allclose(age_declare.confiance, [0.93, 0.61])
+
+
+def test_resultats_sans_confiance_reprend_le_score():
+    objets = resultats([("cat", 0.8, (0, 0, 10, 10))])
+    assert np.allclose(objets.confiance, [0.8])
+
+
+# Sortie SSD (1, 1, N, 7) à partir de lignes (classe, confiance, x1, y1, x2, y2) relatives
+def sortie_ssd(lignes):
+    return np.array([[0.0] + list(ligne) for ligne in lignes], dtype=np.float32).reshape(1, 1, -1, 7)
+
+
+def test_decoder_ssd_supprime_les_doublons_de_meme_classe():
+    chat, chien = TYPE_CLASSES.index("cat"), TYPE_CLASSES.index("dog")
+    sortie = sortie_ssd([(chat, 0.80, 0.10, 0.10, 0.50, 0.50),
+                         (chat, 0.90, 0.11, 0.11, 0.51, 0.51),
+                         # Même boite mais autre classe : gardée
+                         (chien, 0.70, 0.10, 0.10, 0.50, 0.50),
+                         # Chat ailleurs dans l'image : gardé
+                         (chat, 0.75, 0.60, 0.60, 0.90, 0.90)])
+    classes, scores, boites = decoder_ssd(sortie, 100, 100, SSD_THRESHOLDS)
+    assert classes.tolist() == [chat, chat, chien]
+    assert np.allclose(scores, [0.90, 0.75, 0.70])
+    assert boites.tolist() == [[11, 11, 51, 51], [60, 60, 90, 90], [10, 10, 50, 50]]
+
+
+def test_decoder_ssd_sans_nms_garde_les_doublons():
+    chat = TYPE_CLASSES.index("cat")
+    sortie = sortie_ssd([(chat, 0.80, 0.10, 0.10, 0.50, 0.50), (chat, 0.90, 0.11, 0.11, 0.51, 0.51)])
+    classes, _, _ = decoder_ssd(sortie, 100, 100, SSD_THRESHOLDS, nms=None)
+    assert len(classes) == 2
+
+
+def test_decoder_ssd_seuils_par_classe():
+    chat, personne, voiture = TYPE_CLASSES.index("cat"), TYPE_CLASSES.index("person"), TYPE_CLASSES.index("car")
+    sortie = sortie_ssd([(chat, ANIMAL_CONFIDENCE - 0.01, 0.0, 0.0, 0.2, 0.2),
+                         (chat, ANIMAL_CONFIDENCE + 0.01, 0.3, 0.3, 0.5, 0.5),
+                         (personne, PERSON_CONFIDENCE + 0.01, 0.6, 0.0, 0.9, 0.4),
+                         # Classe ignorée (seuil infini) même avec une confiance de 1
+                         (voiture, 1.0, 0.0, 0.6, 0.4, 0.9),
+                         # Classe hors du tableau des seuils
+                         (len(SSD_THRESHOLDS) + 3, 1.0, 0.5, 0.5, 0.9, 0.9)])
+    classes, scores, _ = decoder_ssd(sortie, 100, 100, SSD_THRESHOLDS)
+    assert sorted(classes.tolist()) == sorted([chat, personne])
+    assert np.all(scores[:-1] >= scores[1:])
+
+
+def test_decoder_ssd_marge_et_bornes_de_l_image():
+    sortie = sortie_ssd([(1, 0.9, 0.0, 0.1, 0.5, 1.0)])
+    _, _, boites = decoder_ssd(sortie, 200, 100, FACE_THRESHOLDS, marge=10)
+    assert boites.tolist() == [[0, 0, 110, 100]]
+    # La classe 0 (fond) du reseau de visages est ignorée
+    assert len(decoder_ssd(sortie_ssd([(0, 0.9, 0.1, 0.1, 0.5, 0.5)]), 200, 100, FACE_THRESHOLDS)[0]) == 0
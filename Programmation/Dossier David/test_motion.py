@@ -0,0 +1,58 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_motion.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests du filtre de changement de scène (motion.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import numpy as np
+import pytest
+
+from motion import MotionGate
+
+
+def scene(decalage=0):
+    frame = np.full((480, 640, 3), 60, dtype=np.uint8)
+    frame[100:300, 150 + decalage:350 + decalage] = 200
+    return frame
+
+
+@pytest.mark.parametrize("methode", ["diff", "histogram"])
+def test_scene_immobile_ignoree_puis_mouvement_detecte(methode):
+    gate = MotionGate(methode=methode, intervalle_max=10.0)
+    assert gate.should_detect(scene(), 0.0)
+    assert not gate.should_detect(scene(), 1.0)
+    # Bruit de capteur faible : toujours la même scène
+    bruit = np.random.default_rng(0).integers(-3, 4, (480, 640, 3))
+    assert not gate.should_detect(np.clip(scene() + bruit, 0, 255).astype(np.uint8), 2.0)
+    grand_changement = scene()
+    grand_changement[:240] = 250
+    assert gate.should_detect(grand_changement, 3.0)
+
+
+def test_detection_forcee_apres_l_intervalle_maximum():
+    gate = MotionGate(intervalle_max=10.0)
+    assert gate.should_detect(scene(), 0.0)
+    assert not gate.should_detect(scene(), 9.0)
+    assert gate.should_detect(scene(), 10.5)
+    assert not gate.should_detect(scene(), 11.0)
+
+
+def test_reference_de_la_derniere_detection():
+    # Une dérive lente, image par image, finit par dépasser le seuil par rapport à la derniere detection
+    gate = MotionGate(methode="diff", intervalle_max=1000.0)
+    assert gate.should_detect(scene(), 0.0)
+    resultats = [gate.should_detect(scene(decalage), float(decalage)) for decalage in range(2, 200, 2)]
+    assert not resultats[0]
+    assert any(resultats)
+
+
+def test_methode_inconnue():
+    with pytest.raises(ValueError):
+        MotionGate(methode="flux_optique")
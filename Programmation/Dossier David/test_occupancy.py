@@ -0,0 +1,93 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_occupancy.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests de la machine à états d'occupation (occupancy.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import numpy as np
+
+from occupancy import ADULTE, ALERT_DWELL, ANIMAL, ENFANT, OccupancyEngine, classer
+
+# Période (s) entre deux frames simulées
+PERIODE = 0.1
+
+
+# Rejoue la même observation pendant duree secondes, renvoie les transitions et l'instant final
+def rejouer(moteur, labels, scores, debut, duree, environnement=0):
+    transitions = []
+    classes, scores = classer(labels, scores)
+    for instant in np.arange(debut, debut + duree, PERIODE):
+        _, transition = moteur.update(classes, scores, float(instant), environnement=environnement)
+        if transition is not None:
+            transitions.append((float(instant), transition))
+    return transitions, debut + duree
+
+
+def test_classer_ignore_les_labels_sans_classe():
+    classes, scores = classer(["(0, 2)", "person", "(25, 32)", "cat"], [0.9, 0.8, 0.7, 0.6])
+    assert classes.tolist() == [ENFANT, ADULTE, ANIMAL]
+    assert scores.tolist() == [0.9, 0.7, 0.6]
+
+
+def test_enfant_seul_escalade_en_alerte_puis_critique():
+    moteur = OccupancyEngine()
+    transitions, fin = rejouer(moteur, ["(0, 2)"], [0.9], 0.0, 20.0)
+    assert [transition for _, transition in transitions] == [("vide", "seul"), ("seul", "alerte")]
+    # L'alerte attend ALERT_DWELL secondes dans l'état "seul"
+    assert transitions[1][0] - transitions[0][0] >= ALERT_DWELL
+    assert moteur.niveau() == 1
+
+    transitions, _ = rejouer(moteur, ["(0, 2)"], [0.9], fin, 1.0, environnement=1)
+    assert [transition for _, transition in transitions] == [("alerte", "critique")]
+    assert moteur.rapport()["alertes"] == 2
+
+
+def test_retour_adulte_arrete_l_alerte():
+    moteur = OccupancyEngine()
+    _, fin = rejouer(moteur, ["(0, 2)"], [0.9], 0.0, 20.0)
+    assert moteur.etat == "alerte"
+    transitions, _ = rejouer(moteur, ["(0, 2)", "(25, 32)"], [0.9, 0.9], fin, 5.0)
+    assert [transition for _, transition in transitions] == [("alerte", "occupe")]
+    assert moteur.niveau() == 0
+
+
+def test_alerte_plus_rapide_avec_alerte_environnementale():
+    normal, rapide = OccupancyEngine(), OccupancyEngine()
+    transitions_normal, _ = rejouer(normal, ["cat"], [0.9], 0.0, 20.0)
+    transitions_rapide, _ = rejouer(rapide, ["cat"], [0.9], 0.0, 20.0, environnement=1)
+    instant_normal = [instant for instant, (_, etat) in transitions_normal if etat == "alerte"][0]
+    instant_rapide = [instant for instant, (_, etat) in transitions_rapide if etat == "alerte"][0]
+    assert instant_rapide < instant_normal
+
+
+def test_detection_isolee_ne_change_pas_l_etat():
+    moteur = OccupancyEngine()
+    rejouer(moteur, ["(0, 2)"], [0.99], 0.0, PERIODE)
+    transitions, _ = rejouer(moteur, [], [], PERIODE, 30.0)
+    assert transitions == []
+    assert moteur.etat == "vide"
+
+
+def test_enfant_detecte_avec_un_score_faible_declenche_l_alerte():
+    # Un enfant vu en continu avec un score sous le seuil de presence doit quand même être présent
+    moteur = OccupancyEngine()
+    transitions, _ = rejouer(moteur, ["(0, 2)"], [0.45], 0.0, 40.0)
+    assert ("seul", "alerte") in [transition for _, transition in transitions]
+
+
+def test_vide_attend_sa_duree_de_maintien():
+    moteur = OccupancyEngine()
+    _, fin = rejouer(moteur, ["(25, 32)"], [0.9], 0.0, 5.0)
+    assert moteur.etat == "occupe"
+    # L'adulte part : la croyance descend puis "vide" doit durer DWELL_TIMES["vide"]
+    transitions, _ = rejouer(moteur, [], [], fin, 3.0)
+    assert transitions == []
+    transitions, _ = rejouer(moteur, [], [], fin + 3.0, 10.0)
+    assert [transition for _, transition in transitions] == [("occupe", "vide")]
@@ -0,0 +1,75 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_pipeline.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests de la chaine capture / inference (pipeline.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import threading
+
+import numpy as np
+
+import pipeline
+from pipeline import CaptureThread, FrameRing, InferenceWorker, PipelineStats
+from sources import SourceScheduler
+
+
+# Source qui lève une erreur aux premiers démarrages puis donne quelques frames
+class SourceInstable:
+    def __init__(self, echecs, frames=3):
+        self.nom = "instable"
+        self.echecs = echecs
+        self.nombre_frames = frames
+        self.demarrages = 0
+        self.fermetures = 0
+
+    def frames(self):
+        self.demarrages += 1
+        if self.demarrages <= self.echecs:
+            raise IOError("camera absente")
+        for _ in range(self.nombre_frames):
+            yield np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def close(self):
+        self.fermetures += 1
+
+
+def test_capture_relance_la_source_apres_une_erreur(monkeypatch):
+    monkeypatch.setattr(pipeline, "CAPTURE_RESTART_DELAY", 0.01)
+    source, stats = SourceInstable(echecs=2), PipelineStats()
+    capture = CaptureThread(source, FrameRing(shape=(48, 64, 3)), stats)
+    capture.start()
+    capture.join(timeout=5.0)
+    assert not capture.is_alive()
+    assert source.demarrages == 3
+    assert source.fermetures == 3
+    assert stats.rapport()["frames_capturees"] == 3
+
+
+def test_capture_abandonne_une_source_toujours_en_erreur(monkeypatch):
+    monkeypatch.setattr(pipeline, "CAPTURE_RESTART_DELAY", 0.01)
+    source = SourceInstable(echecs=100)
+    capture = CaptureThread(source, FrameRing(shape=(48, 64, 3)), PipelineStats())
+    capture.start()
+    capture.join(timeout=5.0)
+    assert not capture.is_alive()
+    assert source.demarrages == pipeline.CAPTURE_MAX_RESTARTS
+
+
+def test_alerte_comptee_une_fois_avec_deux_cameras():
+    condition = threading.Condition()
+    rings = {nom: FrameRing(shape=(48, 64, 3), condition=condition) for nom in ("avant", "arriere")}
+    stats = PipelineStats()
+    worker = InferenceWorker(SourceScheduler(rings), None, stats)
+    # Résumés entrelacés des deux cameras : l'habitacle passe en alerte une seule fois (5e element)
+    resumes = [("avant", [0, 1, 0, 0.0, 0]), ("arriere", [0, 1, 1, 0.0, 1]), ("avant", [0, 1, 1, 0.0, 0]),
+               ("arriere", [0, 1, 1, 0.0, 0]), ("avant", [0, 0, 0, 0.0, 0]), ("arriere", [0, 1, 1, 0.0, 0])]
+    for sequence, (nom, resume) in enumerate(resumes, start=1):
+        worker._publier(nom, sequence, 0.0, (None, resume))
+    assert stats.rapport()["alertes"] == 1
@@ -0,0 +1,99 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_storage.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests des cumuls et de la purge de la base (storage.py)
+#
+# Chaque test utilise sa propre base dans un dossier temporaire.
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import ROLLUP_MINUTE_RETENTION_DAYS, DetectionStorage
+
+MAINTENANT = datetime(2026, 10, 18, 12, 30, 0)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    base = DetectionStorage(str(tmp_path / "pabo.sqlite"), retention_days=7)
+    yield base
+    base.close()
+
+
+def date(decalage):
+    return (MAINTENANT - decalage).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def compter(storage, table):
+    return storage.connexion.execute("SELECT count(*) FROM {}".format(table)).fetchone()[0]
+
+
+def test_cumuls_par_minute_et_par_heure(storage):
+    storage.add_environnement("2026-10-18 12:05:10", 20.0, 1000.0, 40.0)
+    storage.add_environnement("2026-10-18 12:05:40", 24.0, 1002.0, 50.0)
+    storage.add_environnement("2026-10-18 12:20:00", 22.0, 1001.0, 45.0)
+    storage.add_detection("2026-10-18 12:05:20", 2, 1, 1)
+    storage.add_detection("2026-10-18 12:21:00", 1, 1, 0)
+    storage.add_alerte("2026-10-18 12:21:05", 1)
+
+    minutes = {ligne["debut"]: ligne for ligne in storage.historique(timedelta(hours=1), "minute", MAINTENANT)}
+    assert minutes["2026-10-18 12:05"]["mesures"] == 2
+    assert minutes["2026-10-18 12:05"]["temperature_moy"] == 22.0
+    assert minutes["2026-10-18 12:05"]["temperature_min"] == 20.0
+    assert minutes["2026-10-18 12:05"]["temperature_max"] == 24.0
+    assert minutes["2026-10-18 12:21"]["alertes"] == 1
+
+    heure = storage.resume(timedelta(hours=1), "heure", MAINTENANT)
+    assert heure["mesures"] == 3
+    assert heure["temperature_moy"] == 22.0
+    assert heure["humidite_max"] == 50.0
+    assert heure["detections"] == 2
+    assert heure["detections_vulnerables"] == 1
+    assert heure["personnes_max"] == 1
+    assert heure["alertes"] == 1
+
+
+def test_cumuls_ajoutes_aux_lots_suivants(storage):
+    storage.add_environnement("2026-10-18 12:05:10", 20.0, 1000.0, 40.0)
+    storage.flush()
+    storage.add_environnement("2026-10-18 12:05:50", 30.0, 1000.0, 40.0)
+    resume = storage.resume(timedelta(hours=1), "minute", MAINTENANT)
+    assert resume["mesures"] == 2
+    assert (resume["temperature_min"], resume["temperature_max"]) == (20.0, 30.0)
+
+
+def test_purge_garde_les_cumuls_horaires(storage):
+    for jours in (1, 10, ROLLUP_MINUTE_RETENTION_DAYS + 5):
+        storage.add_environnement(date(timedelta(days=jours)), 21.0, 1000.0, 40.0)
+        storage.add_detection(date(timedelta(days=jours)), 1, 1, 0)
+
+    supprimees = storage.purger(MAINTENANT)
+    assert supprimees["environnement"] == 2
+    assert supprimees["detection"] == 2
+    assert compter(storage, "environnement") == 1
+    # Cumuls par minute supprimés après ROLLUP_MINUTE_RETENTION_DAYS, cumuls horaires conservés
+    assert supprimees["rollup"] == 1
+    assert storage.resume(timedelta(days=60), "heure", MAINTENANT)["mesures"] == 3
+    assert storage.resume(timedelta(days=60), "minute", MAINTENANT)["mesures"] == 2
+
+
+def test_purge_garde_les_envois_en_attente(storage):
+    ancienne = date(timedelta(days=10))
+    envoyee = storage.add_alerte(ancienne, 1, [("webhook", "detection", "{}", None)])
+    storage.add_alerte(ancienne, 1, [("webhook", "detection", "{}", None)])
+    envoi = storage.prendre_envoi("webhook")
+    assert envoi["alerte_id"] == envoyee
+    storage.terminer_envoi(envoi["id"], "envoyee", 1)
+
+    supprimees = storage.purger(MAINTENANT)
+    assert supprimees["envoi"] == 1
+    assert compter(storage, "envoi") == 1
@@ -0,0 +1,50 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : test_thermal.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Tests de la detection des corps chauds (thermal.py)
+#
+# Utilisation : python -m pytest -q (depuis Dossier David)
+#***********************************************************
+
+# --- Import ---
+import numpy as np
+
+from thermal import MIN_BLOB_PIXELS, THERMAL_SHAPE, SimulatedThermalSensor, detecter_corps
+
+
+def test_habitacle_vide_sans_corps():
+    assert detecter_corps(SimulatedThermalSensor(ambiante=22.0).read()) == []
+
+
+def test_deux_corps_tries_par_confiance():
+    capteur = SimulatedThermalSensor(ambiante=22.0, corps=[(6, 6, 2.0, 34.0), (16, 24, 1.5, 31.0)])
+    corps = detecter_corps(capteur.read())
+    assert len(corps) == 2
+    confiances = [c["confiance"] for c in corps]
+    assert confiances == sorted(confiances, reverse=True)
+    # Le plus chaud et le plus grand est le premier, sa boite contient son centre
+    start_x, start_y, end_x, end_y = corps[0]["box"]
+    assert start_x <= 6 < end_x and start_y <= 6 < end_y
+    assert corps[0]["temperature_max"] > corps[1]["temperature_max"]
+
+
+def test_taches_trop_petites_ou_trop_chaudes_ignorees():
+    frame = np.full(THERMAL_SHAPE, 22.0, dtype=np.float32)
+    # Quelques pixels chauds isolés (bruit, reflet)
+    frame[2, 2:2 + MIN_BLOB_PIXELS - 1] = 33.0
+    # Source plus chaude qu'un corps (moteur, soleil sur le siège)
+    frame[10:16, 10:16] = 60.0
+    assert detecter_corps(frame) == []
+
+
+def test_seuil_relatif_a_l_ambiante():
+    # Habitacle chaud : un siège à 30 °C n'est pas un corps quand l'ambiante est à 29 °C
+    frame = np.full(THERMAL_SHAPE, 29.0, dtype=np.float32)
+    frame[8:14, 8:14] = 30.0
+    assert detecter_corps(frame) == []
+    frame[8:14, 8:14] = 34.0
+    assert [c["pixels"] for c in detecter_corps(frame)] == [36]
@@ -0,0 +1,186 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : thermal.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Detection de presence par la camera thermique MLX90640
+#
+# La camera fournit une image 32x24 de températures (°C). Les zones
+# plus chaudes que l'habitacle (seuil fixe et écart à la médiane) sont
+# regroupées en composantes connexes (cv2.connectedComponentsWithStats),
+# chaque corps chaud reçoit une confiance selon sa taille et son écart
+# de température. Un enfant sous une couverture ou dans le noir reste
+# visible. Le ThermalMonitor lit la camera dans son propre thread, la
+# Surveillance fusionne ses corps avec les detections visuelles.
+# SimulatedThermalSensor remplace la camera pour les essais sans matériel.
+#
+# Utilisation : python3 thermal.py [--simule] [--frames 20]
+#***********************************************************
+
+# --- Import ---
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Résolution de la MLX90640 (lignes, colonnes)
+THERMAL_SHAPE = (24, 32)
+# Fréquence de rafraichissement de la camera (Hz)
+THERMAL_REFRESH_HZ = 4
+# Température de surface minimum / maximum d'un corps (°C), un corps couvert apparait plus froid
+BODY_TEMP_MIN = 27.0
+BODY_TEMP_MAX = 42.0
+# Ecart minimum (°C) entre un corps et la température médiane de l'habitacle
+AMBIENT_DELTA = 3.0
+# Taille minimum d'un corps (pixels thermiques)
+MIN_BLOB_PIXELS = 4
+# Confiance minimum d'un corps pour compter dans l'occupation
+THERMAL_CONFIDENCE = 0.5
+# Durée (s) pendant laquelle la derniere image thermique reste valable
+THERMAL_MAX_AGE = 2.0
+
+
+# Camera thermique MLX90640 sur le bus I2C (bibliothèque adafruit-circuitpython-mlx90640)
+class MLX90640Sensor:
+    def __init__(self, refresh_hz=THERMAL_REFRESH_HZ):
+        # Import à l'ouverture : le module reste importable sans la camera
+        import board
+        import busio
+        import adafruit_mlx90640
+
+        rates = {1: adafruit_mlx90640.RefreshRate.REFRESH_1_HZ, 2: adafruit_mlx90640.RefreshRate.REFRESH_2_HZ,
+                 4: adafruit_mlx90640.RefreshRate.REFRESH_4_HZ, 8: adafruit_mlx90640.RefreshRate.REFRESH_8_HZ,
+                 16: adafruit_mlx90640.RefreshRate.REFRESH_16_HZ}
+        i2c = busio.I2C(board.SCL, board.SDA, frequency=800000)
+        self.mlx = adafruit_mlx90640.MLX90640(i2c)
+        self.mlx.refresh_rate = rates[refresh_hz]
+        # La bibliothèque remplit une liste de 768 flottants, réutilisée à chaque lecture
+        self.valeurs = [0.0] * (THERMAL_SHAPE[0] * THERMAL_SHAPE[1])
+
+    # Renvoie l'image de températures (24, 32) en °C
+    def read(self):
+        self.mlx.getFrame(self.valeurs)
+        return np.asarray(self.valeurs, dtype=np.float32).reshape(THERMAL_SHAPE)
+
+
+# Camera thermique simulée : habitacle à température ambiante, corps gaussiens et bruit de mesure
+# corps : liste de (ligne, colonne, rayon, température) modifiable pendant l'essai
+class SimulatedThermalSensor:
+    def __init__(self, ambiante=22.0, corps=None, bruit=0.3, seed=0):
+        self.ambiante = ambiante
+        self.corps = list(corps or [])
+        self.bruit = bruit
+        self.rng = np.random.default_rng(seed)
+        self.lignes, self.colonnes = np.mgrid[0:THERMAL_SHAPE[0], 0:THERMAL_SHAPE[1]].astype(np.float32)
+
+    def read(self):
+        frame = np.full(THERMAL_SHAPE, self.ambiante, dtype=np.float32)
+        for ligne, colonne, rayon, temperature in self.corps:
+            distance2 = (self.lignes - ligne) ** 2 + (self.colonnes - colonne) ** 2
+            np.maximum(frame, self.ambiante + (temperature - self.ambiante) * np.exp(-distance2 / (2.0 * rayon ** 2)), out=frame)
+        frame += self.rng.normal(0.0, self.bruit, THERMAL_SHAPE).astype(np.float32)
+        return frame
+
+
+# Corps chauds d'une image thermique : liste de dictionnaires (box en pixels thermiques, pixels,
+# température moyenne et maximum, confiance entre 0 et 1), triés par confiance décroissante
+def detecter_corps(frame, temp_min=BODY_TEMP_MIN, temp_max=BODY_TEMP_MAX, delta=AMBIENT_DELTA, pixels_min=MIN_BLOB_PIXELS):
+    ambiante = float(np.median(frame))
+    seuil = max(temp_min, ambiante + delta)
+    masque = ((frame >= seuil) & (frame <= temp_max)).astype(np.uint8)
+    nombre, etiquettes, stats, _ = cv2.connectedComponentsWithStats(masque, connectivity=8)
+    if nombre <= 1:
+        return []
+
+    # Température moyenne et maximum de chaque composante, sans boucle sur les pixels
+    etiquettes = etiquettes.ravel()
+    valeurs = frame.ravel()
+    aires = stats[:, cv2.CC_STAT_AREA]
+    sommes = np.bincount(etiquettes, weights=valeurs, minlength=nombre)
+    # Valeurs regroupées par composante, puis maximum de chaque groupe
+    ordre = np.argsort(etiquettes, kind="stable")
+    maximums = np.maximum.reduceat(valeurs[ordre], np.concatenate(([0], np.cumsum(aires)[:-1])))
+    moyennes = sommes / np.maximum(aires, 1)
+    # Confiance : écart à l'ambiante (saturé à 2 * delta) et taille (saturée à 3 * pixels_min)
+    confiances = (np.clip((moyennes - ambiante) / (2.0 * delta), 0.0, 1.0) *
+                  np.clip(aires / (3.0 * pixels_min), 0.0, 1.0))
+
+    corps = []
+    for etiquette in np.flatnonzero(aires[1:] >= pixels_min) + 1:
+        x, y, largeur, hauteur = stats[etiquette, :4]
+        corps.append({"box": (int(x), int(y), int(x + largeur), int(y + hauteur)), "pixels": int(aires[etiquette]),
+                      "temperature_moy": round(float(moyennes[etiquette]), 1),
+                      "temperature_max": round(float(maximums[etiquette]), 1),
+                      "confiance": round(float(confiances[etiquette]), 3)})
+    return sorted(corps, key=lambda c: c["confiance"], reverse=True)
+
+
+# Thread de lecture de la camera thermique, publie les corps de la derniere image
+class ThermalMonitor(threading.Thread):
+    def __init__(self, capteur=None, periode=1.0 / THERMAL_REFRESH_HZ):
+        super().__init__(name="pabo-thermique", daemon=True)
+        self.capteur = capteur
+        self.periode = periode
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.frame = None
+        self.corps = []
+        self.instant = 0.0
+        self.erreurs = 0
+
+    def run(self):
+        if self.capteur is None:
+            self.capteur = MLX90640Sensor()
+        prochaine = time.monotonic()
+        while not self.stop_event.wait(max(0.0, prochaine - time.monotonic())):
+            prochaine += self.periode
+            try:
+                frame = self.capteur.read()
+            except (OSError, ValueError, RuntimeError) as erreur:
+                # Image incomplète ou erreur I2C : la lecture suivante est tentée normalement
+                self.erreurs += 1
+                print("Erreur camera thermique :", erreur)
+                continue
+            corps = detecter_corps(frame)
+            with self.lock:
+                self.frame = frame
+                self.corps = corps
+                self.instant = time.monotonic()
+
+    # Corps de la derniere image dont la confiance atteint confiance_min (liste vide si l'image est trop ancienne)
+    def presence(self, confiance_min=THERMAL_CONFIDENCE, age_max=THERMAL_MAX_AGE):
+        with self.lock:
+            if time.monotonic() - self.instant > age_max:
+                return []
+            return [c for c in self.corps if c["confiance"] >= confiance_min]
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection de corps chauds par la camera thermique MLX90640")
+    parser.add_argument("--simule", action="store_true", help="camera simulée (un adulte et un enfant couvert)")
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+
+    capteur = (SimulatedThermalSensor(corps=[(12, 8, 3.0, 33.0), (16, 24, 2.0, 29.0)]) if args.simule
+               else MLX90640Sensor())
+    durees = []
+    for _ in range(args.frames):
+        frame = capteur.read()
+        debut = time.perf_counter()
+        corps = detecter_corps(frame)
+        durees.append(time.perf_counter() - debut)
+        print(corps)
+        if not args.simule:
+            time.sleep(1.0 / THERMAL_REFRESH_HZ)
+    print("detecter_corps : {:.3f} ms en moyenne".format(1000.0 * sum(durees) / len(durees)))
+
+
+if __name__ == "__main__":
+    main()
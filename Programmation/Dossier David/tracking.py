@@ -0,0 +1,181 @@
+#***********************************************************
+# Projet : Projet - Prévention Alerte Bébé Oublié
+# Auteur : Bezin David
+# Nom du Fichier : tracking.py
+# Date de Création : 18/10/2026
+# Date de Modification : 18/10/2026
+#***********************************************************
+# Description : Suivi des visages et animaux entre deux detections
+#
+# Les reseaux ne sont executés que toutes les N frames (ou quand une
+# piste est perdue). Entre deux, les boites sont suivies par un tracker
+# OpenCV (KCF / CSRT / MIL) ou, à défaut, extrapolées à vitesse constante.
+# Chaque piste garde son identifiant, sa tranche d'age ou son type d'animal,
+# ce qui évite le scintillement d'une frame à l'autre.
+#***********************************************************
+
+# --- Import ---
+import cv2
+import numpy as np
+
+# Tracker entre deux detections : "kcf", "csrt", "mil" (OpenCV) ou "iou" (extrapolation des boites)
+TRACKER_TYPE = "kcf"
+# Les reseaux sont executés toutes les DETECTION_INTERVAL frames
+DETECTION_INTERVAL = 5
+# Recouvrement minimum (IoU) pour associer une detection à une piste
+IOU_MATCH = 0.3
+# Nombre de detections complètes qu'une piste peut manquer avant d'être supprimée
+MAX_MISSES = 2
+# Nombre de detections nécessaires avant qu'une piste soit prise en compte
+MIN_HITS = 1
+
+OPENCV_TRACKERS = {"kcf": "TrackerKCF_create", "csrt": "TrackerCSRT_create", "mil": "TrackerMIL_create"}
+
+
+# Crée un tracker OpenCV, renvoie None s'il n'est pas disponible dans cette version d'OpenCV
+def creer_tracker(tracker_type):
+    nom = OPENCV_TRACKERS.get(tracker_type)
+    if nom is None:
+        return None
+    for module in (cv2, getattr(cv2, "legacy", None)):
+        if module is not None and hasattr(module, nom):
+            return getattr(module, nom)()
+    return None
+
+
+# Matrice des IoU entre deux listes de boites (start_x, start_y, end_x, end_y)
+def iou_matrix(boites_a, boites_b):
+    a = np.asarray(boites_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boites_b, dtype=np.float32).reshape(1, -1, 4)
+    largeur = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    hauteur = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = largeur * hauteur
+    aire_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    aire_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = aire_a + aire_b - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+
+# Une piste : un visage ou un animal suivi d'une frame à l'autre
+class Track:
+    def __init__(self, track_id, genre, label, score, box, confiance):
+        self.track_id = track_id
+        self.genre = genre
+        self.label = label
+        self.score = score
+        self.confiance = confiance
+        self.box = tuple(int(v) for v in box)
+        self.hits = 1
+        self.misses = 0
+        # Déplacement moyen de la boite par frame (pour l'extrapolation)
+        self.vitesse = (0.0, 0.0)
+        self.tracker = None
+
+    def detection(self):
+        return (self.genre, self.label, self.score, self.box, self.confiance)
+
+
+# Association glouton des detections aux pistes par IoU
+class IouTracker:
+    def __init__(self, iou_min=IOU_MATCH, max_misses=MAX_MISSES):
+        self.iou_min = iou_min
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+
+    # detections : liste (genre, label, score, boite, confiance), frames : nombre de frames depuis la derniere mise à jour
+    def update(self, detections, frames=1):
+        libres = set(range(len(detections)))
+        associees = set()
+        if self.tracks and detections:
+            ious = iou_matrix([t.box for t in self.tracks], [d[3] for d in detections])
+            # Une piste ne peut être associée qu'à une detection du même genre
+            genres = np.array([[t.genre == d[0] for d in detections] for t in self.tracks])
+            ious = np.where(genres, ious, 0.0)
+            for t_index, d_index in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[t_index, d_index] < self.iou_min:
+                    break
+                if d_index not in libres or t_index in associees:
+                    continue
+                self._associer(self.tracks[t_index], detections[d_index], frames)
+                associees.add(t_index)
+                libres.discard(d_index)
+
+        for t_index, track in enumerate(self.tracks):
+            track.misses = 0 if t_index in associees else track.misses + 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for d_index in sorted(libres):
+            genre, label, score, box, confiance = detections[d_index]
+            self.tracks.append(Track(self.next_id, genre, label, score, box, confiance))
+            self.next_id += 1
+        return self.tracks
+
+    @staticmethod
+    def _associer(track, detection, frames):
+        genre, label, score, box, confiance = detection
+        box = tuple(int(v) for v in box)
+        track.vitesse = ((box[0] - track.box[0]) / frames, (box[1] - track.box[1]) / frames)
+        track.box = box
+        track.label = label
+        track.score = score
+        track.confiance = confiance
+        track.hits += 1
+
+
+# Enveloppe le moteur d'inference : detection complète toutes les N frames, suivi entre les deux
+# dessiner=False : les detections ne sont pas dessinées sur la frame (mode sans écran)
+class TrackedDetector:
+    def __init__(self, engine, intervalle=DETECTION_INTERVAL, tracker_type=TRACKER_TYPE, min_hits=MIN_HITS, dessiner=True):
+        self.engine = engine
+        self.intervalle = intervalle
+        self.tracker_type = tracker_type
+        self.min_hits = min_hits
+        self.dessiner = dessiner
+        self.iou_tracker = IouTracker()
+        self.frames_depuis_detection = intervalle
+        if tracker_type != "iou" and creer_tracker(tracker_type) is None:
+            print("Tracker {} indisponible dans cette version d'OpenCV, extrapolation des boites".format(tracker_type))
+            self.tracker_type = "iou"
+
+    @property
+    def tracks(self):
+        return [t for t in self.iou_tracker.tracks if t.hits >= self.min_hits]
+
+    # Même interface que InferenceEngine.detect
+    def detect(self, frame):
+        if self.frames_depuis_detection >= self.intervalle or not self._suivre(frame):
+            self._detection_complete(frame)
+        else:
+            self.frames_depuis_detection += 1
+        return self.engine.annotate(frame, [t.detection() for t in self.tracks], self.dessiner)
+
+    # Met à jour les pistes avec des detections calculées ailleurs (backend multi-processus)
+    def update(self, frame, detections):
+        self.iou_tracker.update(detections, max(self.frames_depuis_detection, 1))
+        self.frames_depuis_detection = 1
+        return self.engine.annotate(frame, [t.detection() for t in self.tracks], self.dessiner)
+
+    def _detection_complete(self, frame):
+        frames = max(self.frames_depuis_detection, 1)
+        self.iou_tracker.update(self.engine.analyse(frame), frames)
+        self.frames_depuis_detection = 1
+        if self.tracker_type != "iou":
+            for track in self.iou_tracker.tracks:
+                start_x, start_y, end_x, end_y = track.box
+                track.tracker = creer_tracker(self.tracker_type)
+                track.tracker.init(frame, (start_x, start_y, max(end_x - start_x, 1), max(end_y - start_y, 1)))
+
+    # Déplace les boites sur une frame intermédiaire, renvoie False si une piste est perdue
+    def _suivre(self, frame):
+        for track in self.iou_tracker.tracks:
+            start_x, start_y, end_x, end_y = track.box
+            if track.tracker is None:
+                dx, dy = track.vitesse
+                track.box = (int(start_x + dx), int(start_y + dy), int(end_x + dx), int(end_y + dy))
+                continue
+            ok, (x, y, w, h) = track.tracker.update(frame)
+            if not ok:
+                return False
+            track.box = (int(x), int(y), int(x + w), int(y + h))
+        return True